@@ -0,0 +1,69 @@
+"""
+Timeout adaptativo por alvo, no estilo do RTO do TCP (RFC 6298)
+Calcula o timeout a partir do RTT suavizado e da sua variação
+"""
+import math
+import threading
+from typing import Optional
+
+
+class TimeoutEstimator:
+    """Estimador de timeout a partir do histórico de RTT de um alvo"""
+
+    ALPHA = 1 / 8  # Ganho do RTT suavizado
+    BETA = 1 / 4   # Ganho da variação do RTT
+    K = 4          # Multiplicador da variação
+
+    def __init__(self, floor: float = 0.05, ceiling: float = 5.0, initial: Optional[float] = None,
+                 granularity: float = 0.001, max_backoff: Optional[int] = None):
+        """
+        Inicializa o estimador
+
+        Args:
+            floor: Timeout mínimo em segundos (default: 50 ms)
+            ceiling: Timeout máximo em segundos (default: 5 s)
+            initial: Timeout antes da primeira resposta (None = ceiling)
+            granularity: Granularidade do relógio em segundos (G da RFC 6298)
+            max_backoff: Multiplicador máximo aplicado após timeouts seguidos (None = dobra até o teto,
+                como na RFC 6298 5.5; um limite pequeno prende um alvo no piso se o RTT subir)
+        """
+        self.floor = floor
+        self.ceiling = ceiling
+        self.initial = ceiling if initial is None else initial
+        self.granularity = granularity
+        self.max_backoff = max_backoff
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self._backoff = 1
+        self._lock = threading.Lock()
+
+    def observe(self, rtt: float):
+        """
+        Registra um RTT medido (zera o backoff)
+
+        Args:
+            rtt: RTT em segundos
+        """
+        with self._lock:
+            if self.srtt is None:
+                self.srtt = rtt
+                self.rttvar = rtt / 2
+            else:
+                self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+                self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+            self._backoff = 1
+
+    def on_timeout(self):
+        """Registra um timeout (dobra o timeout até o teto ou até max_backoff vezes o valor base)"""
+        with self._lock:
+            limit = self.max_backoff or math.ceil(self.ceiling / self.floor)
+            self._backoff = min(self._backoff * 2, limit)
+
+    def timeout(self) -> float:
+        """Retorna o timeout atual em segundos"""
+        with self._lock:
+            if self.srtt is None:
+                return self.initial
+            base = self.srtt + max(self.granularity, self.K * self.rttvar)
+            base = min(max(base, self.floor), self.ceiling)
+            return min(base * self._backoff, self.ceiling)
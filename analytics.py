@@ -0,0 +1,279 @@
+"""
+Análise vetorizada do histórico de pings com NumPy (opcional)
+Carrega o histórico (CSV do CSVLogger ou arquivo .npz) em arrays colunares e calcula SLA,
+perda móvel, histogramas, percentis e séries reamostradas sem laços por amostra
+"""
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+from log_report import iter_range
+from ping_monitor import STATUS_CODES
+
+
+_STATUS_INDEX = {status: code for code, status in enumerate(STATUS_CODES)}
+_OK = 0
+
+
+def _require_numpy():
+    if not HAS_NUMPY:
+        raise ImportError("analytics requer NumPy (pip install numpy)")
+
+
+class ProbeHistory:
+    """Histórico em arrays colunares, ordenado por tempo"""
+
+    def __init__(self, times, target_index, rtt_ms, status, targets: List[str]):
+        """
+        Inicializa o histórico
+
+        Args:
+            times: Array datetime64[us] com o instante de cada amostra
+            target_index: Array int32 com o índice do alvo em targets
+            rtt_ms: Array float64 com o RTT (NaN quando ausente)
+            status: Array uint8 com o código do status (STATUS_CODES)
+            targets: Nomes dos alvos
+        """
+        _require_numpy()
+        self.times = times
+        self.target_index = target_index
+        self.rtt_ms = rtt_ms
+        self.status = status
+        self.targets = targets
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def select(self, target: Optional[str] = None, start: Optional[str] = None,
+               end: Optional[str] = None) -> 'ProbeHistory':
+        """
+        Filtra por alvo e intervalo [start, end] (busca binária nos tempos)
+
+        Args:
+            target: Nome do alvo (None = todos)
+            start: Timestamp ISO 8601 inicial (None = desde o início)
+            end: Timestamp ISO 8601 final (None = até o fim)
+        """
+        low = np.searchsorted(self.times, np.datetime64(start, 'us'), 'left') if start else 0
+        high = np.searchsorted(self.times, np.datetime64(end, 'us'), 'right') if end else len(self.times)
+        part = slice(low, high)
+        mask = None
+        if target is not None:
+            if target not in self.targets:
+                mask = np.zeros(high - low, dtype=bool)
+            else:
+                mask = self.target_index[part] == self.targets.index(target)
+        columns = [self.times[part], self.target_index[part], self.rtt_ms[part], self.status[part]]
+        if mask is not None:
+            columns = [column[mask] for column in columns]
+        return ProbeHistory(*columns, self.targets)
+
+    def save(self, path: str):
+        """Salva o histórico no formato binário (.npz comprimido)"""
+        np.savez_compressed(path, times=self.times.astype('int64'), target_index=self.target_index,
+                            rtt_ms=self.rtt_ms, status=self.status, targets=np.array(self.targets, dtype=str))
+
+
+def load_npz(path: str) -> ProbeHistory:
+    """Carrega um histórico salvo com ProbeHistory.save"""
+    _require_numpy()
+    with np.load(path) as data:
+        return ProbeHistory(data['times'].astype('datetime64[us]'), data['target_index'], data['rtt_ms'],
+                            data['status'], [str(target) for target in data['targets']])
+
+
+def load_csv(log_file: str, start: Optional[str] = None, end: Optional[str] = None,
+             chunk_rows: int = 100000) -> ProbeHistory:
+    """
+    Carrega o CSV do CSVLogger (com segmentos rotacionados) em arrays
+
+    As linhas são lidas em blocos de chunk_rows e cada bloco é convertido de uma vez
+    (timestamps ISO são convertidos pelo NumPy, não um por um em Python).
+
+    Args:
+        log_file: Caminho do arquivo CSV atual
+        start: Timestamp ISO 8601 inicial (None = desde o início)
+        end: Timestamp ISO 8601 final (None = até o fim)
+        chunk_rows: Linhas por bloco
+    """
+    _require_numpy()
+    targets: List[str] = []
+    target_ids: Dict[str, int] = {}
+    chunks = []
+    timestamps, indexes, rtts, statuses = [], [], [], []
+
+    def flush():
+        if timestamps:
+            chunks.append((
+                np.array(timestamps, dtype='datetime64[us]'),
+                np.array(indexes, dtype=np.int32),
+                np.array(rtts, dtype=np.float64),
+                np.array(statuses, dtype=np.uint8)
+            ))
+            del timestamps[:], indexes[:], rtts[:], statuses[:]
+
+    nan = float('nan')
+    for record in iter_range(log_file, start, end):
+        ip = record['ip']
+        index = target_ids.get(ip)
+        if index is None:
+            index = target_ids[ip] = len(targets)
+            targets.append(ip)
+        timestamps.append(record['timestamp'])
+        indexes.append(index)
+        rtts.append(nan if record['rtt_ms'] is None else record['rtt_ms'])
+        statuses.append(_STATUS_INDEX.get(record['status'], 2))
+        if len(timestamps) >= chunk_rows:
+            flush()
+    flush()
+
+    if not chunks:
+        return ProbeHistory(np.array([], dtype='datetime64[us]'), np.array([], dtype=np.int32),
+                            np.array([], dtype=np.float64), np.array([], dtype=np.uint8), targets)
+    columns = [np.concatenate(column) for column in zip(*chunks)]
+    # Linhas de agentes diferentes podem chegar fora de ordem: ordenação estável por tempo
+    order = np.argsort(columns[0], kind='stable')
+    if not np.all(order[1:] > order[:-1]):
+        columns = [column[order] for column in columns]
+    return ProbeHistory(*columns, targets)
+
+
+def sla(history: ProbeHistory) -> Dict[str, Dict]:
+    """
+    Calcula o SLA de cada alvo
+
+    Returns:
+        {alvo: {'samples', 'ok', 'loss_pct', 'availability_pct' (por tempo, amostra e retenção)}}
+    """
+    _require_numpy()
+    count = len(history.targets)
+    samples = np.bincount(history.target_index, minlength=count)
+    ok = np.bincount(history.target_index, weights=history.status == _OK, minlength=count)
+
+    # Por tempo: cada amostra vale até a próxima amostra do mesmo alvo
+    order = np.lexsort((history.times, history.target_index))
+    targets = history.target_index[order]
+    times = history.times[order].astype('int64')
+    is_ok = history.status[order] == _OK
+    same_target = targets[1:] == targets[:-1]
+    elapsed = np.where(same_target, np.diff(times), 0)
+    observed = np.bincount(targets[:-1], weights=elapsed, minlength=count)
+    up = np.bincount(targets[:-1], weights=elapsed * is_ok[:-1], minlength=count)
+
+    report = {}
+    for index, target in enumerate(history.targets):
+        if not samples[index]:
+            continue
+        report[target] = {
+            'samples': int(samples[index]),
+            'ok': int(ok[index]),
+            'loss_pct': float(100.0 * (samples[index] - ok[index]) / samples[index]),
+            'availability_pct': float(100.0 * up[index] / observed[index]) if observed[index] else None
+        }
+    return report
+
+
+def rolling_loss(history: ProbeHistory, target: str, window: int = 60):
+    """
+    Perda móvel de um alvo nas últimas `window` amostras (somas acumuladas)
+
+    Returns:
+        (tempos, perda em %) com um valor por amostra do alvo
+    """
+    _require_numpy()
+    part = history.select(target)
+    lost = np.concatenate(([0], np.cumsum(part.status != _OK)))
+    positions = np.arange(1, len(part) + 1)
+    first = np.maximum(positions - window, 0)
+    return part.times, 100.0 * (lost[positions] - lost[first]) / (positions - first)
+
+
+def rtt_histogram(history: ProbeHistory, target: Optional[str] = None, bins=50, range_ms=None):
+    """
+    Histograma dos RTT das amostras OK
+
+    Args:
+        target: Nome do alvo (None = todos)
+        bins: Quantidade ou limites dos baldes (como np.histogram)
+        range_ms: (mínimo, máximo) em ms (None = faixa dos dados)
+
+    Returns:
+        (contagens, limites dos baldes)
+    """
+    _require_numpy()
+    part = history.select(target) if target is not None else history
+    values = part.rtt_ms[(part.status == _OK) & ~np.isnan(part.rtt_ms)]
+    return np.histogram(values, bins=bins, range=range_ms)
+
+
+def percentiles(history: ProbeHistory, qs: Sequence[float] = (50, 95, 99)) -> Dict[str, Dict]:
+    """
+    Percentis exatos de RTT por alvo
+
+    Returns:
+        {alvo: {'p50': ..., 'p95': ..., 'p99': ...}} (somente alvos com RTT)
+    """
+    _require_numpy()
+    valid = (history.status == _OK) & ~np.isnan(history.rtt_ms)
+    targets = history.target_index[valid]
+    values = history.rtt_ms[valid]
+    order = np.argsort(targets, kind='stable')
+    targets, values = targets[order], values[order]
+    bounds = np.searchsorted(targets, np.arange(len(history.targets) + 1))
+    report = {}
+    for index, target in enumerate(history.targets):
+        group = values[bounds[index]:bounds[index + 1]]
+        if len(group):
+            result = np.percentile(group, qs)
+            report[target] = {f"p{q:g}": float(value) for q, value in zip(qs, result)}
+    return report
+
+
+def resample(history: ProbeHistory, target: str, bucket_seconds: float = 60.0) -> Dict:
+    """
+    Agrega as amostras de um alvo em intervalos fixos (alinhados à época)
+
+    Returns:
+        Dicionário de arrays com um valor por intervalo com amostras:
+        'start' (datetime64), 'samples', 'loss_pct', 'rtt_mean', 'rtt_min', 'rtt_max' (NaN sem RTT)
+    """
+    _require_numpy()
+    part = history.select(target)
+    if not len(part):
+        empty = np.array([], dtype=np.float64)
+        return {'start': np.array([], dtype='datetime64[us]'), 'samples': np.array([], dtype=np.int64),
+                'loss_pct': empty, 'rtt_mean': empty, 'rtt_min': empty, 'rtt_max': empty}
+    bucket_us = int(bucket_seconds * 1e6)
+    buckets = part.times.astype('int64') // bucket_us
+    starts, slot = np.unique(buckets, return_inverse=True)
+    count = len(starts)
+
+    samples = np.bincount(slot, minlength=count)
+    lost = np.bincount(slot, weights=part.status != _OK, minlength=count)
+    valid = (part.status == _OK) & ~np.isnan(part.rtt_ms)
+    rtt_count = np.bincount(slot[valid], minlength=count)
+    rtt_sum = np.bincount(slot[valid], weights=part.rtt_ms[valid], minlength=count)
+    rtt_min = np.full(count, np.inf)
+    rtt_max = np.full(count, -np.inf)
+    np.minimum.at(rtt_min, slot[valid], part.rtt_ms[valid])
+    np.maximum.at(rtt_max, slot[valid], part.rtt_ms[valid])
+    no_rtt = rtt_count == 0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rtt_mean = rtt_sum / rtt_count
+    rtt_mean[no_rtt] = np.nan
+    rtt_min[no_rtt] = np.nan
+    rtt_max[no_rtt] = np.nan
+    return {
+        'start': (starts * bucket_us).astype('datetime64[us]'),
+        'samples': samples,
+        'loss_pct': 100.0 * lost / samples,
+        'rtt_mean': rtt_mean,
+        'rtt_min': rtt_min,
+        'rtt_max': rtt_max
+    }
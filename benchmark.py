@@ -0,0 +1,352 @@
+"""
+Benchmarks dos caminhos críticos do Monitor de IPs
+
+Uso:
+    python benchmark.py run --output baseline.json
+    python benchmark.py compare baseline.json atual.json --threshold 0.10
+    python benchmark.py compare baseline.json          (roda os benchmarks e compara)
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from clock import VirtualClock
+from csv_logger import CSVLogger
+from ip_catalog import IPCatalog
+from ping_monitor import PingMonitor
+from sharded_engine import ResultRing
+
+
+# Saídas de ping gravadas (Windows EN/PT, Linux, falha)
+SAMPLE_OUTPUTS = [
+    ('windows', (
+        "\nPinging 8.8.8.8 with 32 bytes of data:\n"
+        "Reply from 8.8.8.8: bytes=32 time=72ms TTL=111\n\n"
+        "Ping statistics for 8.8.8.8:\n"
+        "    Packets: Sent = 1, Received = 1, Lost = 0 (0% loss),\n"
+        "Approximate round trip times in milli-seconds:\n"
+        "    Minimum = 72ms, Maximum = 72ms, Average = 72ms\n"
+    )),
+    ('windows', (
+        "\nDisparando 192.168.224.22 com 32 bytes de dados:\n"
+        "Resposta de 192.168.224.22: bytes=32 tempo<1ms TTL=128\n\n"
+        "Estatísticas do Ping para 192.168.224.22:\n"
+        "    Pacotes: Enviados = 1, Recebidos = 1, Perdidos = 0 (0% de perda),\n"
+        "Aproximar um número redondo de vezes em milissegundos:\n"
+        "    Mínimo = 0ms, Máximo = 0ms, Média = 0ms\n"
+    )),
+    ('linux', (
+        "PING 8.8.8.8 (8.8.8.8) 56(84) bytes of data.\n"
+        "64 bytes from 8.8.8.8: icmp_seq=1 ttl=117 time=12.3 ms\n\n"
+        "--- 8.8.8.8 ping statistics ---\n"
+        "1 packets transmitted, 1 received, 0% packet loss, time 0ms\n"
+        "rtt min/avg/max/mdev = 12.345/12.345/12.345/0.000 ms\n"
+    )),
+    ('linux', (
+        "PING 192.168.224.24 (192.168.224.24) 56(84) bytes of data.\n\n"
+        "--- 192.168.224.24 ping statistics ---\n"
+        "1 packets transmitted, 0 received, 100% packet loss, time 0ms\n"
+    )),
+]
+
+
+class _FakePingMonitor(PingMonitor):
+    """Monitor com backend falso (sem subprocess) para medir o agendamento"""
+
+    def _ping(self) -> Dict:
+        return {
+            'status': 'OK',
+            'rtt_ms': 1.0,
+            'timestamp': self.clock.now().isoformat(),
+            'ttl': 64,
+            'bytes': 64,
+            'output': '',
+            'ip': self.ip
+        }
+
+
+def _metric(value: float, unit: str, higher_is_better: bool = True) -> Dict:
+    """Cria o registro de uma métrica"""
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def _best_of(func: Callable[[], float], repeat: int = 3) -> float:
+    """Executa a função várias vezes e retorna o menor tempo (segundos)"""
+    return min(func() for _ in range(repeat))
+
+
+def bench_parse() -> Dict:
+    """Parse das saídas de ping (_extract_rtt/_extract_ttl/_extract_bytes)"""
+    monitor = PingMonitor("8.8.8.8")
+    rounds = 2000
+
+    def run():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for system, output in SAMPLE_OUTPUTS:
+                monitor._extract_rtt(output, system)
+                monitor._extract_ttl(output, system)
+                monitor._extract_bytes(output, system)
+        return time.perf_counter() - start
+
+    elapsed = _best_of(run)
+    return {'outputs_per_s': _metric(rounds * len(SAMPLE_OUTPUTS) / elapsed, 'outputs/s')}
+
+
+def bench_csv_logger() -> Dict:
+    """Vazão de CSVLogger.log"""
+    count = 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        def run():
+            path = os.path.join(tmp, 'bench_logs.csv')
+            if os.path.exists(path):
+                os.remove(path)
+            logger = CSVLogger(path)
+            start = time.perf_counter()
+            for i in range(count):
+                logger.log("2024-01-15T10:30:45.123456", "192.168.224.22", 0.5 + i % 7, "OK")
+            return time.perf_counter() - start
+
+        elapsed = _best_of(run)
+    return {'rows_per_s': _metric(count / elapsed, 'rows/s')}
+
+
+def bench_csv_logger_deadband() -> Dict:
+    """Vazão e linhas gravadas por amostra do CSVLogger em modo deadband (rede estável)"""
+    count = 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        def run():
+            path = os.path.join(tmp, 'bench_deadband.csv')
+            if os.path.exists(path):
+                os.remove(path)
+            logger = CSVLogger(path, mode='deadband')
+            start = time.perf_counter()
+            for i in range(count):
+                logger.log(f"2024-01-15T10:{i // 60 % 60:02d}:{i % 60:02d}", "192.168.224.22", 0.5 + (i % 7) * 0.05, "OK")
+            logger.close()
+            run.rows = logger.rows_written
+            return time.perf_counter() - start
+
+        elapsed = _best_of(run)
+    return {
+        'rows_per_s': _metric(count / elapsed, 'rows/s'),
+        'rows_written_pct': _metric(100.0 * run.rows / count, '%', higher_is_better=False)
+    }
+
+
+def bench_scheduler(target_counts: List[int] = (10, 100, 500)) -> Dict:
+    """Escalabilidade do agendamento em função do número de alvos (backend falso)"""
+    results = {}
+    virtual_seconds = 60
+    for count in target_counts:
+        clock = VirtualClock()
+        probes = [0]
+
+        def callback(_result, probes=probes):
+            probes[0] += 1
+
+        monitors = [
+            _FakePingMonitor(f"10.{i // 65536}.{(i // 256) % 256}.{i % 256}", interval=1,
+                             callback=callback, clock=clock)
+            for i in range(count)
+        ]
+        start = time.perf_counter()
+        for monitor in monitors:
+            monitor.start()
+        clock.advance(virtual_seconds)
+        elapsed = time.perf_counter() - start
+        for monitor in monitors:
+            monitor.stop()
+        results[f'probes_per_s_{count}_targets'] = _metric(probes[0] / elapsed, 'probes/s')
+    return results
+
+
+def bench_catalog(sizes: List[int] = (10, 100, 1000)) -> Dict:
+    """IPCatalog.add (que também salva) em função do tamanho do catálogo"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'catalog_{size}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({f"Host {i}": f"10.0.{i // 256}.{i % 256}" for i in range(size)}, f)
+            catalog = IPCatalog(path)
+            adds = 50
+            start = time.perf_counter()
+            for i in range(adds):
+                catalog.add(f"Novo {i}", f"172.16.0.{i}")
+            elapsed = time.perf_counter() - start
+            results[f'add_per_s_{size}_entries'] = _metric(adds / elapsed, 'adds/s')
+    return results
+
+
+def bench_result_ring() -> Dict:
+    """Vazão do anel em memória compartilhada do motor em processos (gravação + leitura)"""
+    count = 20000
+    ring = ResultRing(capacity=4096)
+    try:
+        def run():
+            start = time.perf_counter()
+            for i in range(count):
+                ring.push(i % 500, 'OK', 0.5 + i % 7, 64, 32, 1700000000.0)
+                if i % 1024 == 1023:
+                    ring.pop_all()
+            ring.pop_all()
+            return time.perf_counter() - start
+
+        elapsed = _best_of(run)
+    finally:
+        ring.close()
+    return {'records_per_s': _metric(count / elapsed, 'records/s')}
+
+
+def bench_tk_update() -> Dict:
+    """Vazão de PingPanel._update_ui (precisa de display; ignorado sem Tk)"""
+    try:
+        import tkinter as tk
+        from main import PingPanel
+        root = tk.Tk()
+    except Exception as e:
+        return {'skipped': str(e)}
+
+    try:
+        root.withdraw()
+        panel = PingPanel(root, None, 0)
+        count = 1000
+        result = {
+            'status': 'OK', 'rtt_ms': 12.3, 'timestamp': '2024-01-15T10:30:45.123456',
+            'ttl': 117, 'bytes': 64, 'output': '', 'ip': '8.8.8.8'
+        }
+        start = time.perf_counter()
+        for _ in range(count):
+            panel._update_ui(dict(result))
+        root.update_idletasks()
+        elapsed = time.perf_counter() - start
+        return {'updates_per_s': _metric(count / elapsed, 'updates/s')}
+    finally:
+        root.destroy()
+
+
+BENCHMARKS = {
+    'parse': bench_parse,
+    'csv_logger': bench_csv_logger,
+    'csv_logger_deadband': bench_csv_logger_deadband,
+    'scheduler': bench_scheduler,
+    'catalog': bench_catalog,
+    'result_ring': bench_result_ring,
+    'tk_update': bench_tk_update,
+}
+
+
+def run_benchmarks(names: Optional[List[str]] = None) -> Dict:
+    """
+    Executa os benchmarks
+
+    Args:
+        names: Nomes dos benchmarks (None = todos)
+
+    Returns:
+        Dicionário com metadados e resultados por benchmark
+    """
+    results = {}
+    for name in names or list(BENCHMARKS):
+        print(f"Executando {name}...")
+        results[name] = BENCHMARKS[name]()
+    return {
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = 0.10) -> List[Dict]:
+    """
+    Compara resultados com o baseline
+
+    Args:
+        baseline: Resultados salvos anteriormente
+        current: Resultados atuais
+        threshold: Piora relativa máxima tolerada (0.10 = 10%)
+
+    Returns:
+        Lista de comparações (name, metric, baseline, current, change, regression)
+    """
+    comparisons = []
+    for name, metrics in baseline.get('results', {}).items():
+        current_metrics = current.get('results', {}).get(name, {})
+        for metric, data in metrics.items():
+            if not isinstance(data, dict) or not isinstance(current_metrics.get(metric), dict):
+                continue
+            old = data['value']
+            new = current_metrics[metric]['value']
+            if not old:
+                continue
+            change = (new - old) / old
+            # Piora = queda se maior é melhor, aumento se menor é melhor
+            worsening = -change if data.get('higher_is_better', True) else change
+            comparisons.append({
+                'name': name,
+                'metric': metric,
+                'baseline': old,
+                'current': new,
+                'change': change,
+                'regression': worsening > threshold,
+            })
+    return comparisons
+
+
+def _load(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Função principal (linha de comando)"""
+    parser = argparse.ArgumentParser(description="Benchmarks do Monitor de IPs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = sub.add_parser('run', help="Executa os benchmarks")
+    run_parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks a executar")
+    run_parser.add_argument('--output', help="Arquivo JSON para salvar os resultados")
+
+    compare_parser = sub.add_parser('compare', help="Compara resultados com um baseline")
+    compare_parser.add_argument('baseline', help="Arquivo JSON do baseline")
+    compare_parser.add_argument('current', nargs='?', help="Arquivo JSON atual (None = executa agora)")
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help="Piora relativa tolerada (default: 0.10)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        data = run_benchmarks(args.only)
+        text = json.dumps(data, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text)
+            print(f"Resultados salvos em {args.output}")
+        else:
+            print(text)
+        return 0
+
+    baseline = _load(args.baseline)
+    current = _load(args.current) if args.current else run_benchmarks(list(baseline.get('results', {})))
+    comparisons = compare_results(baseline, current, args.threshold)
+
+    regressions = 0
+    for item in comparisons:
+        flag = "REGRESSÃO" if item['regression'] else "ok"
+        print(f"{item['name']:>12} {item['metric']:<32} {item['baseline']:>12.1f} -> "
+              f"{item['current']:>12.1f} ({item['change']:+.1%}) {flag}")
+        regressions += item['regression']
+
+    print(f"\n{regressions} regressão(ões) acima de {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Relógio injetável para o Monitor de IPs
+Permite rodar os loops de monitoramento em tempo real ou em tempo virtual (testes/simulações)
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class Clock:
+    """Relógio real (padrão) usado pelos monitores"""
+
+    def now(self) -> datetime:
+        """Retorna a data/hora atual"""
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        """Retorna um tempo monotônico em segundos (para medir intervalos)"""
+        return time.monotonic()
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """
+        Aguarda até o evento ser sinalizado ou o timeout expirar
+
+        Args:
+            event: Evento que interrompe a espera
+            timeout: Tempo máximo de espera em segundos
+
+        Returns:
+            True se o evento foi sinalizado, False se o tempo expirou
+        """
+        return event.wait(timeout)
+
+    def sleep(self, seconds: float):
+        """Dorme pelo tempo indicado"""
+        time.sleep(seconds)
+
+    def attach(self, thread: threading.Thread):
+        """Registra uma thread que vai usar o relógio (sem efeito no relógio real)"""
+        pass
+
+    def detach(self):
+        """Indica que uma thread registrada terminou (sem efeito no relógio real)"""
+        pass
+
+
+class VirtualClock(Clock):
+    """
+    Relógio virtual controlado manualmente
+
+    O tempo só avança com advance(). As threads que esperam no relógio são
+    acordadas em ordem de prazo, e advance() só continua depois que todas voltaram
+    a dormir, então 24 horas de monitoramento rodam em segundos e de forma determinística.
+    """
+
+    # Tempo real máximo esperando threads ficarem ociosas (evita travar testes)
+    IDLE_TIMEOUT = 5.0
+    # Intervalo real de verificação de eventos sinalizados fora do relógio
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, start: Optional[datetime] = None):
+        """
+        Inicializa o relógio virtual
+
+        Args:
+            start: Data/hora inicial (None = 2024-01-01 00:00:00)
+        """
+        self._start = start or datetime(2024, 1, 1)
+        self._elapsed = 0.0
+        self._cond = threading.Condition()
+        self._deadlines: dict = {}  # {token: prazo em segundos virtuais}
+        self._threads = set()  # Threads registradas via attach()
+        self._active = 0  # Threads registradas que estão rodando (não dormindo)
+
+    def now(self) -> datetime:
+        """Retorna a data/hora virtual"""
+        return self._start + timedelta(seconds=self._elapsed)
+
+    def monotonic(self) -> float:
+        """Retorna os segundos virtuais decorridos"""
+        return self._elapsed
+
+    def attach(self, thread: threading.Thread):
+        """Registra uma thread antes de iniciá-la (ela conta como ativa)"""
+        with self._cond:
+            if thread not in self._threads:
+                self._threads.add(thread)
+                self._active += 1
+
+    def detach(self):
+        """Remove a thread atual do registro (chamado quando ela termina)"""
+        with self._cond:
+            thread = threading.current_thread()
+            if thread in self._threads:
+                self._threads.discard(thread)
+                self._active -= 1
+                self._cond.notify_all()
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Aguarda o evento ou o avanço do tempo virtual até o prazo"""
+        with self._cond:
+            token = object()
+            self._deadlines[token] = self._elapsed + max(0.0, timeout)
+            counted = threading.current_thread() in self._threads
+            if counted:
+                self._active -= 1
+            self._cond.notify_all()
+            try:
+                while not event.is_set() and self._elapsed < self._deadlines[token]:
+                    self._cond.wait(self.POLL_INTERVAL)
+            finally:
+                del self._deadlines[token]
+                if counted:
+                    self._active += 1
+                self._cond.notify_all()
+            return event.is_set()
+
+    def sleep(self, seconds: float):
+        """Dorme em tempo virtual"""
+        self.wait(threading.Event(), seconds)
+
+    def _wait_idle(self):
+        """Aguarda (em tempo real) até nenhuma thread estar rodando ou vencida"""
+        end = time.monotonic() + self.IDLE_TIMEOUT
+        while self._active > 0 or any(d <= self._elapsed for d in self._deadlines.values()):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(min(remaining, self.POLL_INTERVAL))
+
+    def advance(self, seconds: float):
+        """
+        Avança o tempo virtual, acordando cada thread no seu prazo
+
+        Args:
+            seconds: Quantidade de segundos virtuais a avançar
+        """
+        with self._cond:
+            target = self._elapsed + seconds
+            self._wait_idle()
+            while True:
+                due = [d for d in self._deadlines.values() if d <= target]
+                if not due:
+                    break
+                self._elapsed = max(self._elapsed, min(due))
+                self._cond.notify_all()
+                self._wait_idle()
+            self._elapsed = target
+            self._cond.notify_all()
@@ -2,10 +2,22 @@
 Logger CSV para salvar logs de ping
 """
 import csv
+import gzip
+import io
 import os
+import re
+import shutil
 import sys
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from clock import Clock
+
+HEADER = ['timestamp', 'ip', 'rtt_ms', 'status']
+
+# Segmento fechado: <nome>.<AAAAmmdd-HHMMSS>[-N].csv[.gz]
+_SEGMENT_TIME_FORMAT = '%Y%m%d-%H%M%S'
 
 
 def get_app_data_path(filename):
@@ -28,28 +40,221 @@ def get_app_data_path(filename):
     return os.path.join(base_path, filename)
 
 
+def _segment_pattern(log_file: str):
+    stem, ext = os.path.splitext(os.path.basename(log_file))
+    return re.compile(re.escape(stem) + r'\.(\d{8}-\d{6})(?:-(\d+))?' + re.escape(ext) + r'(\.gz)?$')
+
+
+def list_segments(log_file: str) -> List[str]:
+    """
+    Lista os segmentos fechados de um log, do mais antigo ao mais novo
+
+    Args:
+        log_file: Caminho do arquivo CSV atual
+
+    Returns:
+        Caminhos dos segmentos (comprimidos ou não; o arquivo atual não entra)
+    """
+    directory = os.path.dirname(os.path.abspath(log_file))
+    pattern = _segment_pattern(log_file)
+    segments = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    for name in names:
+        match = pattern.match(name)
+        if not match:
+            continue
+        key = (match.group(1), int(match.group(2) or 0))
+        # Durante a compressão as duas versões existem: a comprimida já está completa
+        if key not in segments or match.group(3):
+            segments[key] = os.path.join(directory, name)
+    return [segments[key] for key in sorted(segments)]
+
+
+def _open_segment(path: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', newline='', encoding='utf-8')
+    return open(path, 'r', newline='', encoding='utf-8')
+
+
+def iter_log_records(log_file: str, include_segments: bool = True) -> Iterator[Dict]:
+    """
+    Lê os registros do log em ordem, atravessando os segmentos rotacionados e comprimidos
+
+    Args:
+        log_file: Caminho do arquivo CSV atual
+        include_segments: Inclui os segmentos fechados antes do arquivo atual
+
+    Returns:
+        Iterador de dicionários {'timestamp', 'ip', 'rtt_ms' (float ou None), 'status'}
+    """
+    paths = list_segments(log_file) if include_segments else []
+    paths.append(log_file)
+    for path in paths:
+        try:
+            f = _open_segment(path)
+        except FileNotFoundError:
+            continue  # Removido pela retenção durante a leitura
+        with f:
+            for row in csv.reader(f):
+                if len(row) < 4 or row == HEADER:
+                    continue
+                yield {
+                    'timestamp': row[0],
+                    'ip': row[1],
+                    'rtt_ms': float(row[2]) if row[2] else None,
+                    'status': row[3]
+                }
+
+
 class CSVLogger:
     """Classe para salvar logs de ping em arquivo CSV"""
     
-    def __init__(self, log_file: str = None):
+    def __init__(self, log_file: str = None, max_bytes: Optional[int] = None,
+                 rotate_interval: Optional[float] = None, backup_count: Optional[int] = None,
+                 max_age: Optional[float] = None, compress: bool = True, clock: Optional[Clock] = None,
+                 mode: str = 'full', deadband_ms: float = 0.5, heartbeat: float = 300.0):
         """
         Inicializa o logger CSV
         
         Args:
             log_file: Caminho do arquivo CSV (None = usa diretório do executável)
+            max_bytes: Rotaciona quando o arquivo atual passaria deste tamanho (None = sem limite)
+            rotate_interval: Rotaciona ao entrar num novo período deste tamanho em segundos,
+                             alinhado à época (86400 = diário; None = sem rotação por tempo)
+            backup_count: Segmentos fechados mantidos (os mais antigos são removidos; None = todos)
+            max_age: Remove segmentos fechados mais antigos que isto em segundos (None = sem limite)
+            compress: Comprime os segmentos fechados com gzip em segundo plano
+            clock: Relógio usado na rotação por tempo e no nome dos segmentos (None = relógio real)
+            mode: 'full' grava todas as amostras; 'deadband' grava só mudanças de status, RTT que
+                  se afasta mais de deadband_ms da última linha do alvo e um heartbeat periódico
+            deadband_ms: Faixa de RTT tolerada sem nova linha (modo deadband)
+            heartbeat: Tempo máximo em segundos sem linha de um alvo (modo deadband)
         """
+        if mode not in ('full', 'deadband'):
+            raise ValueError(f"Modo de log inválido: {mode}")
         if log_file is None:
             self.log_file = get_app_data_path("ping_logs.csv")
         else:
             self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.max_age = max_age
+        self.compress = compress
+        self.clock = clock or Clock()
+        self._lock = threading.Lock()
+        self._compressors: List[threading.Thread] = []
+        self._last_segment = ('', 0)
+        self.mode = mode
+        self.deadband_ms = deadband_ms
+        self.heartbeat = heartbeat
+        self._written: Dict[str, tuple] = {}  # {ip: (datetime, rtt_ms, status)} da última linha gravada
+        self._held: Dict[str, tuple] = {}  # {ip: (timestamp, rtt_ms, status)} da última amostra suprimida
+        self.rows_written = 0
+        self.suppressed = 0
         self._ensure_header()
+        self._size = os.path.getsize(self.log_file)
+        self._header_size = len(self._format_row(HEADER))
+        self._period = self._period_of(datetime.fromtimestamp(os.path.getmtime(self.log_file)))
     
     def _ensure_header(self):
         """Garante que o arquivo CSV existe com o cabeçalho"""
         if not os.path.exists(self.log_file):
             with open(self.log_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow(['timestamp', 'ip', 'rtt_ms', 'status'])
+                writer.writerow(HEADER)
+
+    @staticmethod
+    def _format_row(row: List[str]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(row)
+        return buffer.getvalue()
+
+    def _period_of(self, moment: datetime) -> Optional[int]:
+        if not self.rotate_interval:
+            return None
+        return int(moment.timestamp() // self.rotate_interval)
+
+    def _should_rotate(self, row_size: int, now: datetime) -> bool:
+        if self.max_bytes and self._size + row_size > self.max_bytes:
+            return True
+        return self.rotate_interval is not None and self._period_of(now) != self._period
+
+    def _segment_path(self, now: datetime) -> str:
+        stem, ext = os.path.splitext(self.log_file)
+        stamp = now.strftime(_SEGMENT_TIME_FORMAT)
+        # Segmentos do mesmo segundo recebem um contador crescente (a retenção pode liberar nomes menores)
+        counter = self._last_segment[1] + 1 if self._last_segment[0] == stamp else 0
+        while True:
+            path = f"{stem}.{stamp}-{counter}{ext}" if counter else f"{stem}.{stamp}{ext}"
+            if not os.path.exists(path) and not os.path.exists(path + '.gz'):
+                break
+            counter += 1
+        self._last_segment = (stamp, counter)
+        return path
+
+    def rotate(self):
+        """Fecha o arquivo atual como segmento e começa um novo"""
+        with self._lock:
+            self._rotate(self.clock.now())
+
+    def _rotate(self, now: datetime):
+        segment = self._segment_path(now)
+        os.replace(self.log_file, segment)
+        self._ensure_header()
+        self._size = self._header_size
+        self._period = self._period_of(now)
+        if self.compress:
+            thread = threading.Thread(target=self._compress_segment, args=(segment,), daemon=True)
+            self._compressors = [t for t in self._compressors if t.is_alive()] + [thread]
+            thread.start()
+        else:
+            self._apply_retention()
+
+    def _compress_segment(self, segment: str):
+        """Comprime um segmento fechado (thread em segundo plano)"""
+        temp = segment + '.gz.tmp'
+        try:
+            with open(segment, 'rb') as src, gzip.open(temp, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(temp, segment + '.gz')
+            os.remove(segment)
+        except Exception as e:
+            print(f"Erro ao comprimir log: {e}")
+            if os.path.exists(temp):
+                os.remove(temp)
+        with self._lock:
+            self._apply_retention()
+
+    def _apply_retention(self):
+        """Remove os segmentos além de backup_count ou mais antigos que max_age (com o lock)"""
+        if self.backup_count is None and self.max_age is None:
+            return
+        segments = list_segments(self.log_file)
+        expired = []
+        if self.backup_count is not None and len(segments) > self.backup_count:
+            expired = segments[:len(segments) - self.backup_count]
+        if self.max_age is not None:
+            now = self.clock.now().timestamp()
+            pattern = _segment_pattern(self.log_file)
+            for path in segments:
+                closed = datetime.strptime(pattern.match(os.path.basename(path)).group(1), _SEGMENT_TIME_FORMAT)
+                if now - closed.timestamp() > self.max_age and path not in expired:
+                    expired.append(path)
+        for path in expired:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Erro ao remover log antigo: {e}")
+
+    def close(self, timeout: Optional[float] = None):
+        """Grava as amostras suprimidas pendentes e aguarda as compressões em andamento"""
+        self.flush()
+        for thread in list(self._compressors):
+            thread.join(timeout)
     
     def log(self, timestamp: str, ip: str, rtt_ms: Optional[float], status: str):
         """
@@ -61,11 +266,94 @@ class CSVLogger:
             rtt_ms: Tempo de resposta em ms (None se não disponível)
             status: Status do ping (OK, TIMEOUT, ERROR)
         """
+        if self.mode == 'deadband':
+            with self._lock:
+                if not self._deadband_changed(timestamp, ip, rtt_ms, status):
+                    self._held[ip] = (timestamp, rtt_ms, status)
+                    self.suppressed += 1
+                    return
+                self._held.pop(ip, None)
+        self._write_row(timestamp, ip, rtt_ms, status)
+
+    def _deadband_changed(self, timestamp: str, ip: str, rtt_ms: Optional[float], status: str) -> bool:
+        """Indica se a amostra precisa ser gravada (mudança de status, RTT fora da faixa ou heartbeat)"""
+        last = self._written.get(ip)
         try:
-            with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                rtt_str = str(rtt_ms) if rtt_ms is not None else ''
-                writer.writerow([timestamp, ip, rtt_str, status])
+            moment = datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            moment = None
+        changed = (
+            last is None or moment is None or last[0] is None or status != last[2] or
+            (rtt_ms is None) != (last[1] is None) or
+            (rtt_ms is not None and abs(rtt_ms - last[1]) > self.deadband_ms) or
+            (moment - last[0]).total_seconds() >= self.heartbeat
+        )
+        if changed:
+            self._written[ip] = (moment, rtt_ms, status)
+        return changed
+
+    def flush(self):
+        """Grava a última amostra suprimida de cada alvo (modo deadband), fechando a série"""
+        with self._lock:
+            held, self._held = self._held, {}
+            for ip, (timestamp, rtt_ms, status) in held.items():
+                try:
+                    moment = datetime.fromisoformat(timestamp)
+                except (TypeError, ValueError):
+                    moment = None
+                self._written[ip] = (moment, rtt_ms, status)
+        for ip, (timestamp, rtt_ms, status) in held.items():
+            self._write_row(timestamp, ip, rtt_ms, status)
+
+    def _write_row(self, timestamp: str, ip: str, rtt_ms: Optional[float], status: str):
+        try:
+            rtt_str = str(rtt_ms) if rtt_ms is not None else ''
+            line = self._format_row([timestamp, ip, rtt_str, status])
+            row_size = len(line.encode('utf-8'))
+            with self._lock:
+                if self.max_bytes or self.rotate_interval:
+                    now = self.clock.now()
+                    if self._size <= self._header_size:
+                        self._period = self._period_of(now)  # Nunca fecha um segmento vazio
+                    elif self._should_rotate(row_size, now):
+                        self._rotate(now)
+                with open(self.log_file, 'a', newline='', encoding='utf-8') as f:
+                    f.write(line)
+                self._size += row_size
+                self.rows_written += 1
         except Exception as e:
             print(f"Erro ao salvar log: {e}")
 
+
+def reconstruct_series(records: Iterable[Dict], ip: str, timestamps: Iterable[str]) -> List[Optional[Dict]]:
+    """
+    Reconstrói a série de um alvo nos instantes pedidos (amostra e retenção)
+
+    Num log em modo deadband cada linha vale até a próxima linha do alvo, então o RTT
+    reconstruído fica dentro de deadband_ms do medido e o status é exato.
+
+    Args:
+        records: Registros do log em ordem (ex: iter_log_records)
+        ip: Alvo
+        timestamps: Instantes ISO 8601 em ordem crescente
+
+    Returns:
+        Para cada instante, o registro vigente {'timestamp', 'ip', 'rtt_ms', 'status'}
+        (None antes do primeiro registro do alvo)
+    """
+    series = []
+    current = None
+    pending = None
+    records = (r for r in records if r['ip'] == ip)
+    for timestamp in timestamps:
+        moment = datetime.fromisoformat(timestamp)
+        while True:
+            if pending is None:
+                pending = next(records, None)
+                if pending is None:
+                    break
+            if datetime.fromisoformat(pending['timestamp']) > moment:
+                break
+            current, pending = pending, None
+        series.append(current)
+    return series
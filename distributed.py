@@ -0,0 +1,455 @@
+"""
+Agentes de monitoramento distribuídos e coletor central
+Cada site executa um agente que agrupa os resultados em lotes numerados, comprime e envia
+por TCP ao coletor; o coletor confirma cada lote, descarta repetidos e grava tudo num
+histórico único (CSV) e no exportador de métricas
+
+O coletor escuta só em 127.0.0.1 por padrão; para receber agentes de outros sites use
+--host 0.0.0.0 com um token compartilhado (--token ou MONITORIP_COLLECTOR_TOKEN), enviado
+pelos agentes na apresentação: sem ele qualquer máquina da rede grava resultados no histórico
+"""
+import argparse
+import hmac
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import zlib
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from csv_logger import CSVLogger
+from metrics_exporter import MetricsExporter
+
+
+DEFAULT_PORT = 9466
+MAX_FRAME = 16 * 1024 * 1024
+TOKEN_ENV = 'MONITORIP_COLLECTOR_TOKEN'
+
+_LENGTH = struct.Struct('!I')
+
+
+def send_frame(sock: socket.socket, message: Dict):
+    """Envia uma mensagem: tamanho (4 bytes) + JSON comprimido com zlib"""
+    payload = zlib.compress(json.dumps(message, separators=(',', ':')).encode('utf-8'))
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Conexão encerrada')
+        data += chunk
+    return data
+
+
+def recv_frame(sock: socket.socket) -> Dict:
+    """
+    Recebe uma mensagem enviada com send_frame
+
+    O tamanho comprimido e o descomprimido são limitados a MAX_FRAME (uma mensagem pequena
+    pode expandir para gigabytes).
+
+    Raises:
+        ValueError: Mensagem grande demais, truncada ou que não é um objeto JSON
+    """
+    size, = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > MAX_FRAME:
+        raise ValueError(f'Mensagem muito grande: {size} bytes')
+    decompressor = zlib.decompressobj()
+    data = decompressor.decompress(_recv_exact(sock, size), MAX_FRAME)
+    if decompressor.unconsumed_tail:
+        raise ValueError(f'Mensagem descomprimida maior que {MAX_FRAME} bytes')
+    if not decompressor.eof:
+        raise ValueError('Mensagem comprimida incompleta')
+    message = json.loads(data.decode('utf-8'))
+    if not isinstance(message, dict):
+        raise ValueError('Mensagem deve ser um objeto JSON')
+    return message
+
+
+class ProbeAgent:
+    """Agente de um site: agrupa, comprime e envia os resultados ao coletor"""
+
+    def __init__(self, name: str, collector: Tuple[str, int], batch_size: int = 100,
+                 flush_interval: float = 1.0, spool_limit: int = 10000, window: int = 8,
+                 retry_interval: float = 2.0, token: Optional[str] = None):
+        """
+        Inicializa o agente
+
+        Args:
+            name: Nome do site (prefixo dos alvos no coletor)
+            collector: (host, porta) do coletor
+            batch_size: Resultados por lote
+            flush_interval: Envia um lote incompleto após este tempo em segundos
+            spool_limit: Resultados guardados localmente durante quedas (os mais antigos são descartados)
+            window: Lotes enviados sem confirmação no máximo (contrapressão)
+            retry_interval: Espera entre tentativas de reconexão em segundos
+            token: Token do coletor enviado na apresentação (None = coletor sem autenticação)
+        """
+        self.name = name
+        self.token = token
+        self.collector = collector
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_limit = spool_limit
+        self.window = window
+        self.retry_interval = retry_interval
+        self._cond = threading.Condition()
+        self._pending = deque()  # Resultados ainda não agrupados
+        self._unacked: Dict[int, List[Dict]] = {}  # {seq: itens} enviados e não confirmados
+        self._seq = 0
+        self._sock: Optional[socket.socket] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.connected = threading.Event()
+        self.sent_batches = 0
+        self.acked_batches = 0
+        self.dropped = 0
+
+    def observe(self, ping_result: Dict):
+        """
+        Enfileira um resultado (observador do ProbeRegistry ou callback do PingMonitor)
+
+        Args:
+            ping_result: Dicionário produzido pelo PingMonitor
+        """
+        with self._cond:
+            self._pending.append(ping_result)
+            # Spool cheio: descarta os resultados mais antigos ainda não enviados
+            while self._pending and len(self._pending) + self._unacked_count() > self.spool_limit:
+                self._pending.popleft()
+                self.dropped += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _unacked_count(self) -> int:
+        return sum(len(items) for items in self._unacked.values())
+
+    def spooled(self) -> int:
+        """Retorna os resultados guardados localmente (pendentes + não confirmados)"""
+        with self._cond:
+            return len(self._pending) + self._unacked_count()
+
+    def stats(self) -> Dict:
+        """Retorna os contadores do agente"""
+        with self._cond:
+            return {
+                'sent_batches': self.sent_batches,
+                'acked_batches': self.acked_batches,
+                'unacked_batches': len(self._unacked),
+                'spooled': len(self._pending) + self._unacked_count(),
+                'dropped': self.dropped,
+            }
+
+    def start(self):
+        """Inicia a thread de envio"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2):
+        """Para o envio (o que não foi confirmado permanece no spool em memória)"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+            sock = self._sock
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        """Conecta ao coletor e envia os lotes, reconectando após quedas"""
+        while not self._stop_event.is_set():
+            try:
+                sock = socket.create_connection(self.collector, timeout=5.0)
+            except OSError:
+                self._stop_event.wait(self.retry_interval)
+                continue
+            try:
+                self._session(sock)
+            except (OSError, ValueError, zlib.error):
+                pass
+            finally:
+                self.connected.clear()
+                with self._cond:
+                    self._sock = None
+                    self._cond.notify_all()
+                sock.close()
+            if not self._stop_event.is_set():
+                self._stop_event.wait(self.retry_interval)
+
+    def _session(self, sock: socket.socket):
+        """Uma conexão: apresentação, reenvio do que não foi confirmado e envio contínuo"""
+        hello = {'type': 'hello', 'agent': self.name}
+        if self.token is not None:
+            hello['token'] = self.token
+        send_frame(sock, hello)
+        welcome = recv_frame(sock)
+        if welcome.get('type') != 'welcome':
+            print(f"Coletor recusou o agente {self.name}: {welcome.get('error', welcome.get('type'))}")
+            raise ValueError('Apresentação recusada')
+        sock.settimeout(None)
+        with self._cond:
+            # O coletor já tem tudo até last_seq: descarta e reenvia o resto em ordem
+            for seq in [seq for seq in self._unacked if seq <= welcome.get('last_seq', 0)]:
+                del self._unacked[seq]
+                self.acked_batches += 1
+            self._seq = max(self._seq, welcome.get('last_seq', 0))
+            resend = sorted(self._unacked.items())
+            self._sock = sock
+        for seq, items in resend:
+            send_frame(sock, {'type': 'batch', 'agent': self.name, 'seq': seq, 'items': items})
+        self.connected.set()
+
+        reader = threading.Thread(target=self._read_acks, args=(sock,), daemon=True)
+        reader.start()
+        while not self._stop_event.is_set() and reader.is_alive():
+            with self._cond:
+                # Lote incompleto espera até flush_interval; com a janela cheia espera
+                # confirmações (contrapressão: os resultados continuam no spool)
+                if len(self._unacked) >= self.window or len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if len(self._unacked) >= self.window or not self._pending:
+                    continue
+                items = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._seq += 1
+                seq = self._seq
+                self._unacked[seq] = items
+                self.sent_batches += 1
+            send_frame(sock, {'type': 'batch', 'agent': self.name, 'seq': seq, 'items': items})
+        reader.join(timeout=1)
+
+    def _read_acks(self, sock: socket.socket):
+        """Recebe as confirmações do coletor"""
+        try:
+            while True:
+                message = recv_frame(sock)
+                if message.get('type') != 'ack':
+                    continue
+                with self._cond:
+                    # Confirmação cumulativa: tudo até seq chegou
+                    for seq in [seq for seq in self._unacked if seq <= message['seq']]:
+                        del self._unacked[seq]
+                        self.acked_batches += 1
+                    self._cond.notify_all()
+        except (OSError, ValueError, zlib.error):
+            with self._cond:
+                self._cond.notify_all()
+
+
+class Collector:
+    """Coletor central: recebe os lotes dos agentes e grava num histórico único"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, logger: Optional[CSVLogger] = None,
+                 metrics: Optional[MetricsExporter] = None, on_result: Optional[Callable[[Dict], None]] = None,
+                 token: Optional[str] = None):
+        """
+        Inicializa o coletor
+
+        Args:
+            host: Endereço de escuta (0.0.0.0 = todas as interfaces; use com token)
+            port: Porta de escuta (0 = porta livre escolhida pelo sistema)
+            logger: Histórico CSV único de todos os sites (None = não grava)
+            metrics: Exportador de métricas do painel (None = não exporta)
+            on_result: Função chamada para cada resultado recebido
+            token: Token exigido na apresentação dos agentes (None = sem autenticação)
+        """
+        self.host = host
+        self.token = token
+        self.port = port
+        self.logger = logger
+        self.metrics = metrics
+        self.on_result = on_result
+        self._lock = threading.Lock()
+        self._last_seq: Dict[str, int] = {}  # {agente: último lote gravado}
+        self._server: Optional[socket.socket] = None
+        self._connections = []
+        self._thread: Optional[threading.Thread] = None
+        self.received = 0
+        self.duplicates = 0
+
+    def start(self):
+        """Abre a porta e começa a aceitar agentes"""
+        self._server = socket.create_server((self.host, self.port))
+        self.port = self._server.getsockname()[1]
+        self._thread = threading.Thread(target=self._accept_loop, args=(self._server,), daemon=True)
+        self._thread.start()
+
+    def _accept_loop(self, server: socket.socket):
+        """Aceita os agentes que se conectam"""
+        while True:
+            try:
+                sock, _ = server.accept()
+            except OSError:
+                return  # Socket fechado no stop()
+            with self._lock:
+                self._connections.append(sock)
+            threading.Thread(target=self._handle_agent, args=(sock,), daemon=True).start()
+
+    def _handle_agent(self, sock: socket.socket):
+        """Atende um agente: apresentação, lotes e confirmações"""
+        try:
+            hello = recv_frame(sock)
+            agent = str(hello.get('agent', '?'))
+            if self.token is not None and not hmac.compare_digest(str(hello.get('token', '')), self.token):
+                send_frame(sock, {'type': 'error', 'error': 'Token inválido'})
+                raise ValueError(f"Token inválido do agente {agent}")
+            with self._lock:
+                last_seq = self._last_seq.get(agent, 0)
+            send_frame(sock, {'type': 'welcome', 'last_seq': last_seq})
+            while True:
+                message = recv_frame(sock)
+                if message.get('type') != 'batch':
+                    continue
+                seq, items = message.get('seq'), message.get('items')
+                if not isinstance(seq, int) or isinstance(seq, bool) or seq < 1 or \
+                        not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                    raise ValueError(f"Lote inválido do agente {agent}")
+                self._ingest(agent, seq, items)
+                send_frame(sock, {'type': 'ack', 'seq': seq})
+        except ValueError as e:
+            print(f"Conexão de agente encerrada: {e}")
+        except (OSError, zlib.error):
+            pass
+        finally:
+            with self._lock:
+                if sock in self._connections:
+                    self._connections.remove(sock)
+            sock.close()
+
+    def _ingest(self, agent: str, seq: int, items: List[Dict]):
+        """Grava um lote (lotes já recebidos são apenas confirmados de novo)"""
+        with self._lock:
+            if seq <= self._last_seq.get(agent, 0):
+                self.duplicates += 1
+                return
+            self._last_seq[agent] = seq
+            for item in items:
+                result = dict(item)
+                result['agent'] = agent
+                result['ip'] = f"{agent}/{item.get('ip', '')}"
+                if self.logger:
+                    self.logger.log(result.get('timestamp', ''), result['ip'], result.get('rtt_ms'),
+                                    result.get('status', 'ERROR'))
+                if self.metrics:
+                    self.metrics.observe(result)
+                if self.on_result:
+                    self.on_result(result)
+                self.received += 1
+
+    def last_seq(self, agent: str) -> int:
+        """Retorna o último lote gravado de um agente"""
+        with self._lock:
+            return self._last_seq.get(agent, 0)
+
+    def stop(self):
+        """Fecha a porta e as conexões (o estado dos agentes é mantido para um novo start)"""
+        if self._server:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+        with self._lock:
+            connections = list(self._connections)
+        for sock in connections:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=2)
+
+
+def _parse_host_port(text: str, default_port: int) -> Tuple[str, int]:
+    host, _, port = text.rpartition(':')
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+def main(argv=None) -> int:
+    """Executa um agente ou o coletor pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Monitoramento distribuído do Monitor de IPs")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    agent_parser = sub.add_parser('agent', help="Pinga os alvos e envia os resultados ao coletor")
+    agent_parser.add_argument('--name', required=True, help="Nome do site")
+    agent_parser.add_argument('--collector', required=True, help="host:porta do coletor")
+    agent_parser.add_argument('--interval', type=int, default=5, help="Intervalo entre pings em segundos")
+    agent_parser.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                              help=f"Token do coletor (padrão: variável {TOKEN_ENV})")
+    agent_parser.add_argument('targets', nargs='+', help="IPs ou hostnames monitorados")
+
+    collector_parser = sub.add_parser('collector', help="Recebe os resultados dos agentes")
+    collector_parser.add_argument('--host', default='127.0.0.1',
+                                  help="Endereço de escuta (0.0.0.0 = todas as interfaces; use com --token)")
+    collector_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    collector_parser.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                                  help=f"Token exigido dos agentes (padrão: variável {TOKEN_ENV})")
+    collector_parser.add_argument('--log', help="Arquivo CSV do histórico único")
+    collector_parser.add_argument('--metrics-port', type=int, help="Porta do exportador OpenMetrics")
+    collector_parser.add_argument('--max-mb', type=float, help="Rotaciona o histórico acima deste tamanho em MB")
+    collector_parser.add_argument('--keep', type=int, help="Segmentos comprimidos do histórico mantidos")
+    collector_parser.add_argument('--deadband', type=float, metavar='MS',
+                                  help="Grava só mudanças de status e RTT fora desta faixa em ms")
+
+    args = parser.parse_args(argv)
+    stop = threading.Event()
+
+    if args.command == 'agent':
+        from probe_registry import ProbeRegistry
+        from rate_limiter import RateLimiter
+
+        agent = ProbeAgent(args.name, _parse_host_port(args.collector, DEFAULT_PORT), token=args.token)
+        registry = ProbeRegistry(phase_spread=True, rate_limiter=RateLimiter())
+        registry.add_observer(agent.observe)
+        agent.start()
+        subscriptions = [registry.subscribe(target, args.interval, None) for target in args.targets]
+        try:
+            stop.wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for subscription in subscriptions:
+                subscription.stop()
+            agent.stop()
+        return 0
+
+    metrics = None
+    if args.metrics_port:
+        metrics = MetricsExporter(host='0.0.0.0', port=args.metrics_port)
+        metrics.start()
+    logger = CSVLogger(args.log, max_bytes=int(args.max_mb * 1024 * 1024) if args.max_mb else None,
+                       backup_count=args.keep, mode='deadband' if args.deadband else 'full',
+                       deadband_ms=args.deadband or 0.5)
+    collector = Collector(host=args.host, port=args.port, logger=logger, metrics=metrics, token=args.token)
+    collector.start()
+    print(f"Coletor escutando em {args.host}:{collector.port}")
+    if args.host not in ('127.0.0.1', 'localhost', '::1') and not args.token:
+        print(f"Aviso: coletor exposto sem token; qualquer máquina da rede pode gravar resultados "
+              f"(use --token ou {TOKEN_ENV})")
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+        logger.close()
+        if metrics:
+            metrics.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
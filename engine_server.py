@@ -0,0 +1,519 @@
+"""
+Motor de pings como processo separado da interface
+O servidor executa o ProbeRegistry e atende interfaces por socket Unix (ou TCP local),
+enviando os resultados em lotes de JSON por linha e recebendo comandos de assinatura,
+pausa e cancelamento; várias interfaces podem acompanhar o mesmo motor
+
+Segurança: o socket Unix é criado só para o usuário (umask 077) e o TCP escuta em 127.0.0.1
+por padrão, mas qualquer usuário local alcança uma porta TCP. Com um token compartilhado
+(--token ou MONITORIP_ENGINE_TOKEN) o primeiro comando precisa ser {"op": "hello",
+"token": ...}; conexões sem o token são recusadas.
+"""
+import argparse
+import hmac
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from probe_registry import ProbeRegistry
+from rate_limiter import RateLimiter
+
+
+Address = Union[str, Tuple[str, int]]
+
+DEFAULT_PORT = 9465
+TOKEN_ENV = 'MONITORIP_ENGINE_TOKEN'
+MAX_LINE = 1024 * 1024  # Bytes sem quebra de linha antes de recusar o comando
+
+
+def default_address() -> Address:
+    """Endereço padrão: socket Unix no diretório temporário, ou TCP local sem AF_UNIX"""
+    if hasattr(socket, 'AF_UNIX'):
+        return os.path.join(tempfile.gettempdir(), 'monitor-ip-engine.sock')
+    return ('127.0.0.1', DEFAULT_PORT)
+
+
+def parse_address(text: str) -> Address:
+    """
+    Interpreta um endereço do motor
+
+    Args:
+        text: Caminho do socket Unix, ou host:porta para TCP
+
+    Returns:
+        Caminho (str) ou (host, porta)
+    """
+    host, sep, port = text.rpartition(':')
+    if sep and port.isdigit() and os.sep not in text:
+        return (host or '127.0.0.1', int(port))
+    return text
+
+
+def _open_socket(address: Address) -> socket.socket:
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    return socket.socket(family, socket.SOCK_STREAM)
+
+
+def _read_lines(sock: socket.socket):
+    """Gera as linhas JSON recebidas até a conexão fechar"""
+    for line in _read_raw_lines(sock):
+        yield json.loads(line)
+
+
+def _read_raw_lines(sock: socket.socket):
+    """
+    Gera as linhas não vazias recebidas até a conexão fechar (sem decodificar)
+
+    Raises:
+        ValueError: Linha maior que MAX_LINE (o buffer não cresce sem limite)
+    """
+    buffer = b''
+    while True:
+        try:
+            data = sock.recv(65536)
+        except socket.timeout:
+            continue  # O timeout do socket vale para o envio; a leitura continua esperando
+        if not data:
+            return
+        buffer += data
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield line
+        if len(buffer) > MAX_LINE:
+            raise ValueError(f"Linha maior que {MAX_LINE} bytes")
+
+
+class _Client:
+    """Interface conectada ao servidor"""
+
+    def __init__(self, sock: socket.socket, max_pending: int, authenticated: bool):
+        self.sock = sock
+        self.subscriptions: Dict[int, object] = {}  # {id do cliente: Subscription}
+        self.outbox = deque(maxlen=max_pending)  # Interface lenta: descarta os mais antigos
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()  # Lotes e respostas de erro não se misturam no socket
+        self.authenticated = authenticated
+        self.closed = False
+
+    def send(self, message: Dict):
+        """Envia uma mensagem JSON (OSError se a conexão caiu)"""
+        data = (json.dumps(message) + '\n').encode('utf-8')
+        with self.send_lock:
+            self.sock.sendall(data)
+
+
+class EngineServer:
+    """Servidor do motor de pings"""
+
+    def __init__(self, registry: Optional[ProbeRegistry] = None, address: Optional[Address] = None,
+                 batch_interval: float = 0.1, max_pending: int = 10000, token: Optional[str] = None):
+        """
+        Inicializa o servidor
+
+        Args:
+            registry: Registro que executa os pings (None = PingMonitor com fase e limitador)
+            address: Caminho do socket Unix ou (host, porta) (None = default_address())
+            batch_interval: Intervalo de envio dos lotes de resultados em segundos
+            max_pending: Resultados pendentes por interface antes de descartar os mais antigos
+            token: Token exigido no hello de cada interface (None = sem autenticação)
+        """
+        self.registry = registry or ProbeRegistry(phase_spread=True, rate_limiter=RateLimiter())
+        self.address = address or default_address()
+        self.batch_interval = batch_interval
+        self.max_pending = max_pending
+        self.token = token
+        self._clients = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._server: Optional[socket.socket] = None
+        self._threads = []
+
+    def start(self):
+        """Abre o socket e inicia as threads de conexão e de envio"""
+        self._server = _open_socket(self.address)
+        if not isinstance(self.address, tuple) and os.path.exists(self.address):
+            os.remove(self.address)  # Socket de uma execução anterior
+        if isinstance(self.address, tuple):
+            self._server.bind(self.address)
+            self.address = self._server.getsockname()[:2]  # Porta escolhida se era 0
+        else:
+            old_umask = os.umask(0o077)  # O socket já nasce sem acesso de grupo e outros
+            try:
+                self._server.bind(self.address)
+            finally:
+                os.umask(old_umask)
+        self._server.listen()
+        self._stop_event.clear()
+        self._threads = [threading.Thread(target=self._accept_loop, daemon=True),
+                         threading.Thread(target=self._flush_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def _accept_loop(self):
+        """Aceita as interfaces que se conectam"""
+        while not self._stop_event.is_set():
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return  # Socket fechado no stop()
+            sock.settimeout(5.0)  # Interface travada não bloqueia o envio para as demais
+            client = _Client(sock, self.max_pending, authenticated=self.token is None)
+            with self._lock:
+                self._clients.append(client)
+            threading.Thread(target=self._client_loop, args=(client,), daemon=True).start()
+
+    def _client_loop(self, client: _Client):
+        """Executa os comandos de uma interface"""
+        try:
+            for line in _read_raw_lines(client.sock):
+                command = None
+                try:
+                    command = json.loads(line)
+                    error = self._validate(client, command)
+                    if error is None:
+                        self._handle(client, command)
+                except ValueError as e:
+                    error = str(e)  # JSON inválido ou alvo recusado pelo registro (ex: host:porta inválido)
+                if error is not None:
+                    client.send({'op': 'error', 'error': error,
+                                 'command': command.get('op') if isinstance(command, dict) else None})
+                    if not client.authenticated:
+                        break  # Sem autenticação: não aceita outros comandos
+        except ValueError as e:
+            try:
+                client.send({'op': 'error', 'error': str(e), 'command': None})  # Linha grande demais: encerra
+            except OSError:
+                pass
+        except OSError:
+            pass
+        finally:
+            self._drop(client)
+
+    def _validate(self, client: _Client, command) -> Optional[str]:
+        """
+        Confere a autenticação e o formato de um comando
+
+        Returns:
+            Mensagem de erro, ou None se o comando pode ser executado
+        """
+        if not isinstance(command, dict):
+            return "Comando deve ser um objeto JSON"
+        op = command.get('op')
+        if op == 'hello':
+            if self.token is not None and not hmac.compare_digest(str(command.get('token', '')), self.token):
+                client.authenticated = False
+                return "Token inválido"
+            client.authenticated = True
+            return None
+        if not client.authenticated:
+            return "Autenticação necessária (hello com token)"
+        if op not in ('subscribe', 'unsubscribe', 'pause', 'resume'):
+            return f"Comando desconhecido: {op}"
+        sub_id = command.get('id')
+        if not isinstance(sub_id, int) or isinstance(sub_id, bool):
+            return "Campo 'id' ausente ou inválido"
+        if op == 'subscribe':
+            if not isinstance(command.get('ip'), str) or not command['ip'].strip():
+                return "Campo 'ip' ausente ou inválido"
+            interval = command.get('interval')
+            if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval <= 0:
+                return "Campo 'interval' ausente ou inválido"
+        return None
+
+    def _handle(self, client: _Client, command: Dict):
+        """Executa um comando já validado: hello, subscribe, unsubscribe, pause ou resume"""
+        op = command.get('op')
+        if op == 'hello':
+            return
+        sub_id = command.get('id')
+        with client.lock:
+            subscription = client.subscriptions.get(sub_id)
+        if op == 'subscribe' and subscription is None:
+            def callback(ping_result, sub_id=sub_id):
+                with client.lock:
+                    client.outbox.append({'id': sub_id, 'result': ping_result})
+            subscription = self.registry.subscribe(command['ip'], command['interval'], callback)
+            if command.get('paused'):
+                subscription.pause()
+            with client.lock:
+                client.subscriptions[sub_id] = subscription
+        elif op == 'unsubscribe' and subscription is not None:
+            with client.lock:
+                client.subscriptions.pop(sub_id, None)
+            subscription.request_stop()
+        elif op == 'pause' and subscription is not None:
+            subscription.pause()
+        elif op == 'resume' and subscription is not None:
+            subscription.resume()
+
+    def _flush_loop(self):
+        """Envia os resultados acumulados em lotes"""
+        while not self._stop_event.wait(self.batch_interval):
+            with self._lock:
+                clients = list(self._clients)
+            for client in clients:
+                with client.lock:
+                    items = list(client.outbox)
+                    client.outbox.clear()
+                if not items:
+                    continue
+                try:
+                    client.send({'op': 'results', 'items': items})
+                except OSError:
+                    self._drop(client)
+
+    def _drop(self, client: _Client):
+        """Desconecta uma interface e cancela as assinaturas dela"""
+        with self._lock:
+            if client.closed:
+                return
+            client.closed = True
+            if client in self._clients:
+                self._clients.remove(client)
+        with client.lock:
+            subscriptions = list(client.subscriptions.values())
+            client.subscriptions.clear()
+        for subscription in subscriptions:
+            subscription.request_stop()
+        try:
+            # shutdown acorda a thread bloqueada no recv e avisa a interface
+            client.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        client.sock.close()
+
+    def client_count(self) -> int:
+        """Retorna a quantidade de interfaces conectadas"""
+        with self._lock:
+            return len(self._clients)
+
+    def stop(self):
+        """Fecha o servidor e desconecta as interfaces"""
+        self._stop_event.set()
+        if self._server:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+            self._server = None
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            self._drop(client)
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        if not isinstance(self.address, tuple) and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+class RemoteMonitor:
+    """Fluxo de pings executado no motor remoto (mesma interface do PingMonitor)"""
+
+    def __init__(self, client: 'EngineClient', sub_id: int, ip: str, interval: int, callback: Optional[Callable]):
+        self.client = client
+        self.sub_id = sub_id
+        self.ip = ip
+        self.interval = interval
+        self.callback = callback
+        self.is_running = False
+        self._paused = False
+
+    @property
+    def is_paused(self) -> bool:
+        return self._paused
+
+    @is_paused.setter
+    def is_paused(self, paused: bool):
+        # O ProbeRegistry altera o atributo diretamente: repassa ao motor
+        if paused != self._paused:
+            self._paused = paused
+            if self.is_running:
+                self.client.send({'op': 'pause' if paused else 'resume', 'id': self.sub_id})
+
+    def start(self):
+        """Assina o alvo no motor"""
+        if not self.is_running:
+            self.is_running = True
+            self.client._register(self)
+
+    def request_stop(self):
+        """Cancela a assinatura no motor"""
+        if self.is_running:
+            self.is_running = False
+            self.client._unregister(self)
+
+    def join(self, timeout: Optional[float] = None):
+        """Os pings rodam no motor: nada a aguardar"""
+        pass
+
+    def stop(self, timeout: float = 2):
+        """Cancela a assinatura no motor"""
+        self.request_stop()
+
+    def pause(self):
+        """Pausa o monitoramento"""
+        self.is_paused = True
+
+    def resume(self):
+        """Resume o monitoramento"""
+        self.is_paused = False
+
+    def toggle_pause(self):
+        """Alterna entre pausado e ativo"""
+        if self.is_paused:
+            self.resume()
+            return False  # Agora está ativo (não pausado)
+        else:
+            self.pause()
+            return True  # Agora está pausado
+
+
+class EngineClient:
+    """Conexão da interface com o motor; reconecta e reassina os alvos se o motor reiniciar"""
+
+    def __init__(self, address: Optional[Address] = None, retry_interval: float = 2.0,
+                 token: Optional[str] = None):
+        """
+        Inicializa o cliente (conecta em segundo plano)
+
+        Args:
+            address: Caminho do socket Unix ou (host, porta) (None = default_address())
+            retry_interval: Espera entre tentativas de reconexão em segundos
+            token: Token enviado no hello (None = motor sem autenticação)
+        """
+        self.address = address or default_address()
+        self.retry_interval = retry_interval
+        self.token = token
+        self._lock = threading.Lock()
+        self._monitors: Dict[int, RemoteMonitor] = {}
+        self._next_id = 0
+        self._sock: Optional[socket.socket] = None
+        self._stop_event = threading.Event()
+        self.connected = threading.Event()
+        self._thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self._thread.start()
+
+    def create_monitor(self, ip: str, interval: int, callback: Optional[Callable] = None,
+                       **ignored) -> RemoteMonitor:
+        """Cria um monitor remoto (compatível com o monitor_factory do ProbeRegistry)"""
+        with self._lock:
+            sub_id = self._next_id
+            self._next_id += 1
+        return RemoteMonitor(self, sub_id, ip, interval, callback)
+
+    def _subscribe_command(self, monitor: RemoteMonitor) -> Dict:
+        return {'op': 'subscribe', 'id': monitor.sub_id, 'ip': monitor.ip,
+                'interval': monitor.interval, 'paused': monitor.is_paused}
+
+    def _register(self, monitor: RemoteMonitor):
+        with self._lock:
+            self._monitors[monitor.sub_id] = monitor
+        self.send(self._subscribe_command(monitor))
+
+    def _unregister(self, monitor: RemoteMonitor):
+        with self._lock:
+            self._monitors.pop(monitor.sub_id, None)
+        self.send({'op': 'unsubscribe', 'id': monitor.sub_id})
+
+    def send(self, command: Dict):
+        """Envia um comando ao motor (ignorado se desconectado: é refeito na reconexão)"""
+        with self._lock:
+            sock = self._sock
+            if sock is None:
+                return
+            try:
+                sock.sendall((json.dumps(command) + '\n').encode('utf-8'))
+            except OSError:
+                pass  # O leitor detecta a queda e reconecta
+
+    def _connect(self) -> bool:
+        """Conecta ao motor e reassina os monitores ativos"""
+        sock = _open_socket(self.address)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            return False
+        with self._lock:
+            self._sock = sock
+            monitors = list(self._monitors.values())
+        if self.token is not None:
+            self.send({'op': 'hello', 'token': self.token})
+        for monitor in monitors:
+            self.send(self._subscribe_command(monitor))
+        self.connected.set()
+        return True
+
+    def _reader_loop(self):
+        """Recebe os lotes de resultados e entrega aos callbacks"""
+        while not self._stop_event.is_set():
+            if not self._connect():
+                self._stop_event.wait(self.retry_interval)
+                continue
+            try:
+                for message in _read_lines(self._sock):
+                    if message.get('op') == 'error':
+                        print(f"Motor recusou o comando {message.get('command')}: {message.get('error')}")
+                    if message.get('op') != 'results':
+                        continue
+                    for item in message['items']:
+                        with self._lock:
+                            monitor = self._monitors.get(item['id'])
+                        if monitor and monitor.callback:
+                            monitor.callback(item['result'])
+            except (OSError, ValueError):
+                pass
+            self.connected.clear()
+            with self._lock:
+                sock, self._sock = self._sock, None
+            if sock:
+                sock.close()
+            if not self._stop_event.is_set():
+                print(f"Conexão com o motor perdida; reconectando em {self.retry_interval}s")
+                self._stop_event.wait(self.retry_interval)
+
+    def close(self):
+        """Desconecta do motor"""
+        self._stop_event.set()
+        with self._lock:
+            sock = self._sock
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._thread.join(timeout=2)
+
+
+def main(argv=None) -> int:
+    """Executa o motor como processo independente"""
+    parser = argparse.ArgumentParser(description="Motor de pings do Monitor de IPs")
+    parser.add_argument('--address', help="Caminho do socket Unix ou host:porta (padrão: %s)" % (default_address(),))
+    parser.add_argument('--token', default=os.environ.get(TOKEN_ENV),
+                        help=f"Token exigido das interfaces (padrão: variável {TOKEN_ENV})")
+    args = parser.parse_args(argv)
+
+    server = EngineServer(address=parse_address(args.address) if args.address else None, token=args.token)
+    server.start()
+    print(f"Motor escutando em {server.address}")
+    if isinstance(server.address, tuple) and not args.token:
+        print(f"Aviso: porta TCP sem token; qualquer usuário local pode assinar alvos (use --token ou {TOKEN_ENV})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
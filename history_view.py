@@ -0,0 +1,269 @@
+"""
+Histórico do painel com rolagem virtual
+Os resultados ficam em arrays compactos (strings repetidas como IP, saída de erro e pai são
+internadas numa tabela); o Text mostra só as linhas visíveis, formatadas sob demanda, uma
+linha por registro (linhas longas rolam na horizontal)
+"""
+import math
+import tkinter as tk
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, TextIO
+
+from ping_monitor import STATUS_CODES as PROBE_STATUS_CODES
+
+
+STATUS_CODES = PROBE_STATUS_CODES + ('NOTE',)
+_STATUS_INDEX = {status: code for code, status in enumerate(STATUS_CODES)}
+_NOTE = _STATUS_INDEX['NOTE']
+
+# Campos raros guardados só nos registros que os têm (índice absoluto -> valores)
+_BURST_FIELDS = ('sent', 'received', 'loss_pct', 'rtt_min', 'rtt_avg', 'rtt_max', 'rtt_mdev')
+
+
+class HistoryStore:
+    """Registros de ping em colunas compactas, com limite de memória"""
+
+    def __init__(self, max_records: int = 100000):
+        """
+        Inicializa o armazenamento
+
+        Args:
+            max_records: Registros mantidos (os mais antigos são descartados em blocos)
+        """
+        self.max_records = max_records
+        self._trim_block = max(1, max_records // 10)
+        self.clear()
+
+    def clear(self):
+        """Descarta todos os registros"""
+        self._offset = 0  # Índice absoluto do primeiro registro mantido
+        self.times = array('d')
+        self.status = array('B')
+        self.rtt_ms = array('d')  # NaN = sem RTT
+        self.ttl = array('H')  # 0 = sem TTL
+        self.size = array('H')  # 0 = sem bytes
+        self.ip = array('I')  # Índices na tabela de strings
+        self.detail = array('I')  # Saída de erro, pai, tipo de probe ou texto da nota (0 = nenhum)
+        self._strings: List[str] = ['']
+        self._string_ids: Dict[str, int] = {'': 0}
+        self._extras: Dict[int, dict] = {}  # {índice absoluto: campos raros (HTTP, vizinho, rajada)}
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _intern(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        index = self._string_ids.get(text)
+        if index is None:
+            index = self._string_ids[text] = len(self._strings)
+            self._strings.append(text)
+        return index
+
+    def append(self, ping_result: Dict):
+        """Guarda um resultado do PingMonitor"""
+        status = ping_result.get('status', 'ERROR')
+        try:
+            moment = datetime.fromisoformat(ping_result.get('timestamp', '')).timestamp()
+        except (TypeError, ValueError):
+            moment = math.nan
+        rtt_ms = ping_result.get('rtt_ms')
+        if status == 'ERROR':
+            detail = ping_result.get('output', '')
+        elif status == 'UNREACHABLE':
+            detail = ping_result.get('parent', '')
+        else:
+            detail = ping_result.get('probe', '')
+        self._append(moment, _STATUS_INDEX.get(status, _STATUS_INDEX['ERROR']), rtt_ms,
+                     ping_result.get('ttl'), ping_result.get('bytes'), ping_result.get('ip', ''), detail)
+
+        extras = {}
+        if ping_result.get('probe') == 'http':
+            extras['http_status'] = ping_result.get('http_status')
+        if ping_result.get('source'):
+            extras['source'] = ping_result['source']
+            extras['neighbor_state'] = ping_result.get('neighbor_state', '')
+        if ping_result.get('sent', 1) > 1:
+            extras.update({field: ping_result.get(field) for field in _BURST_FIELDS})
+        if extras:
+            self._extras[self._offset + len(self.times) - 1] = extras
+
+    def append_note(self, text: str):
+        """Guarda uma linha de texto livre (ex: relatório de caminho)"""
+        self._append(datetime.now().timestamp(), _NOTE, None, None, None, '', text)
+
+    def _append(self, moment: float, status: int, rtt_ms: Optional[float], ttl: Optional[int],
+                size: Optional[int], ip: str, detail: str):
+        self.times.append(moment)
+        self.status.append(status)
+        self.rtt_ms.append(math.nan if rtt_ms is None else rtt_ms)
+        self.ttl.append(min(ttl or 0, 0xFFFF))
+        self.size.append(min(size or 0, 0xFFFF))
+        self.ip.append(self._intern(ip))
+        self.detail.append(self._intern(detail))
+        if len(self.times) > self.max_records + self._trim_block:
+            self._trim(len(self.times) - self.max_records)
+
+    def _trim(self, count: int):
+        """Descarta os `count` registros mais antigos"""
+        for column in (self.times, self.status, self.rtt_ms, self.ttl, self.size, self.ip, self.detail):
+            del column[:count]
+        self._offset += count
+        self._extras = {index: extras for index, extras in self._extras.items() if index >= self._offset}
+        # Recria a tabela de strings só com as ainda referenciadas
+        used = sorted(set(self.ip) | set(self.detail) | {0})
+        remap = {old: new for new, old in enumerate(used)}
+        self._strings = [self._strings[old] for old in used]
+        self._string_ids = {text: index for index, text in enumerate(self._strings)}
+        self.ip = array('I', (remap[i] for i in self.ip))
+        self.detail = array('I', (remap[i] for i in self.detail))
+
+    def record(self, index: int) -> Dict:
+        """
+        Reconstrói o resultado de um registro (índice relativo ao primeiro mantido)
+
+        Returns:
+            Dicionário no formato do PingMonitor (status 'NOTE' para notas, com o texto em 'text')
+        """
+        status = STATUS_CODES[self.status[index]]
+        detail = self._strings[self.detail[index]]
+        if status == 'NOTE':
+            return {'status': status, 'text': detail}
+        moment = self.times[index]
+        rtt_ms = self.rtt_ms[index]
+        result = {
+            'status': status,
+            'timestamp': datetime.fromtimestamp(moment).isoformat() if moment == moment else '',
+            'ip': self._strings[self.ip[index]],
+            'rtt_ms': None if rtt_ms != rtt_ms else rtt_ms,
+            'ttl': self.ttl[index] or None,
+            'bytes': self.size[index] or None
+        }
+        if status == 'ERROR':
+            result['output'] = detail
+        elif status == 'UNREACHABLE':
+            result['parent'] = detail
+        elif detail:
+            result['probe'] = detail
+        result.update(self._extras.get(self._offset + index, {}))
+        return result
+
+    def iter_lines(self, formatter: Callable[[Dict], str], start: int = 0,
+                   stop: Optional[int] = None) -> Iterator[str]:
+        """Formata os registros [start, stop) um por vez"""
+        for index in range(start, len(self) if stop is None else min(stop, len(self))):
+            yield formatter(self.record(index))
+
+    def write(self, f: TextIO, formatter: Callable[[Dict], str]) -> int:
+        """
+        Grava todos os registros formatados num arquivo, sem montar o texto inteiro em memória
+
+        Returns:
+            Quantidade de linhas gravadas
+        """
+        count = 0
+        for line in self.iter_lines(formatter):
+            f.write(line + '\n')
+            count += 1
+        return count
+
+
+class VirtualHistoryView:
+    """Text que mostra apenas as linhas visíveis de um HistoryStore"""
+
+    def __init__(self, parent, store: HistoryStore, formatter: Callable[[Dict], str],
+                 scrollbar_options: Optional[Dict] = None, **text_options):
+        """
+        Inicializa a visão
+
+        Args:
+            parent: Widget pai
+            store: Registros exibidos
+            formatter: Formata um registro (resultado reconstruído) como uma linha
+            scrollbar_options: Opções visuais das barras de rolagem (vertical e horizontal)
+            **text_options: Opções do tk.Text (fonte, cores, altura, ...)
+        """
+        self.store = store
+        self.formatter = formatter
+        self.first = 0  # Primeiro registro visível
+        self.follow = True  # Acompanha os registros mais recentes
+        self._render_pending = False
+        text_options.setdefault('wrap', 'none')
+        text_options.setdefault('state', 'disabled')
+        self.text = tk.Text(parent, **text_options)
+        self.scrollbar = tk.Scrollbar(parent, orient='vertical', command=self._on_scroll,
+                                      **(scrollbar_options or {}))
+        # Uma linha por registro (a rolagem vertical conta registros): o texto longo rola na horizontal
+        self.xscrollbar = tk.Scrollbar(parent, orient='horizontal', command=self.text.xview,
+                                       **(scrollbar_options or {}))
+        self.text.config(xscrollcommand=self.xscrollbar.set)
+        self.text.bind('<Configure>', lambda e: self.schedule_render())
+        self.text.bind('<MouseWheel>', lambda e: self._scroll_lines(-3 if e.delta > 0 else 3))
+        self.text.bind('<Button-4>', lambda e: self._scroll_lines(-3))
+        self.text.bind('<Button-5>', lambda e: self._scroll_lines(3))
+
+    def visible_rows(self) -> int:
+        """Quantidade de linhas que cabem no Text"""
+        height = self.text.winfo_height()
+        if height <= 1:
+            return int(self.text.cget('height'))
+        line_height = self.text.tk.call('font', 'metrics', self.text.cget('font'), '-linespace')
+        return max(1, height // max(int(line_height), 1))
+
+    def _max_first(self) -> int:
+        return max(0, len(self.store) - self.visible_rows())
+
+    def _on_scroll(self, action, amount, unit=None):
+        """Comando da barra de rolagem ('moveto' fração | 'scroll' n units/pages)"""
+        if action == 'moveto':
+            self.first = int(float(amount) * len(self.store))
+        elif action == 'scroll':
+            step = self.visible_rows() if unit == 'pages' else 1
+            self.first += int(amount) * step
+        self._clamp()
+        return 'break'
+
+    def _scroll_lines(self, lines: int):
+        self.first += lines
+        self._clamp()
+        return 'break'  # O Text não rola sozinho: o conteúdo é só a janela visível
+
+    def _clamp(self):
+        maximum = self._max_first()
+        self.first = min(max(self.first, 0), maximum)
+        self.follow = self.first >= maximum
+        self.schedule_render()
+
+    def refresh(self):
+        """Registros novos ou descartados: acompanha o fim (se estiver no fim) e redesenha"""
+        if self.follow:
+            self.first = self._max_first()
+        else:
+            self.first = min(self.first, self._max_first())
+        self.schedule_render()
+
+    def schedule_render(self):
+        """Agrupa os pedidos num único desenho quando o Tk estiver ocioso"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.text.after_idle(self.render)
+
+    def render(self):
+        """Formata e mostra somente as linhas visíveis"""
+        self._render_pending = False
+        rows = self.visible_rows()
+        total = len(self.store)
+        if self.follow:
+            self.first = max(0, total - rows)
+        # Quebras de linha dentro de um registro (saída de erro do ping) ocupariam outras linhas
+        lines = [line.replace('\r', '').replace('\n', ' ')
+                 for line in self.store.iter_lines(self.formatter, self.first, self.first + rows)]
+        self.text.config(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.insert('end', '\n'.join(lines))
+        self.text.config(state='disabled')
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,248 @@
+"""
+Health-check HTTP(S) com pool de conexões keep-alive
+Mede separadamente DNS, conexão, TLS e tempo até o primeiro byte (TTFB), reaproveitando
+as conexões abertas entre ciclos para não pagar o handshake a cada intervalo
+"""
+import http.client
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from clock import Clock
+from ping_monitor import PingMonitor
+
+
+def is_http_target(target: str) -> bool:
+    """Retorna True se o alvo é uma URL http:// ou https://"""
+    return target.strip().lower().startswith(('http://', 'https://'))
+
+
+class HTTPConnectionPool:
+    """Conexões keep-alive ociosas por (esquema, host, porta)"""
+
+    def __init__(self, max_idle_per_host: int = 4, idle_timeout: float = 30.0):
+        """
+        Inicializa o pool
+
+        Args:
+            max_idle_per_host: Conexões ociosas mantidas por host
+            idle_timeout: Segundos de ociosidade após os quais a conexão é descartada
+        """
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str, int], deque] = {}
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[http.client.HTTPConnection]:
+        """Retira uma conexão ociosa do pool (None se não houver)"""
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                conn, since = idle.pop()  # A mais recente tem menos chance de ter sido fechada
+                if now - since <= self.idle_timeout:
+                    return conn
+                conn.close()
+        return None
+
+    def put(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection):
+        """Devolve uma conexão ao pool (fecha se o pool do host está cheio)"""
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) >= self.max_idle_per_host:
+                conn.close()
+                return
+            idle.append((conn, time.monotonic()))
+
+    def idle_count(self, key: Optional[Tuple[str, str, int]] = None) -> int:
+        """Retorna a quantidade de conexões ociosas (de um host ou de todos)"""
+        with self._lock:
+            if key is not None:
+                return len(self._idle.get(key, ()))
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close(self):
+        """Fecha todas as conexões ociosas"""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+class HTTPProbe:
+    """Executa health-checks HTTP(S) usando o pool de conexões"""
+
+    def __init__(self, pool: Optional[HTTPConnectionPool] = None, timeout: float = 5.0,
+                 method: str = 'GET', ssl_context: Optional[ssl.SSLContext] = None,
+                 is_healthy: Optional[Callable[[int], bool]] = None, clock: Optional[Clock] = None):
+        """
+        Inicializa o probe
+
+        Args:
+            pool: Pool de conexões (None = cria um próprio)
+            timeout: Tempo máximo de conexão e de resposta em segundos
+            method: Método HTTP do health-check
+            ssl_context: Contexto TLS (None = contexto padrão com verificação de certificado)
+            is_healthy: Decide se o status HTTP é saudável (None = 2xx e 3xx)
+            clock: Relógio usado nos timestamps (None = relógio real)
+        """
+        self.pool = pool or HTTPConnectionPool()
+        self.timeout = timeout
+        self.method = method
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.is_healthy = is_healthy or (lambda status: 200 <= status < 400)
+        self.clock = clock or Clock()
+
+    def _connect(self, scheme: str, host: str, port: int, timings: Dict) -> http.client.HTTPConnection:
+        """Abre uma conexão nova medindo DNS, TCP e TLS"""
+        started = time.perf_counter()
+        family, socktype, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+        resolved = time.perf_counter()
+        timings['dns_ms'] = (resolved - started) * 1000.0
+
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(address)
+            connected = time.perf_counter()
+            timings['connect_ms'] = (connected - resolved) * 1000.0
+            if scheme == 'https':
+                sock = self.ssl_context.wrap_socket(sock, server_hostname=host)
+                timings['tls_ms'] = (time.perf_counter() - connected) * 1000.0
+        except Exception:
+            sock.close()
+            raise
+
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+        conn.sock = sock  # Conexão já aberta: o http.client não reconecta
+        return conn
+
+    def _request(self, conn: http.client.HTTPConnection, path: str, timings: Dict):
+        """Envia a requisição e lê a resposta inteira (necessário para reusar a conexão)"""
+        sent = time.perf_counter()
+        conn.request(self.method, path, headers={'Connection': 'keep-alive', 'User-Agent': 'Monitor-IP'})
+        response = conn.getresponse()
+        timings['ttfb_ms'] = (time.perf_counter() - sent) * 1000.0
+        body = response.read()
+        return response, body
+
+    def check(self, url: str) -> Dict:
+        """
+        Executa um health-check
+
+        Args:
+            url: URL http:// ou https://
+
+        Returns:
+            Dicionário no formato do PingMonitor (status, rtt_ms, timestamp, ttl, bytes, output, ip)
+            mais http_status, reused e os tempos dns_ms, connect_ms, tls_ms e ttfb_ms
+            (None nas etapas que não ocorreram, ex: conexão reaproveitada)
+        """
+        timestamp = self.clock.now().isoformat()
+        result = {
+            'status': 'ERROR',
+            'rtt_ms': None,
+            'timestamp': timestamp,
+            'ttl': None,
+            'bytes': None,
+            'output': '',
+            'ip': url,
+            'probe': 'http',
+            'http_status': None,
+            'reused': False,
+            'dns_ms': None,
+            'connect_ms': None,
+            'tls_ms': None,
+            'ttfb_ms': None
+        }
+
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            result['output'] = f'URL inválida: {url}'
+            return result
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        started = time.perf_counter()
+        conn = None
+        try:
+            conn = self.pool.get(key)
+            if conn is not None:
+                try:
+                    timings = {}
+                    response, body = self._request(conn, path, timings)
+                    result['reused'] = True
+                except (http.client.RemoteDisconnected, ConnectionError, BrokenPipeError):
+                    # Conexão ociosa fechada pelo servidor: tenta uma vez com conexão nova
+                    conn.close()
+                    conn = None
+            if conn is None:
+                timings = {}
+                conn = self._connect(scheme, parts.hostname, port, timings)
+                response, body = self._request(conn, path, timings)
+        except socket.timeout:
+            if conn:
+                conn.close()
+            result['status'] = 'TIMEOUT'
+            result['output'] = 'Tempo esgotado na requisição HTTP'
+            return result
+        except Exception as e:
+            if conn:
+                conn.close()
+            result['output'] = str(e)
+            return result
+
+        result['rtt_ms'] = (time.perf_counter() - started) * 1000.0
+        result.update(timings)
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.put(key, conn)
+
+        result['http_status'] = response.status
+        result['bytes'] = len(body)
+        result['output'] = f'HTTP {response.status} {response.reason}'
+        if self.is_healthy(response.status):
+            result['status'] = 'OK'
+        return result
+
+
+class HTTPMonitor(PingMonitor):
+    """Monitor de uma URL: mesmo loop, pausa e callback do PingMonitor, com health-check HTTP"""
+
+    def __init__(self, url: str, interval: int = 5, callback: Optional[Callable] = None,
+                 probe: Optional[HTTPProbe] = None, **kwargs):
+        """
+        Inicializa o monitor HTTP
+
+        Args:
+            url: URL http:// ou https://
+            interval: Intervalo entre health-checks em segundos
+            callback: Função chamada após cada health-check
+            probe: Probe compartilhado (e o seu pool de conexões); None = cria um próprio
+            **kwargs: Demais argumentos do PingMonitor (clock, instrumentation, phase_spread, ...)
+        """
+        kwargs.pop('rate_limiter', None)  # O limitador é de pings ICMP
+        kwargs.setdefault('adaptive_timeout', False)
+        super().__init__(url, interval, callback, **kwargs)
+        self.probe = probe or HTTPProbe(clock=self.clock)
+
+    def _ping(self) -> Dict:
+        """Executa o health-check HTTP do ciclo"""
+        started = time.perf_counter()
+        result = self.probe.check(self.ip)
+        if self.instrumentation:
+            self.instrumentation.record('wait', time.perf_counter() - started)
+        return result
@@ -0,0 +1,133 @@
+"""
+Instrumentação opcional do caminho crítico dos pings
+Mede a duração de cada etapa (spawn, espera, decodificação, parse, callback, despacho Tk)
+e agrega em histogramas de baixo custo
+"""
+import math
+import threading
+from typing import Dict, Optional
+
+
+class Histogram:
+    """Histograma com baldes logarítmicos fixos (base 2), O(1) por amostra"""
+
+    def __init__(self, min_value: float = 1e-6, buckets: int = 32, sub_buckets: int = 1):
+        """
+        Inicializa o histograma
+
+        Args:
+            min_value: Limite superior do primeiro balde (default: 1 µs)
+            buckets: Quantidade de baldes (cada oitava dobra o limite da anterior)
+            sub_buckets: Baldes lineares por oitava (1 = base 2; 16 = erro relativo de ~6%)
+        """
+        self.min_value = min_value
+        self.sub_buckets = sub_buckets
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _index(self, value: float) -> int:
+        """Retorna o índice do balde de um valor"""
+        if value <= self.min_value:
+            return 0
+        # frexp: value/min = m * 2**e com 0.5 <= m < 1
+        mantissa, exponent = math.frexp(value / self.min_value)
+        sub = min(int((mantissa - 0.5) * 2 * self.sub_buckets), self.sub_buckets - 1)
+        return min(1 + (exponent - 1) * self.sub_buckets + sub, len(self.counts) - 1)
+
+    def upper_bound(self, index: int) -> float:
+        """Retorna o limite superior do balde"""
+        if index == 0:
+            return self.min_value
+        octave, sub = divmod(index - 1, self.sub_buckets)
+        return self.min_value * (2 ** octave) * (1 + (sub + 1) / self.sub_buckets)
+
+    def record(self, value: float):
+        """Registra uma amostra"""
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Retorna o percentil aproximado (limite superior do balde)
+
+        Args:
+            p: Percentil entre 0 e 100
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        """Retorna um resumo do histograma"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+class ProbeInstrumentation:
+    """Agregador thread-safe de durações por etapa do ping"""
+
+    # Etapas medidas, na ordem do caminho do ping até a tela
+    STAGES = ('spawn', 'wait', 'decode', 'parse', 'callback', 'tk_dispatch', 'tk_update')
+
+    def __init__(self):
+        """Inicializa os histogramas de cada etapa"""
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {stage: Histogram() for stage in self.STAGES}
+
+    def record(self, stage: str, seconds: float):
+        """
+        Registra a duração de uma etapa
+
+        Args:
+            stage: Nome da etapa
+            seconds: Duração em segundos
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.record(seconds)
+
+    def reset(self):
+        """Descarta todas as amostras"""
+        with self._lock:
+            self._histograms = {stage: Histogram() for stage in self.STAGES}
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Retorna o resumo de todas as etapas"""
+        with self._lock:
+            return {stage: histogram.snapshot() for stage, histogram in self._histograms.items()}
+
+    def dump(self) -> str:
+        """Formata o resumo como tabela de texto (tempos em ms)"""
+        def ms(value):
+            return f"{value * 1000:.3f}" if value is not None else "-"
+
+        lines = [f"{'ETAPA':<12} {'N':>8} {'MÉDIA':>10} {'P50':>10} {'P90':>10} {'P99':>10} {'MÁX':>10}"]
+        for stage, data in self.snapshot().items():
+            lines.append(
+                f"{stage:<12} {data['count']:>8} {ms(data['mean']):>10} {ms(data['p50']):>10} "
+                f"{ms(data['p90']):>10} {ms(data['p99']):>10} {ms(data['max']):>10}"
+            )
+        return '\n'.join(lines)
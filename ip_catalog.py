@@ -5,7 +5,7 @@ Salva e carrega IPs cadastrados com nomes
 import json
 import os
 import sys
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 
 
 def get_resource_path(relative_path):
@@ -62,7 +62,8 @@ class IPCatalog:
             self.catalog_file = get_app_data_path("ip_catalog.json")
         else:
             self.catalog_file = catalog_file
-        self.catalog: Dict[str, str] = {}  # {nome: ip}
+        # {nome: ip} ou {nome: {"ip": ip, "parent": nome ou ip do pai}} para hosts atrás de um gateway
+        self.catalog: Dict[str, Union[str, Dict[str, str]]] = {}
         self.load()
     
     def load(self):
@@ -92,20 +93,31 @@ class IPCatalog:
         except Exception as e:
             print(f"Erro ao salvar catálogo: {e}")
     
-    def add(self, name: str, ip: str) -> bool:
+    @staticmethod
+    def _entry_ip(entry: Union[str, Dict[str, str]]) -> str:
+        """Retorna o IP de uma entrada (formato simples ou com pai)"""
+        if isinstance(entry, dict):
+            return entry.get('ip', '')
+        return entry
+    
+    def add(self, name: str, ip: str, parent: Optional[str] = None) -> bool:
         """
         Adiciona um novo IP ao catálogo
         
         Args:
             name: Nome do IP
-            ip: Endereço IP ou hostname
+            ip: Endereço IP, hostname, host:porta (probe TCP) ou URL http(s):// (health-check)
+            parent: Nome ou IP do pai (gateway) pelo qual o host é alcançado (opcional)
             
         Returns:
             True se adicionado com sucesso, False se o nome já existe
         """
         if name.strip() in self.catalog:
             return False
-        self.catalog[name.strip()] = ip.strip()
+        if parent and parent.strip():
+            self.catalog[name.strip()] = {'ip': ip.strip(), 'parent': parent.strip()}
+        else:
+            self.catalog[name.strip()] = ip.strip()
         self.save()
         return True
     
@@ -135,7 +147,61 @@ class IPCatalog:
         Returns:
             IP ou None se não encontrado
         """
-        return self.catalog.get(name)
+        entry = self.catalog.get(name)
+        return self._entry_ip(entry) if entry is not None else None
+    
+    def set_parent(self, name: str, parent: Optional[str]) -> bool:
+        """
+        Define (ou remove, com None) o pai de um IP do catálogo
+        
+        Args:
+            name: Nome do IP
+            parent: Nome ou IP do pai (None = sem pai)
+            
+        Returns:
+            True se alterado, False se o nome não foi encontrado
+        """
+        if name not in self.catalog:
+            return False
+        ip = self._entry_ip(self.catalog[name])
+        if parent and parent.strip():
+            self.catalog[name] = {'ip': ip, 'parent': parent.strip()}
+        else:
+            self.catalog[name] = ip
+        self.save()
+        return True
+    
+    def get_parent(self, name: str) -> Optional[str]:
+        """
+        Obtém o IP do pai de um IP do catálogo
+        
+        Args:
+            name: Nome do IP
+            
+        Returns:
+            IP do pai (resolvido pelo nome, se for um nome do catálogo) ou None
+        """
+        entry = self.catalog.get(name)
+        if not isinstance(entry, dict) or not entry.get('parent'):
+            return None
+        parent = entry['parent']
+        if parent in self.catalog:
+            return self._entry_ip(self.catalog[parent])
+        return parent
+    
+    def get_topology(self) -> Dict[str, str]:
+        """
+        Retorna as relações de dependência do catálogo
+        
+        Returns:
+            Dicionário {ip do filho: ip do pai}
+        """
+        topology = {}
+        for name, entry in self.catalog.items():
+            parent_ip = self.get_parent(name)
+            if parent_ip:
+                topology[self._entry_ip(entry)] = parent_ip
+        return topology
     
     def get_all(self) -> List[Tuple[str, str]]:
         """
@@ -144,7 +210,7 @@ class IPCatalog:
         Returns:
             Lista de tuplas (nome, ip) ordenada por nome
         """
-        return sorted(self.catalog.items(), key=lambda x: x[0])
+        return sorted(((name, self._entry_ip(entry)) for name, entry in self.catalog.items()), key=lambda x: x[0])
     
     def get_names(self) -> List[str]:
         """
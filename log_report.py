@@ -0,0 +1,333 @@
+"""
+Relatório do histórico de pings pela linha de comando
+Lê o CSV do CSVLogger (inclusive segmentos rotacionados e comprimidos) em fluxo, com memória
+constante por alvo: disponibilidade, perda, percentis de RTT e quedas num intervalo de tempo
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+from csv_logger import HEADER, _SEGMENT_TIME_FORMAT, _open_segment, _segment_pattern, get_app_data_path, list_segments
+from instrumentation import Histogram
+
+
+# Percentis de RTT: baldes de 0,01 ms em diante, 16 por oitava (erro relativo de ~6%)
+RTT_MIN_MS = 0.01
+RTT_BUCKETS = 400
+RTT_SUB_BUCKETS = 16
+
+# Maior intervalo que uma linha representa no modo deadband (heartbeat padrão do CSVLogger);
+# intervalos maiores são o monitor parado, não amostras repetidas
+MAX_ROW_SPAN = 300.0
+
+_TIMESTAMP = re.compile(rb'^\d{4}-\d{2}-\d{2}T')
+
+
+def _line_timestamp(line: bytes) -> Optional[bytes]:
+    """Retorna o timestamp de uma linha do CSV (None para o cabeçalho ou linhas inválidas)"""
+    if not _TIMESTAMP.match(line):
+        return None
+    return line.split(b',', 1)[0]
+
+
+def seek_to_time(f: BinaryIO, start: str) -> int:
+    """
+    Posiciona um CSV não comprimido na primeira linha com timestamp >= start (busca binária)
+
+    As linhas são gravadas em ordem de tempo, então bastam O(log n) leituras em vez de
+    percorrer o arquivo desde o início.
+
+    Args:
+        f: Arquivo aberto em modo binário
+        start: Timestamp ISO 8601
+
+    Returns:
+        Posição do início da linha encontrada (o arquivo fica posicionado nela)
+    """
+    target = start.encode('ascii')
+    f.seek(0, os.SEEK_END)
+    low, high = 0, f.tell()
+    # Menor posição p cuja primeira linha iniciada em p ou depois tem timestamp >= start
+    while low < high:
+        middle = (low + high) // 2
+        _seek_line(f, middle)
+        line = f.readline()
+        timestamp = _line_timestamp(line)
+        if not line or (timestamp is not None and timestamp >= target):
+            high = middle
+        else:
+            low = middle + 1
+    _seek_line(f, low)
+    return f.tell()
+
+
+def _seek_line(f: BinaryIO, position: int):
+    """Posiciona o arquivo no início da primeira linha que começa em position ou depois"""
+    if position:
+        f.seek(position - 1)
+        f.readline()
+    else:
+        f.seek(0)
+
+
+def _segment_closed_at(log_file: str, path: str) -> Optional[str]:
+    match = _segment_pattern(log_file).match(os.path.basename(path))
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), _SEGMENT_TIME_FORMAT).isoformat()
+
+
+def iter_range(log_file: str, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Lê somente os registros do intervalo [start, end] do log e dos segmentos rotacionados
+
+    Segmentos fechados antes de start são pulados pelo nome; arquivos não comprimidos
+    são posicionados por busca binária; a leitura para no primeiro registro após end.
+
+    Args:
+        log_file: Caminho do arquivo CSV atual
+        start: Timestamp ISO 8601 inicial (None = desde o início)
+        end: Timestamp ISO 8601 final (None = até o fim)
+
+    Returns:
+        Iterador de dicionários {'timestamp', 'ip', 'rtt_ms' (float ou None), 'status'}
+    """
+    paths = []
+    for path in list_segments(log_file):
+        closed_at = _segment_closed_at(log_file, path)
+        if start and closed_at and closed_at < start:
+            continue  # O segmento só tem registros anteriores ao seu fechamento
+        paths.append(path)
+    paths.append(log_file)
+
+    for path in paths:
+        try:
+            if path.endswith('.gz'):
+                text = _open_segment(path)
+            else:
+                raw = open(path, 'rb')
+                if start:
+                    seek_to_time(raw, start)
+                text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        except FileNotFoundError:
+            continue  # Removido pela retenção durante a leitura
+        with text:
+            for row in csv.reader(text):
+                if len(row) < 4 or row == HEADER:
+                    continue
+                timestamp = row[0]
+                if start and timestamp < start:
+                    continue
+                if end and timestamp > end:
+                    return
+                yield {
+                    'timestamp': timestamp,
+                    'ip': row[1],
+                    'rtt_ms': float(row[2]) if row[2] else None,
+                    'status': row[3]
+                }
+
+
+class TargetReport:
+    """Acumulador de um alvo (memória constante, exceto a lista de quedas)"""
+
+    def __init__(self, ip: str, min_outage: float = 0.0, interval: Optional[float] = None):
+        """
+        Inicializa o acumulador
+
+        Args:
+            ip: IP ou hostname
+            min_outage: Duração mínima em segundos de uma queda para entrar na lista
+            interval: Intervalo entre amostras em segundos, para pesar as linhas de um log deadband
+                      (None = menor intervalo entre linhas do alvo)
+        """
+        self.ip = ip
+        self.min_outage = min_outage
+        self.interval = interval
+        self.samples = 0
+        self.ok = 0
+        self.up_seconds = 0.0
+        self.observed_seconds = 0.0
+        self.rtt = Histogram(min_value=RTT_MIN_MS, buckets=RTT_BUCKETS, sub_buckets=RTT_SUB_BUCKETS)
+        self.first: Optional[str] = None
+        self.last: Optional[str] = None
+        self._last_moment: Optional[datetime] = None
+        self._last_ok = False
+        self._outage_start: Optional[str] = None
+        self._outage_samples = 0
+        self.outages: List[Dict] = []
+        # {(intervalo até a próxima linha em centésimos de s, ok): linhas}, limitado por MAX_ROW_SPAN
+        self._spans: Counter = Counter()
+
+    def add(self, record: Dict):
+        """Acumula um registro (em ordem de tempo)"""
+        moment = datetime.fromisoformat(record['timestamp'])
+        is_ok = record['status'] == 'OK'
+        if self._last_moment is not None:
+            # Amostra e retenção: o estado anterior vale até este registro
+            elapsed = max((moment - self._last_moment).total_seconds(), 0.0)
+            self.observed_seconds += elapsed
+            if self._last_ok:
+                self.up_seconds += elapsed
+            self._spans[(round(min(elapsed, MAX_ROW_SPAN) * 100), self._last_ok)] += 1
+        self.samples += 1
+        if is_ok:
+            self.ok += 1
+            if record['rtt_ms'] is not None:
+                self.rtt.record(record['rtt_ms'])
+            if self._outage_start is not None:
+                self._close_outage(record['timestamp'], recovered=True)
+        elif self._outage_start is None:
+            self._outage_start = record['timestamp']
+            self._outage_samples = 1
+        else:
+            self._outage_samples += 1
+        if self.first is None:
+            self.first = record['timestamp']
+        self.last = record['timestamp']
+        self._last_moment = moment
+        self._last_ok = is_ok
+
+    def _close_outage(self, end: str, recovered: bool):
+        duration = (datetime.fromisoformat(end) - datetime.fromisoformat(self._outage_start)).total_seconds()
+        if duration >= self.min_outage:
+            self.outages.append({
+                'start': self._outage_start,
+                'end': end,
+                'duration_s': duration,
+                'samples': self._outage_samples,
+                'recovered': recovered
+            })
+        self._outage_start = None
+        self._outage_samples = 0
+
+    def _loss_pct(self) -> Optional[float]:
+        """
+        Perda ponderada pelas amostras que cada linha representa
+
+        No modo deadband uma linha vale por todas as amostras iguais até a próxima linha
+        (intervalo até a próxima linha / intervalo entre amostras). Sem interval, o intervalo
+        entre amostras é o menor intervalo entre linhas do alvo: exato num log completo (todos
+        os pesos são 1, perda = linhas com falha / linhas) e num log deadband com alguma
+        mudança em amostras seguidas.
+        """
+        if not self.samples:
+            return None
+        if self.interval:
+            step = self.interval * 100
+        else:
+            step = min((span for span, _ in self._spans if span > 0), default=None)
+        total = lost = 0
+        for (span, ok), rows in self._spans.items():
+            weight = max(1, round(span / step)) if step else 1
+            total += rows * weight
+            if not ok:
+                lost += rows * weight
+        # A última linha não tem próxima: vale uma amostra
+        total += 1
+        if not self._last_ok:
+            lost += 1
+        return 100.0 * lost / total
+
+    def finish(self) -> Dict:
+        """Fecha a queda em andamento e retorna o resumo do alvo"""
+        if self._outage_start is not None:
+            self._close_outage(self.last, recovered=False)
+        return {
+            'ip': self.ip,
+            'first': self.first,
+            'last': self.last,
+            'samples': self.samples,
+            'loss_pct': self._loss_pct(),
+            'uptime_pct': 100.0 * self.up_seconds / self.observed_seconds if self.observed_seconds else None,
+            'rtt_mean': self.rtt.total / self.rtt.count if self.rtt.count else None,
+            'rtt_min': self.rtt.min,
+            'rtt_p50': self.rtt.percentile(50),
+            'rtt_p95': self.rtt.percentile(95),
+            'rtt_p99': self.rtt.percentile(99),
+            'rtt_max': self.rtt.max,
+            'outages': self.outages
+        }
+
+
+def build_report(records, ips: Optional[List[str]] = None, min_outage: float = 0.0,
+                 interval: Optional[float] = None) -> List[Dict]:
+    """
+    Calcula o relatório por alvo em uma passada
+
+    Args:
+        records: Registros em ordem de tempo (ex: iter_range)
+        ips: Alvos incluídos (None = todos)
+        min_outage: Duração mínima em segundos das quedas listadas
+        interval: Intervalo entre amostras em segundos (log deadband; None = estimado por alvo)
+
+    Returns:
+        Lista de resumos por alvo, na ordem de primeira aparição
+    """
+    wanted = set(ips) if ips else None
+    targets: Dict[str, TargetReport] = {}
+    for record in records:
+        ip = record['ip']
+        if wanted is not None and ip not in wanted:
+            continue
+        target = targets.get(ip)
+        if target is None:
+            target = targets[ip] = TargetReport(ip, min_outage, interval)
+        target.add(record)
+    return [target.finish() for target in targets.values()]
+
+
+def _fmt(value: Optional[float], digits: int = 2) -> str:
+    return '-' if value is None else f"{value:.{digits}f}"
+
+
+def format_report(report: List[Dict]) -> str:
+    """Formata o relatório como texto"""
+    lines = [f"{'Alvo':<24} {'Amostras':>9} {'Disp.%':>8} {'Perda%':>7} "
+             f"{'p50':>8} {'p95':>8} {'p99':>8} {'Quedas':>6}"]
+    for target in report:
+        lines.append(
+            f"{target['ip']:<24} {target['samples']:>9} {_fmt(target['uptime_pct'], 3):>8} "
+            f"{_fmt(target['loss_pct']):>7} {_fmt(target['rtt_p50']):>8} {_fmt(target['rtt_p95']):>8} "
+            f"{_fmt(target['rtt_p99']):>8} {len(target['outages']):>6}"
+        )
+    for target in report:
+        for outage in target['outages']:
+            end = outage['end'] if outage['recovered'] else f"{outage['end']} (em andamento)"
+            lines.append(f"Queda {target['ip']}: {outage['start']} -> {end} ({outage['duration_s']:.0f} s)")
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    """Gera o relatório pela linha de comando"""
+    parser = argparse.ArgumentParser(description="Relatório do histórico de pings (CSV do Monitor de IPs)")
+    parser.add_argument('--log', default=get_app_data_path("ping_logs.csv"), help="Arquivo CSV atual do log")
+    parser.add_argument('--start', help="Início do intervalo (ISO 8601, ex: 2024-01-15T00:00:00)")
+    parser.add_argument('--end', help="Fim do intervalo (ISO 8601)")
+    parser.add_argument('--ip', action='append', help="Alvo incluído (pode repetir; padrão: todos)")
+    parser.add_argument('--min-outage', type=float, default=0.0, help="Duração mínima das quedas listadas em segundos")
+    parser.add_argument('--interval', type=float,
+                        help="Intervalo entre pings em segundos (log deadband; padrão: estimado pelo log)")
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.log) and not list_segments(args.log):
+        print(f"Log não encontrado: {args.log}")
+        return 1
+    report = build_report(iter_range(args.log, args.start, args.end), args.ip, args.min_outage, args.interval)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,12 +3,26 @@ Monitor de IPs - Aplicação Desktop
 Interface gráfica com até 4 painéis de monitoramento
 Tema Matrix/Hacking
 """
+import multiprocessing
+import os
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
-from collections import deque
 from typing import Optional
-from ping_monitor import PingMonitor
+from ping_monitor import PingMonitor, stop_all
 from ip_catalog import IPCatalog
+from instrumentation import ProbeInstrumentation
+from metrics_exporter import MetricsExporter
+from probe_registry import ProbeRegistry, Subscription
+from topology import DependencyTracker
+from rate_limiter import RateLimiter
+from neighbor_table import NeighborTable
+from path_probe import PathDiagnostics, PathProber, format_hops
+from sharded_engine import ShardedProbeEngine
+from engine_server import TOKEN_ENV, EngineClient, parse_address
+from rtt_chart import RTTChart
+from history_view import HistoryStore, VirtualHistoryView
+from tiered_history import TieredHistory
 
 
 class PingPanel:
@@ -27,8 +41,9 @@ class PingPanel:
         self.parent_frame = parent_frame
         self.app = app
         self.panel_id = panel_id
-        self.monitor: Optional[PingMonitor] = None
-        self.history = deque(maxlen=20)  # Histórico dos últimos 20 pings
+        self.monitor: Optional[Subscription] = None
+        self.parent_subscription: Optional[Subscription] = None  # Pinga o pai (gateway) em segundo plano
+        self.history = TieredHistory()  # Bruto da última hora, agregados de 1 min (1 dia) e 15 min (30 dias)
         
         # Frame principal do painel com tema Matrix
         self.frame = tk.Frame(parent_frame, bg=self.BG_COLOR, relief='solid', bd=2, highlightbackground=self.BORDER_COLOR, highlightthickness=1)
@@ -146,23 +161,42 @@ class PingPanel:
             anchor='w'
         )
         
+        # Gráfico de RTT/perda (roda do mouse = zoom, arrastar = rolar, duplo clique = ao vivo)
+        self.chart = RTTChart(
+            self.frame,
+            height=70,
+            bg="#000000",
+            fg=self.FG_COLOR,
+            loss_color=self.ERROR_COLOR,
+            grid_color=self.BORDER_COLOR
+        )
+        
         # Histórico com estilo terminal hacker
         self.history_frame = tk.Frame(self.frame, bg=self.BG_COLOR)
         self.history_label = tk.Label(
             self.history_frame,
-            text="[LOG] Últimas 20 entradas:",
+            text="[LOG] Histórico:",
             font=('Consolas', 8, 'bold'),
             bg=self.BG_COLOR,
             fg=self.FG_COLOR,
             anchor='w'
         )
-        self.history_text = tk.Text(
+        # Registros compactos; o Text mostra só as linhas visíveis, formatadas sob demanda
+        self.history_store = HistoryStore()
+        self.history_view = VirtualHistoryView(
             self.history_frame,
+            self.history_store,
+            self._format_history_record,
+            scrollbar_options={
+                'bg': self.BG_COLOR,
+                'troughcolor': self.BG_COLOR,
+                'activebackground': self.DARK_GREEN,
+                'highlightbackground': self.BORDER_COLOR,
+                'highlightthickness': 1
+            },
             height=8,  # Altura base, será ajustada dinamicamente
             width=50,  # Largura base, será ajustada dinamicamente
             font=('Consolas', 9),
-            state='disabled',
-            wrap='word',
             bg="#000000",
             fg=self.FG_COLOR,
             insertbackground=self.FG_COLOR,
@@ -173,17 +207,9 @@ class PingPanel:
             highlightbackground=self.BORDER_COLOR,
             highlightthickness=1
         )
-        self.history_scroll = tk.Scrollbar(
-            self.history_frame,
-            orient='vertical',
-            command=self.history_text.yview,
-            bg=self.BG_COLOR,
-            troughcolor=self.BG_COLOR,
-            activebackground=self.DARK_GREEN,
-            highlightbackground=self.BORDER_COLOR,
-            highlightthickness=1
-        )
-        self.history_text.configure(yscrollcommand=self.history_scroll.set)
+        self.history_text = self.history_view.text
+        self.history_scroll = self.history_view.scrollbar
+        self.history_xscroll = self.history_view.xscrollbar
         
         # Botão de ação (Salvar) com estilo hacker
         self.action_frame = tk.Frame(self.frame, bg=self.BG_COLOR)
@@ -209,8 +235,11 @@ class PingPanel:
         self.timestamp_label.pack(anchor='w', padx=5, fill='x')
         self.status_frame.pack(fill='x', pady=5)
         
+        self.chart.canvas.pack(fill='x', padx=5, pady=(0, 5))
+        
         self.history_label.pack(anchor='w', padx=5, pady=(0, 3), fill='x')
         # Layout responsivo do histórico
+        self.history_xscroll.pack(side='bottom', fill='x')
         self.history_text.pack(side='left', fill='both', expand=True)
         self.history_scroll.pack(side='right', fill='y')
         self.history_frame.pack(fill='both', expand=True, pady=5)
@@ -228,7 +257,8 @@ class PingPanel:
         
         # Para monitoramento anterior se existir
         if self.monitor:
-            self.monitor.stop()
+            stop_all([self.monitor, self.parent_subscription])
+            self.parent_subscription = None
         
         # Obtém intervalo da aplicação (tela de monitoramento)
         if hasattr(self.app, 'frames') and 'MonitorScreen' in self.app.frames:
@@ -236,9 +266,18 @@ class PingPanel:
         else:
             interval = 5
         
-        # Cria novo monitor
-        self.monitor = PingMonitor(ip, interval, self.on_ping_result)
-        self.monitor.start()
+        # Assina o fluxo de pings do IP (compartilhado com outros painéis que monitoram o mesmo IP)
+        registry = getattr(self.app, 'probe_registry', None)
+        if registry:
+            self.monitor = registry.subscribe(ip, interval, self.on_ping_result)
+            # Se o IP depende de um pai, o pai também precisa ser pingado para detectar a queda
+            tracker = getattr(self.app, 'dependency_tracker', None)
+            parent = tracker.get_parent(ip) if tracker else None
+            if parent:
+                self.parent_subscription = registry.subscribe(parent, interval, None)
+        else:
+            self.monitor = PingMonitor(ip, interval, self.on_ping_result)
+            self.monitor.start()
         
         # Atualiza UI
         self.ip_entry.config(state='disabled')
@@ -252,7 +291,7 @@ class PingPanel:
         self.history.append(ping_result)
         
         # Atualiza UI (precisa ser thread-safe)
-        self.frame.after(0, self._update_ui, ping_result)
+        self.frame.after(0, self._update_ui, ping_result, time.perf_counter())
     
     def _format_timestamp(self, timestamp: str) -> str:
         """Formata timestamp para o formato: 2024-01-15 | 14:30:45"""
@@ -291,14 +330,20 @@ class PingPanel:
             # Formato estilo hacker
             parts = []
             
-            # Bytes (padrão 32 bytes no Windows)
-            if bytes_size:
+            # Bytes (padrão 32 bytes no Windows; probes TCP não têm payload)
+            if ping_result.get('probe') == 'tcp':
+                parts.append("TCP connect")
+            elif ping_result.get('probe') == 'http':
+                parts.append(f"HTTP {ping_result.get('http_status')}")
+            elif bytes_size:
                 parts.append(f"bytes={bytes_size}")
             else:
                 parts.append("bytes=32")
             
-            # Tempo de resposta
-            if rtt_ms is not None and rtt_ms > 0:
+            # Tempo de resposta (resultado passivo da tabela de vizinhos não tem RTT)
+            if ping_result.get('source') == 'neighbor':
+                parts.append(f"ARP {ping_result.get('neighbor_state', '')}")
+            elif rtt_ms is not None and rtt_ms > 0:
                 if rtt_ms < 1:
                     parts.append("time<1ms")
                 else:
@@ -310,11 +355,20 @@ class PingPanel:
             if ttl:
                 parts.append(f"TTL={ttl}")
             
+            # Rajada: perda e dispersão do ciclo
+            if ping_result.get('sent', 1) > 1 and ping_result.get('received'):
+                parts.append(f"perda={ping_result['loss_pct']:.0f}% "
+                             f"min/avg/max/mdev={ping_result['rtt_min']:.1f}/{ping_result['rtt_avg']:.1f}/"
+                             f"{ping_result['rtt_max']:.1f}/{ping_result['rtt_mdev']:.1f}ms")
+            
             # Formato estilo terminal hacker
             result_line = f"[{formatted_timestamp}] >> Resposta de {ip}: {' '.join(parts)}"
             return result_line
         elif status == 'TIMEOUT':
             return f"[{formatted_timestamp}] >> !!! Tempo esgotado."
+        elif status == 'UNREACHABLE':
+            parent = ping_result.get('parent', '?')
+            return f"[{formatted_timestamp}] >> !!! Inacessível via {parent} (pai fora do ar, ping suspenso)."
         else:  # ERROR
             error_msg = ping_result.get('output', 'Erro desconhecido').lower()
             if 'could not find host' in error_msg or 'não foi possível encontrar' in error_msg or 'não conseguiu encontrar' in error_msg:
@@ -328,8 +382,22 @@ class PingPanel:
                 short_error = error_msg[:60].strip()
                 return f"[{formatted_timestamp}] >> !!! ERRO para {ip}: {short_error}"
     
-    def _update_ui(self, ping_result: dict):
+    def _update_ui(self, ping_result: dict, enqueued_at: Optional[float] = None):
         """Atualiza a interface do usuário"""
+        instrumentation = getattr(self.app, 'instrumentation', None)
+        if instrumentation:
+            started = time.perf_counter()
+            if enqueued_at is not None:
+                instrumentation.record('tk_dispatch', started - enqueued_at)
+            try:
+                self._apply_result(ping_result)
+            finally:
+                instrumentation.record('tk_update', time.perf_counter() - started)
+        else:
+            self._apply_result(ping_result)
+    
+    def _apply_result(self, ping_result: dict):
+        """Aplica o resultado do ping nos widgets do painel"""
         status = ping_result.get('status', 'UNKNOWN')
         rtt_ms = ping_result.get('rtt_ms')
         ttl = ping_result.get('ttl')
@@ -341,12 +409,14 @@ class PingPanel:
         status_color = {
             'OK': self.FG_COLOR,
             'TIMEOUT': self.WARNING_COLOR,
-            'ERROR': self.ERROR_COLOR
+            'ERROR': self.ERROR_COLOR,
+            'UNREACHABLE': self.WARNING_COLOR
         }
         status_text_map = {
             'OK': 'CONECTADO',
             'TIMEOUT': 'TEMPO ESGOTADO',
-            'ERROR': 'ERRO'
+            'ERROR': 'ERRO',
+            'UNREACHABLE': 'INACESSÍVEL VIA PAI'
         }
         color = status_color.get(status, self.FG_COLOR)
         status_text = status_text_map.get(status, status)
@@ -373,29 +443,46 @@ class PingPanel:
         formatted_timestamp = self._format_timestamp(timestamp) if timestamp else "N/A"
         self.timestamp_label.config(text=f"[TIMESTAMP]: {formatted_timestamp}")
         
-        # Atualiza histórico no formato CMD
-        self.history_text.config(state='normal')
+        # Gráfico: RTT das respostas OK, demais status como perda; OK sem RTT (vizinho confirmado
+        # pela tabela ARP/NDP) não é perda nem tem o que desenhar
+        if status != 'OK':
+            self.chart.append(timestamp, None)
+        elif rtt_ms is not None:
+            self.chart.append(timestamp, rtt_ms)
+        
+        # Atualiza histórico no formato CMD (a linha só é formatada quando ficar visível)
+        # Garante que o IP está no resultado
+        if 'ip' not in ping_result:
+            ping_result['ip'] = ip
+        self.history_store.append(ping_result)
+        self.history_view.refresh()
+    
+    def _format_history_record(self, record: dict) -> str:
+        """Formata um registro do histórico (chamado só para as linhas visíveis e na exportação)"""
+        if record['status'] == 'NOTE':
+            return record['text']
+        status = record.get('status', 'UNKNOWN')
+        formatted_timestamp = self._format_timestamp(record['timestamp']) if record.get('timestamp') else "N/A"
+        ip = record.get('ip', '')
         try:
-            # Garante que o IP está no resultado
-            if 'ip' not in ping_result:
-                ping_result['ip'] = ip
-            
-            ping_line = self._format_ping_line(ping_result)
+            ping_line = self._format_ping_line(record)
             if ping_line and ping_line.strip():
-                self.history_text.insert('end', ping_line + '\n')
-            else:
-                # Fallback se a formatação falhar
-                self.history_text.insert('end', f"[{formatted_timestamp}] Reply from {ip}: Status: {status}\n")
-            self.history_text.see('end')
-        except Exception as e:
+                return ping_line
+            # Fallback se a formatação falhar
+            return f"[{formatted_timestamp}] Reply from {ip}: Status: {status}"
+        except Exception:
             # Em caso de erro, mostra pelo menos o status com informações básicas
             error_info = f"Status: {status}"
-            if rtt_ms is not None:
-                error_info += f" | RTT: {rtt_ms:.2f}ms"
-            self.history_text.insert('end', f"[{formatted_timestamp}] Reply from {ip}: {error_info} (Erro na formatação)\n")
-            self.history_text.see('end')
-        finally:
-            self.history_text.config(state='disabled')
+            if record.get('rtt_ms') is not None:
+                error_info += f" | RTT: {record['rtt_ms']:.2f}ms"
+            return f"[{formatted_timestamp}] Reply from {ip}: {error_info} (Erro na formatação)"
+    
+    def show_path_report(self, hops: list):
+        """Mostra no histórico o diagnóstico de caminho (perda e latência por salto)"""
+        self.history_store.append_note(">> TRACE (perda e latência por salto):")
+        for line in format_hops(hops):
+            self.history_store.append_note(f"   {line}")
+        self.history_view.refresh()
     
     def toggle_pause(self):
         """Alterna entre pausar e retomar"""
@@ -420,8 +507,9 @@ class PingPanel:
     def remove(self):
         """Remove o monitoramento e limpa o painel"""
         if self.monitor:
-            self.monitor.stop()
+            stop_all([self.monitor, self.parent_subscription])
             self.monitor = None
+            self.parent_subscription = None
         
         # Limpa UI
         self.ip_entry.config(state='normal')
@@ -432,11 +520,12 @@ class PingPanel:
         self.rtt_label.config(text="[INFO]: RTT: -")
         self.timestamp_label.config(text="[TIMESTAMP]: -")
         
-        self.history_text.config(state='normal')
-        self.history_text.delete('1.0', 'end')
-        self.history_text.config(state='disabled')
+        self.history_store.clear()
+        self.history_view.follow = True
+        self.history_view.refresh()
         
         self.history.clear()
+        self.chart.clear()
         
         # Esconde o painel (remove do grid)
         self.frame.grid_remove()
@@ -451,12 +540,7 @@ class PingPanel:
         from tkinter import filedialog
         from datetime import datetime
         
-        # Obtém o conteúdo do histórico
-        self.history_text.config(state='normal')
-        history_content = self.history_text.get('1.0', 'end-1c')
-        self.history_text.config(state='disabled')
-        
-        if not history_content.strip():
+        if not len(self.history_store):
             messagebox.showwarning("Aviso", "Não há histórico para salvar.")
             return
         
@@ -496,15 +580,25 @@ class PingPanel:
                 current_info += f"  {status_text}\n"
                 current_info += f"  {rtt_text}\n"
                 current_info += f"  {timestamp_text}\n\n"
-                current_info += f"{'='*70}\n"
+                
+                # Resumo por período a partir do histórico em camadas
+                current_info += f"Resumo:\n"
+                now = time.time()
+                for label, seconds in (("1 hora", 3600), ("24 horas", 86400), ("30 dias", 30 * 86400)):
+                    summary = self.history.summary(now - seconds)
+                    if not summary['samples']:
+                        continue
+                    rtt_avg = f"{summary['rtt_avg']:.2f}ms" if summary['rtt_avg'] is not None else "N/A"
+                    current_info += (f"  {label}: {summary['samples']} pings, perda {summary['loss_pct']:.1f}%, "
+                                     f"RTT médio {rtt_avg}\n")
+                current_info += f"\n{'='*70}\n"
                 current_info += f"Histórico de Pings:\n"
                 current_info += f"{'='*70}\n\n"
                 
-                full_content = header + current_info + history_content
-                
-                # Salva arquivo
+                # Salva arquivo (histórico gravado registro a registro, sem montar o texto inteiro)
                 with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(full_content)
+                    f.write(header + current_info)
+                    self.history_store.write(f, self._format_history_record)
                 
                 messagebox.showinfo("Sucesso", f"Detalhes salvos em:\n{filename}")
             except Exception as e:
@@ -513,7 +607,8 @@ class PingPanel:
     def stop(self):
         """Para o monitoramento"""
         if self.monitor:
-            self.monitor.stop()
+            stop_all([self.monitor, self.parent_subscription])
+            self.parent_subscription = None
 
 
 class HomeScreen(tk.Frame):
@@ -745,10 +840,10 @@ class MonitorScreen(tk.Frame):
         # Limita a 4 IPs
         selected_ips = selected_ips[:4]
         
-        # Para todos os monitores ativos
+        # Para todos os monitores ativos ao mesmo tempo (inclusive as assinaturas do pai)
+        stop_all([m for panel in self.panels for m in (panel.monitor, panel.parent_subscription)])
         for panel in self.panels:
-            if panel.monitor:
-                panel.stop()
+            panel.parent_subscription = None
         
         # Remove painéis existentes se necessário
         num_needed = len(selected_ips)
@@ -761,8 +856,6 @@ class MonitorScreen(tk.Frame):
         while self.visible_panels > num_needed:
             if self.visible_panels > 0:
                 panel = self.panels[self.visible_panels - 1]
-                if panel.monitor:
-                    panel.stop()
                 panel.frame.grid_remove()
                 self.visible_panels -= 1
         
@@ -912,6 +1005,32 @@ class CatalogScreen(tk.Frame):
         )
         self.ip_entry.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
         
+        # Pai (gateway) opcional
+        parent_label = tk.Label(
+            fields_frame,
+            text="[PAI]:",
+            font=('Consolas', 9, 'bold'),
+            bg="#0a0a0a",
+            fg="#00ff41"
+        )
+        parent_label.grid(row=2, column=0, padx=5, pady=5, sticky='w')
+        
+        self.parent_entry = tk.Entry(
+            fields_frame,
+            font=('Consolas', 10),
+            bg="#000000",
+            fg="#00ff41",
+            insertbackground="#00ff41",
+            selectbackground="#003300",
+            selectforeground="#00ff41",
+            relief='solid',
+            bd=1,
+            highlightbackground="#00ff41",
+            highlightthickness=1,
+            width=25
+        )
+        self.parent_entry.grid(row=2, column=1, padx=5, pady=5, sticky='ew')
+        
         fields_frame.grid_columnconfigure(1, weight=1)
         
         # Botão salvar
@@ -929,6 +1048,7 @@ class CatalogScreen(tk.Frame):
         # Bind Enter nos campos
         self.name_entry.bind('<Return>', lambda e: self.ip_entry.focus())
         self.ip_entry.bind('<Return>', lambda e: self.save_ip())
+        self.parent_entry.bind('<Return>', lambda e: self.save_ip())
         
         # Frame para lista de IPs
         list_frame = tk.Frame(self, bg="#0a0a0a")
@@ -967,19 +1087,26 @@ class CatalogScreen(tk.Frame):
         """Salva um novo IP no catálogo"""
         name = self.name_entry.get().strip()
         ip = self.ip_entry.get().strip()
+        parent = self.parent_entry.get().strip() or None
         
         if not name or not ip:
             messagebox.showwarning("Aviso", "Por favor, preencha nome e IP.")
             return
         
-        if self.controller.ip_catalog.add(name, ip):
+        if self.controller.ip_catalog.add(name, ip, parent):
             self.name_entry.delete(0, tk.END)
             self.ip_entry.delete(0, tk.END)
+            self.parent_entry.delete(0, tk.END)
+            self._update_topology()
             self.refresh_catalog()
             messagebox.showinfo("Sucesso", f"IP '{name}' adicionado ao catálogo.")
         else:
             messagebox.showwarning("Aviso", f"O nome '{name}' já existe no catálogo.")
     
+    def _update_topology(self):
+        """Atualiza as dependências pai/filho usadas pelo motor de pings"""
+        self.controller.dependency_tracker.set_parents(self.controller.ip_catalog.get_topology())
+    
     def refresh_catalog(self):
         """Atualiza a exibição do catálogo em formato de grid"""
         # Limpa cards existentes
@@ -1099,6 +1226,7 @@ class CatalogScreen(tk.Frame):
         """Remove um IP do catálogo"""
         if messagebox.askyesno("Confirmar", f"Remover '{name}' do catálogo?"):
             if self.controller.ip_catalog.remove(name):
+                self._update_topology()
                 self.refresh_catalog()
                 messagebox.showinfo("Sucesso", f"'{name}' removido do catálogo.")
             else:
@@ -1209,6 +1337,77 @@ class PingMonitorApp:
         # Catálogo de IPs
         self.ip_catalog = IPCatalog()
         
+        # Instrumentação opcional (MONITORIP_PROFILE=1); F12 mostra as medições
+        self.instrumentation = ProbeInstrumentation() if os.environ.get('MONITORIP_PROFILE') else None
+        if self.instrumentation:
+            self.root.bind('<F12>', lambda e: self.show_instrumentation())
+        
+        # Exportador OpenMetrics opcional (MONITORIP_METRICS_PORT=9464)
+        self.metrics = None
+        metrics_port = os.environ.get('MONITORIP_METRICS_PORT')
+        if metrics_port:
+            try:
+                self.metrics = MetricsExporter(port=int(metrics_port))
+                self.metrics.start()
+            except (OSError, ValueError) as e:
+                print(f"Erro ao iniciar exportador de métricas: {e}")
+                self.metrics = None
+        
+        # Topologia pai/filho do catálogo: filhos não são pingados enquanto o pai está fora do ar
+        self.dependency_tracker = DependencyTracker(self.ip_catalog.get_topology())
+        
+        # Limitador central de pings: taxa global + bucket por gateway (pai no catálogo) ou sub-rede /24
+        self.rate_limiter = RateLimiter(key_func=self.dependency_tracker.get_parent)
+        if self.metrics:
+            self.metrics.queue_depth = self.rate_limiter.queue_depth
+            self.metrics.deferred_probes = lambda: self.rate_limiter.stats()['deferred_by_key']
+        
+        # Registro compartilhado: um fluxo de pings por (IP, intervalo), independente de quantos painéis,
+        # com a fase de cada alvo espalhada pelo intervalo
+        # Rajada opcional de ecos por ciclo (MONITORIP_BURST=5): perda e jitter medidos em cada ciclo
+        burst = 1
+        try:
+            burst = max(1, int(os.environ.get('MONITORIP_BURST', '1')))
+        except ValueError as e:
+            print(f"Erro ao ler MONITORIP_BURST: {e}")
+        # Vivacidade passiva opcional pela tabela ARP/NDP (MONITORIP_NEIGHBORS=1, somente Linux)
+        self.neighbor_table = NeighborTable() if os.environ.get('MONITORIP_NEIGHBORS') else None
+        # Pings ICMP em N processos (MONITORIP_WORKERS=N) com as estatísticas da rajada; topologia,
+        # limitador e tabela de vizinhos valem só para os monitores locais (UNREACHABLE e ARP não ocorrem)
+        self.sharded_engine = None
+        workers = os.environ.get('MONITORIP_WORKERS')
+        if workers:
+            try:
+                self.sharded_engine = ShardedProbeEngine(workers=int(workers), phase_spread=True, burst=burst)
+                self.sharded_engine.start()
+            except (OSError, ValueError) as e:
+                print(f"Erro ao iniciar motor em processos: {e}")
+                self.sharded_engine = None
+        # Motor em processo separado (MONITORIP_ENGINE=caminho do socket ou host:porta, com o token
+        # do motor em MONITORIP_ENGINE_TOKEN): a interface só assina os alvos e recebe os resultados em lotes
+        self.engine_client = None
+        engine_address = os.environ.get('MONITORIP_ENGINE')
+        if engine_address:
+            self.engine_client = EngineClient(parse_address(engine_address), token=os.environ.get(TOKEN_ENV))
+            self.probe_registry = ProbeRegistry(monitor_factory=self.engine_client.create_monitor)
+        else:
+            self.probe_registry = ProbeRegistry(instrumentation=self.instrumentation,
+                                                dependency=self.dependency_tracker,
+                                                phase_spread=True,
+                                                rate_limiter=self.rate_limiter,
+                                                burst=burst,
+                                                neighbors=self.neighbor_table,
+                                                sharded_engine=self.sharded_engine)
+        self.probe_registry.add_observer(self.dependency_tracker.observe)
+        if self.metrics:
+            self.probe_registry.add_observer(self.metrics.observe)
+        
+        # Diagnóstico de caminho (MTR) automático quando um alvo muda de status (somente Linux)
+        self.path_diagnostics = None
+        if PathProber.available():
+            self.path_diagnostics = PathDiagnostics(on_report=self._on_path_report)
+            self.probe_registry.add_observer(self.path_diagnostics.observe)
+        
         # Função auxiliar para criar botões com estilo hacker
         def create_add_button(parent, text, command, width=20):
             btn = tk.Button(
@@ -1259,13 +1458,65 @@ class PingMonitorApp:
         frame = self.frames[page_name]
         frame.tkraise()
     
+    def _on_path_report(self, ip: str, hops: list):
+        """Entrega um diagnóstico de caminho aos painéis do alvo (chamado na thread do diagnóstico)"""
+        def deliver():
+            monitor_screen = self.frames.get('MonitorScreen')
+            if not monitor_screen:
+                return
+            for panel in monitor_screen.panels:
+                if panel.monitor and panel.monitor.ip == ip:
+                    panel.show_path_report(hops)
+        self.root.after(0, deliver)
+    
+    def show_instrumentation(self):
+        """Mostra uma janela de depuração com as durações por etapa"""
+        window = tk.Toplevel(self.root, bg=self.BG_COLOR)
+        window.title(">>> INSTRUMENTACAO <<<")
+        text = tk.Text(
+            window,
+            width=80,
+            height=12,
+            font=('Consolas', 9),
+            bg="#000000",
+            fg=self.FG_COLOR,
+            relief='solid',
+            bd=1
+        )
+        
+        def refresh():
+            text.config(state='normal')
+            text.delete('1.0', 'end')
+            text.insert('end', "Tempos em ms\n\n" + self.instrumentation.dump())
+            text.config(state='disabled')
+        
+        buttons = tk.Frame(window, bg=self.BG_COLOR)
+        self.create_add_button(buttons, "ATUALIZAR", refresh, width=15).pack(side='left', padx=5)
+        self.create_add_button(buttons, "ZERAR", lambda: (self.instrumentation.reset(), refresh()), width=15).pack(side='left', padx=5)
+        text.pack(fill='both', expand=True, padx=10, pady=10)
+        buttons.pack(pady=(0, 10))
+        refresh()
+    
     def on_closing(self):
         """Handler para fechamento da aplicação"""
+        if self.instrumentation:
+            print(self.instrumentation.dump())
         # Para todos os monitores de todas as telas
         if 'MonitorScreen' in self.frames:
             monitor_screen = self.frames['MonitorScreen']
+            stop_all([m for panel in monitor_screen.panels for m in (panel.monitor, panel.parent_subscription)])
             for panel in monitor_screen.panels:
-                panel.stop()
+                panel.parent_subscription = None
+        if self.probe_registry.tcp_engine:
+            self.probe_registry.tcp_engine.stop()
+        if self.probe_registry.http_probe:
+            self.probe_registry.http_probe.pool.close()
+        if self.sharded_engine:
+            self.sharded_engine.stop()
+        if self.engine_client:
+            self.engine_client.close()
+        if self.metrics:
+            self.metrics.stop()
         self.root.destroy()
 
 
@@ -1277,5 +1528,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Executável do PyInstaller: os processos do MONITORIP_WORKERS executam o trabalho, não a interface
+    multiprocessing.freeze_support()
     main()
 
@@ -0,0 +1,232 @@
+"""
+Exportador de métricas no formato OpenMetrics (Prometheus)
+Serve um snapshot pré-renderizado via HTTP; o snapshot é atualizado periodicamente
+a partir dos resultados de ping, sem percorrer os monitores a cada scrape
+"""
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+from clock import Clock
+
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def _escape_label(value: str) -> str:
+    """Escapa o valor de um label OpenMetrics"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    """Formata um valor numérico"""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _TargetStats:
+    """Estatísticas acumuladas de um alvo"""
+
+    def __init__(self, buckets, loss_window: int):
+        self.last_rtt: Optional[float] = None
+        self.status_counts: Dict[str, int] = {}
+        self.recent = deque(maxlen=loss_window)  # True = perdido
+        self.lost_in_window = 0
+        self.bucket_counts = [0] * len(buckets)
+        self.rtt_sum = 0.0
+        self.rtt_count = 0
+
+
+class MetricsExporter:
+    """Coleta resultados de ping e serve métricas OpenMetrics"""
+
+    # Limites (le) do histograma de RTT em ms
+    RTT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 9464, refresh_interval: float = 5.0,
+                 loss_window: int = 100, queue_depth: Optional[Callable[[], int]] = None,
+                 deferred_probes: Optional[Callable[[], Dict[str, int]]] = None,
+                 clock: Optional[Clock] = None):
+        """
+        Inicializa o exportador
+
+        Args:
+            host: Endereço de escuta do HTTP
+            port: Porta de escuta (0 = porta livre escolhida pelo sistema)
+            refresh_interval: Intervalo de atualização do snapshot em segundos
+            loss_window: Quantidade de pings recentes usados na taxa de perda
+            queue_depth: Função que retorna a fila do motor de pings (None = não exporta)
+            deferred_probes: Função que retorna {sub-rede: pings adiados pelo limitador} (None = não exporta)
+            clock: Relógio usado no tick de atualização (None = relógio real)
+        """
+        self.host = host
+        self.port = port
+        self.refresh_interval = refresh_interval
+        self.loss_window = loss_window
+        self.queue_depth = queue_depth
+        self.deferred_probes = deferred_probes
+        self.clock = clock or Clock()
+        self._lock = threading.Lock()
+        self._targets: Dict[str, _TargetStats] = {}
+        self._snapshot = b'# EOF\n'
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads = []
+        self._stop_event = threading.Event()
+
+    def observe(self, ping_result: Dict):
+        """
+        Registra um resultado de ping (chamado nas threads de ping, custo O(1))
+
+        Args:
+            ping_result: Dicionário produzido pelo PingMonitor
+        """
+        target = ping_result.get('ip', '')
+        status = ping_result.get('status', 'UNKNOWN')
+        rtt_ms = ping_result.get('rtt_ms')
+        lost = status != 'OK'
+        with self._lock:
+            stats = self._targets.get(target)
+            if stats is None:
+                stats = self._targets[target] = _TargetStats(self.RTT_BUCKETS_MS, self.loss_window)
+            stats.status_counts[status] = stats.status_counts.get(status, 0) + 1
+            if len(stats.recent) == stats.recent.maxlen and stats.recent[0]:
+                stats.lost_in_window -= 1
+            stats.recent.append(lost)
+            stats.lost_in_window += lost
+            if not lost and rtt_ms is not None:
+                stats.last_rtt = rtt_ms
+                stats.rtt_sum += rtt_ms
+                stats.rtt_count += 1
+                for i, bound in enumerate(self.RTT_BUCKETS_MS):
+                    if rtt_ms <= bound:
+                        stats.bucket_counts[i] += 1
+                        break
+
+    def render(self) -> bytes:
+        """Renderiza as métricas atuais no formato OpenMetrics"""
+        with self._lock:
+            targets = {
+                target: (stats.last_rtt, dict(stats.status_counts),
+                         stats.lost_in_window / len(stats.recent) if stats.recent else 0.0,
+                         list(stats.bucket_counts), stats.rtt_sum, stats.rtt_count)
+                for target, stats in self._targets.items()
+            }
+
+        lines = [
+            '# TYPE monitorip_last_rtt_milliseconds gauge',
+            '# HELP monitorip_last_rtt_milliseconds Último RTT com resposta.',
+        ]
+        for target, (last_rtt, _, _, _, _, _) in sorted(targets.items()):
+            if last_rtt is not None:
+                lines.append(f'monitorip_last_rtt_milliseconds{{target="{_escape_label(target)}"}} {_format_value(last_rtt)}')
+
+        lines += [
+            '# TYPE monitorip_loss_ratio gauge',
+            f'# HELP monitorip_loss_ratio Fração de pings perdidos nos últimos {self.loss_window} pings.',
+        ]
+        for target, (_, _, loss, _, _, _) in sorted(targets.items()):
+            lines.append(f'monitorip_loss_ratio{{target="{_escape_label(target)}"}} {_format_value(loss)}')
+
+        lines += [
+            '# TYPE monitorip_probes counter',
+            '# HELP monitorip_probes Pings executados por status.',
+        ]
+        for target, (_, counts, _, _, _, _) in sorted(targets.items()):
+            for status, count in sorted(counts.items()):
+                lines.append(
+                    f'monitorip_probes_total{{target="{_escape_label(target)}",status="{_escape_label(status)}"}} {count}'
+                )
+
+        lines += [
+            '# TYPE monitorip_rtt_milliseconds histogram',
+            '# HELP monitorip_rtt_milliseconds Distribuição do RTT.',
+        ]
+        for target, (_, _, _, buckets, rtt_sum, rtt_count) in sorted(targets.items()):
+            label = _escape_label(target)
+            cumulative = 0
+            for bound, count in zip(self.RTT_BUCKETS_MS, buckets):
+                cumulative += count
+                lines.append(f'monitorip_rtt_milliseconds_bucket{{target="{label}",le="{_format_value(bound)}"}} {cumulative}')
+            lines.append(f'monitorip_rtt_milliseconds_bucket{{target="{label}",le="+Inf"}} {rtt_count}')
+            lines.append(f'monitorip_rtt_milliseconds_sum{{target="{label}"}} {_format_value(rtt_sum)}')
+            lines.append(f'monitorip_rtt_milliseconds_count{{target="{label}"}} {rtt_count}')
+
+        if self.queue_depth is not None:
+            lines += [
+                '# TYPE monitorip_probe_queue_depth gauge',
+                '# HELP monitorip_probe_queue_depth Pings aguardando execução no motor.',
+                f'monitorip_probe_queue_depth {self.queue_depth()}',
+            ]
+
+        if self.deferred_probes is not None:
+            lines += [
+                '# TYPE monitorip_probes_deferred counter',
+                '# HELP monitorip_probes_deferred Pings adiados pelo limitador de taxa.',
+            ]
+            for key, count in sorted(self.deferred_probes().items()):
+                lines.append(f'monitorip_probes_deferred_total{{bucket="{_escape_label(key)}"}} {count}')
+
+        lines.append('# EOF')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def refresh(self):
+        """Atualiza o snapshot servido pelo HTTP"""
+        self._snapshot = self.render()
+
+    def get_snapshot(self) -> bytes:
+        """Retorna o último snapshot renderizado"""
+        return self._snapshot
+
+    def _refresh_loop(self):
+        """Loop de atualização periódica do snapshot"""
+        try:
+            while not self._stop_event.is_set():
+                self.refresh()
+                self.clock.wait(self._stop_event, self.refresh_interval)
+        finally:
+            self.clock.detach()
+
+    def start(self):
+        """Inicia o servidor HTTP e o tick de atualização"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = exporter.get_snapshot()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Sem log por requisição
+
+        self._stop_event.clear()
+        self.refresh()
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+        refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self.clock.attach(refresh_thread)
+        server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._threads = [refresh_thread, server_thread]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Para o servidor HTTP e o tick de atualização"""
+        self._stop_event.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
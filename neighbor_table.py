@@ -0,0 +1,216 @@
+"""
+Vivacidade passiva pela tabela de vizinhos do kernel (ARP/NDP) do Linux
+Uma leitura em lote (netlink, com /proc/net/arp como alternativa) informa o estado de
+todos os hosts do segmento local sem enviar pacotes
+"""
+import socket
+import struct
+import sys
+import threading
+from typing import Callable, Dict, Optional
+
+from clock import Clock
+
+
+# Estados NUD do kernel (include/uapi/linux/neighbour.h)
+NUD_STATES = {
+    0x01: 'INCOMPLETE',
+    0x02: 'REACHABLE',
+    0x04: 'STALE',
+    0x08: 'DELAY',
+    0x10: 'PROBE',
+    0x20: 'FAILED',
+    0x40: 'NOARP',
+    0x80: 'PERMANENT',
+}
+
+# Estados em que o kernel confirmou o vizinho recentemente (dispensa o ping); PERMANENT (ARP
+# estático) nunca expira e não diz nada sobre o host estar ligado, então vai para o ping ativo
+LIVE_STATES = ('REACHABLE',)
+
+_RTM_NEWNEIGH = 28
+_RTM_GETNEIGH = 30
+_NLMSG_ERROR = 2
+_NLMSG_DONE = 3
+_NLM_F_REQUEST = 0x1
+_NLM_F_DUMP = 0x300
+_NDA_DST = 1
+_NLMSG_HEADER = struct.Struct('=IHHII')  # len, type, flags, seq, pid
+_NDMSG = struct.Struct('=BBHiHBB')  # family, pad1, pad2, ifindex, state, flags, type
+_RTATTR = struct.Struct('=HH')  # len, type
+
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def parse_netlink_neighbors(data: bytes) -> Dict[str, str]:
+    """
+    Interpreta as mensagens RTM_NEWNEIGH de um dump netlink
+
+    Args:
+        data: Bytes recebidos do socket netlink
+
+    Returns:
+        Dicionário {ip: estado NUD}
+    """
+    neighbors = {}
+    offset = 0
+    while offset + _NLMSG_HEADER.size <= len(data):
+        length, msg_type, _, _, _ = _NLMSG_HEADER.unpack_from(data, offset)
+        if length < _NLMSG_HEADER.size:
+            break
+        if msg_type == _RTM_NEWNEIGH:
+            body = offset + _NLMSG_HEADER.size
+            family, _, _, _, state, _, _ = _NDMSG.unpack_from(data, body)
+            attr = body + _NDMSG.size
+            end = offset + length
+            while attr + _RTATTR.size <= end:
+                attr_len, attr_type = _RTATTR.unpack_from(data, attr)
+                if attr_len < _RTATTR.size:
+                    break
+                if attr_type == _NDA_DST:
+                    address = data[attr + _RTATTR.size:attr + attr_len]
+                    ip = socket.inet_ntop(family, address)
+                    # Vários bits podem vir juntos; o de maior valor é o mais específico
+                    names = [name for bit, name in NUD_STATES.items() if state & bit]
+                    neighbors[ip] = names[-1] if names else 'NONE'
+                attr += _align(attr_len)
+        offset += _align(length)
+    return neighbors
+
+
+def read_netlink_neighbors() -> Dict[str, str]:
+    """Lê a tabela de vizinhos (IPv4 e IPv6) do kernel via netlink"""
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+    try:
+        sock.bind((0, 0))
+        request = _NDMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0, 0, 0)
+        header = _NLMSG_HEADER.pack(_NLMSG_HEADER.size + len(request), _RTM_GETNEIGH,
+                                    _NLM_F_REQUEST | _NLM_F_DUMP, 1, 0)
+        sock.send(header + request)
+
+        neighbors = {}
+        while True:
+            data = sock.recv(65536)
+            neighbors.update(parse_netlink_neighbors(data))
+            # O dump termina com NLMSG_DONE (ou NLMSG_ERROR)
+            offset = 0
+            while offset + _NLMSG_HEADER.size <= len(data):
+                length, msg_type, _, _, _ = _NLMSG_HEADER.unpack_from(data, offset)
+                if msg_type == _NLMSG_ERROR:
+                    raise OSError('Erro no dump netlink da tabela de vizinhos')
+                if msg_type == _NLMSG_DONE:
+                    return neighbors
+                if length < _NLMSG_HEADER.size:
+                    return neighbors
+                offset += _align(length)
+    finally:
+        sock.close()
+
+
+def parse_proc_arp(text: str) -> Dict[str, str]:
+    """
+    Interpreta o /proc/net/arp (somente IPv4, sem estado NUD)
+
+    Entradas completas viram STALE (existem, mas sem confirmação recente) e as
+    demais INCOMPLETE, então nenhuma dispensa o ping.
+
+    Args:
+        text: Conteúdo do /proc/net/arp
+
+    Returns:
+        Dicionário {ip: estado}
+    """
+    neighbors = {}
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        try:
+            flags = int(fields[2], 16)
+        except ValueError:
+            continue
+        neighbors[fields[0]] = 'STALE' if flags & 0x2 else 'INCOMPLETE'
+    return neighbors
+
+
+def read_neighbors() -> Dict[str, str]:
+    """Lê a tabela de vizinhos pelo netlink, ou pelo /proc/net/arp se indisponível ({} fora do Linux)"""
+    if not sys.platform.startswith('linux'):
+        return {}
+    try:
+        return read_netlink_neighbors()
+    except OSError:
+        pass
+    try:
+        with open('/proc/net/arp', 'r', encoding='utf-8') as f:
+            return parse_proc_arp(f.read())
+    except OSError:
+        return {}
+
+
+class NeighborTable:
+    """Cache da tabela de vizinhos compartilhado por todos os monitores"""
+
+    def __init__(self, max_age: float = 1.0, reader: Optional[Callable[[], Dict[str, str]]] = None,
+                 clock: Optional[Clock] = None):
+        """
+        Inicializa a tabela
+
+        Args:
+            max_age: Idade máxima da leitura em segundos (uma leitura atende todos os alvos)
+            reader: Função que lê a tabela {ip: estado} (None = netlink / /proc/net/arp)
+            clock: Relógio usado na idade da leitura e nos timestamps (None = relógio real)
+        """
+        self.max_age = max_age
+        self.reader = reader or read_neighbors
+        self.clock = clock or Clock()
+        self._lock = threading.Lock()
+        self._neighbors: Dict[str, str] = {}
+        self._read_at: Optional[float] = None
+        self.reads = 0
+
+    def snapshot(self) -> Dict[str, str]:
+        """Retorna a tabela {ip: estado}, relendo o kernel se a leitura estiver velha"""
+        with self._lock:
+            now = self.clock.monotonic()
+            if self._read_at is None or now - self._read_at >= self.max_age:
+                try:
+                    self._neighbors = self.reader()
+                except OSError as e:
+                    print(f"Erro ao ler tabela de vizinhos: {e}")
+                    self._neighbors = {}
+                self._read_at = now
+                self.reads += 1
+            return self._neighbors
+
+    def state(self, ip: str) -> Optional[str]:
+        """Retorna o estado NUD de um IP (None se não está na tabela)"""
+        return self.snapshot().get(ip)
+
+    def lookup(self, ip: str) -> Optional[Dict]:
+        """
+        Retorna um resultado passivo se o kernel confirmou o vizinho recentemente
+
+        Args:
+            ip: IP do alvo
+
+        Returns:
+            Resultado no formato do PingMonitor com source='neighbor', ou None se o
+            alvo precisa de ping ativo (fora do segmento, STALE, FAILED, ...)
+        """
+        state = self.state(ip)
+        if state not in LIVE_STATES:
+            return None
+        return {
+            'status': 'OK',
+            'rtt_ms': None,
+            'timestamp': self.clock.now().isoformat(),
+            'ttl': None,
+            'bytes': None,
+            'output': f'Vizinho {state} na tabela ARP/NDP',
+            'ip': ip,
+            'source': 'neighbor',
+            'neighbor_state': state
+        }
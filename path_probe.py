@@ -0,0 +1,320 @@
+"""
+Diagnóstico de caminho no estilo MTR (traceroute paralelo)
+Envia sondas UDP com TTL limitado para todos os saltos de uma vez por um único socket
+e lê as respostas ICMP pela fila de erros do kernel (IP_RECVERR, somente Linux/IPv4),
+acumulando perda e latência por salto
+"""
+import errno
+import math
+import selectors
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from clock import Clock
+
+
+IP_RECVERR = getattr(socket, 'IP_RECVERR', 11)
+MSG_ERRQUEUE = getattr(socket, 'MSG_ERRQUEUE', 0x2000)
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+SO_EE_ORIGIN_ICMP = 2
+ICMP_DEST_UNREACH = 3
+ICMP_PORT_UNREACH = 3
+
+_EXTENDED_ERR = struct.Struct('=IBBBBII')  # errno, origin, type, code, pad, info, data
+_SOCKADDR_IN = struct.Struct('=HH4s')  # family, porta, endereço
+_TIMESPEC = struct.Struct('=qq')
+
+
+class HopStats:
+    """Estatísticas acumuladas de um salto (média e desvio pelo algoritmo de Welford)"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.address: Optional[str] = None
+        self.sent = 0
+        self.received = 0
+        self.last_ms: Optional[float] = None
+        self.best_ms: Optional[float] = None
+        self.worst_ms: Optional[float] = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, address: Optional[str], rtt_ms: Optional[float]):
+        """Registra uma sonda (rtt_ms None = sem resposta)"""
+        self.sent += 1
+        if rtt_ms is None:
+            return
+        self.address = address
+        self.received += 1
+        self.last_ms = rtt_ms
+        self.best_ms = rtt_ms if self.best_ms is None else min(self.best_ms, rtt_ms)
+        self.worst_ms = rtt_ms if self.worst_ms is None else max(self.worst_ms, rtt_ms)
+        delta = rtt_ms - self._mean
+        self._mean += delta / self.received
+        self._m2 += delta * (rtt_ms - self._mean)
+
+    def to_dict(self) -> Dict:
+        """Retorna as estatísticas do salto"""
+        return {
+            'ttl': self.ttl,
+            'address': self.address,
+            'sent': self.sent,
+            'received': self.received,
+            'loss_pct': (self.sent - self.received) * 100.0 / self.sent if self.sent else 0.0,
+            'last_ms': self.last_ms,
+            'avg_ms': self._mean if self.received else None,
+            'best_ms': self.best_ms,
+            'worst_ms': self.worst_ms,
+            'stdev_ms': math.sqrt(self._m2 / (self.received - 1)) if self.received > 1 else 0.0
+        }
+
+
+class PathProber:
+    """Traceroute paralelo com estatísticas por salto"""
+
+    def __init__(self, max_hops: int = 30, timeout: float = 2.0, base_port: int = 33434):
+        """
+        Inicializa o prober
+
+        Args:
+            max_hops: TTL máximo sondado
+            timeout: Espera pelas respostas de cada rodada em segundos
+            base_port: Porta UDP da sonda de TTL 1 (TTL n usa base_port + n)
+        """
+        self.max_hops = max_hops
+        self.timeout = timeout
+        self.base_port = base_port
+
+    @staticmethod
+    def available() -> bool:
+        """Retorna True se o sistema suporta IP_RECVERR (Linux)"""
+        # Fora do Linux o número 11 é outra opção (IP_MULTICAST_LOOP no Windows/macOS) e o
+        # setsockopt funciona, mas não há fila de erros nem recvmsg (Windows). No Linux o valor
+        # 11 é o IP_RECVERR mesmo quando o Python não exporta a constante
+        if not sys.platform.startswith('linux') or not hasattr(socket.socket, 'recvmsg'):
+            return False
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        except OSError:
+            return False
+        try:
+            sock.setsockopt(socket.SOL_IP, IP_RECVERR, 1)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def _send(self, sock: socket.socket, address: str, ttl: int) -> bool:
+        """Envia a sonda de um TTL (um erro pendente de outra sonda pode ser reportado no envio)"""
+        sock.setsockopt(socket.SOL_IP, socket.IP_TTL, ttl)
+        for _ in range(3):
+            try:
+                sock.sendto(b'monitor-ip', (address, self.base_port + ttl))
+                return True
+            except (ConnectionRefusedError, BlockingIOError):
+                continue  # Erro ICMP de outra sonda: já está na fila de erros, tenta de novo
+            except OSError as e:
+                if e.errno in (errno.EHOSTUNREACH, errno.ENETUNREACH):
+                    continue
+                raise
+        return False
+
+    def _read_errors(self, sock: socket.socket, sent_at: Dict[int, float], replies: Dict[int, tuple]):
+        """Lê a fila de erros: (endereço que respondeu, RTT, chegou ao destino) por TTL"""
+        while True:
+            try:
+                _, ancdata, _, destination = sock.recvmsg(512, 512, MSG_ERRQUEUE)
+            except (BlockingIOError, InterruptedError):
+                return
+            received_at = time.time()
+            ttl = destination[1] - self.base_port
+            error = None
+            for level, cmsg_type, data in ancdata:
+                if level == socket.SOL_IP and cmsg_type == IP_RECVERR and len(data) >= _EXTENDED_ERR.size:
+                    error = data
+                elif level == socket.SOL_SOCKET and cmsg_type == SO_TIMESTAMPNS and len(data) >= _TIMESPEC.size:
+                    seconds, nanoseconds = _TIMESPEC.unpack_from(data)
+                    received_at = seconds + nanoseconds / 1e9  # Horário de chegada no kernel
+            if error is None or ttl not in sent_at or ttl in replies:
+                continue
+            _, origin, icmp_type, icmp_code, _, _, _ = _EXTENDED_ERR.unpack_from(error)
+            if origin != SO_EE_ORIGIN_ICMP:
+                continue
+            offender = None
+            if len(error) >= _EXTENDED_ERR.size + _SOCKADDR_IN.size:
+                family, _, packed = _SOCKADDR_IN.unpack_from(error, _EXTENDED_ERR.size)
+                if family == socket.AF_INET:
+                    offender = socket.inet_ntoa(packed)
+            # Destino: respondeu o próprio alvo, ou porta inacessível (a sonda chegou)
+            reached = offender == destination[0] or (icmp_type == ICMP_DEST_UNREACH and
+                                                     icmp_code == ICMP_PORT_UNREACH)
+            replies[ttl] = (offender, max(0.0, received_at - sent_at[ttl]) * 1000.0, reached)
+
+    def probe_round(self, target: str) -> List[Dict]:
+        """
+        Executa uma rodada: uma sonda por TTL, todas enviadas de uma vez
+
+        Args:
+            target: IP ou hostname (IPv4)
+
+        Returns:
+            Lista por TTL com: ttl, address (None = sem resposta), rtt_ms, reached;
+            termina no primeiro salto que é o destino
+        """
+        address = socket.gethostbyname(target)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        selector = selectors.DefaultSelector()
+        try:
+            sock.setsockopt(socket.SOL_IP, IP_RECVERR, 1)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+            except OSError:
+                pass  # Sem timestamp do kernel: usa o horário da leitura
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+
+            sent_at: Dict[int, float] = {}
+            replies: Dict[int, tuple] = {}
+            for ttl in range(1, self.max_hops + 1):
+                sent_at[ttl] = time.time()
+                if not self._send(sock, address, ttl):
+                    del sent_at[ttl]
+                self._read_errors(sock, sent_at, replies)
+
+            deadline = time.monotonic() + self.timeout
+            while True:
+                reached = [ttl for ttl, (_, _, at_target) in replies.items() if at_target]
+                last = min(reached) if reached else self.max_hops
+                if all(ttl in replies for ttl in range(1, last + 1) if ttl in sent_at):
+                    break  # Todos os saltos até o destino responderam
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if selector.select(remaining):
+                    self._read_errors(sock, sent_at, replies)
+        finally:
+            selector.close()
+            sock.close()
+
+        reached = [ttl for ttl, (_, _, at_target) in replies.items() if at_target]
+        last = min(reached) if reached else max(replies, default=0)
+        hops = []
+        for ttl in range(1, last + 1):
+            offender, rtt_ms, at_target = replies.get(ttl, (None, None, False))
+            hops.append({'ttl': ttl, 'address': offender, 'rtt_ms': rtt_ms, 'reached': at_target})
+        return hops
+
+    def trace(self, target: str, rounds: int = 5, interval: float = 0.2,
+              stats: Optional[Dict[int, HopStats]] = None,
+              stop_event: Optional[threading.Event] = None) -> List[Dict]:
+        """
+        Executa várias rodadas acumulando as estatísticas por salto (MTR)
+
+        Args:
+            target: IP ou hostname (IPv4)
+            rounds: Quantidade de rodadas
+            interval: Espera entre rodadas em segundos
+            stats: Estatísticas de execuções anteriores para continuar acumulando
+            stop_event: Evento que interrompe as rodadas
+
+        Returns:
+            Lista de estatísticas por salto (HopStats.to_dict)
+        """
+        stats = {} if stats is None else stats
+        stop_event = stop_event or threading.Event()
+        for index in range(rounds):
+            if index and stop_event.wait(interval):
+                break
+            hops = self.probe_round(target)
+            for hop in hops:
+                hop_stats = stats.get(hop['ttl'])
+                if hop_stats is None:
+                    hop_stats = stats[hop['ttl']] = HopStats(hop['ttl'])
+                hop_stats.add(hop['address'], hop['rtt_ms'])
+            # Caminho ficou mais curto (ex: rota mudou): descarta saltos além do destino
+            if hops and hops[-1]['reached']:
+                for ttl in [ttl for ttl in stats if ttl > len(hops)]:
+                    del stats[ttl]
+        return [stats[ttl].to_dict() for ttl in sorted(stats)]
+
+
+class PathDiagnostics:
+    """Dispara um diagnóstico de caminho quando um alvo muda de status"""
+
+    def __init__(self, prober: Optional[PathProber] = None, rounds: int = 5, cooldown: float = 60.0,
+                 on_report: Optional[Callable[[str, List[Dict]], None]] = None, clock: Optional[Clock] = None):
+        """
+        Inicializa o diagnóstico automático
+
+        Args:
+            prober: Prober usado nos diagnósticos (None = padrão)
+            rounds: Rodadas de cada diagnóstico
+            cooldown: Intervalo mínimo entre diagnósticos do mesmo alvo em segundos
+            on_report: Função chamada com (ip, saltos) ao fim de cada diagnóstico (na thread do diagnóstico)
+            clock: Relógio usado no cooldown (None = relógio real)
+        """
+        self.prober = prober or PathProber()
+        self.rounds = rounds
+        self.cooldown = cooldown
+        self.on_report = on_report
+        self.clock = clock or Clock()
+        self._lock = threading.Lock()
+        self._last_status: Dict[str, str] = {}
+        self._last_run: Dict[str, float] = {}
+        self._running = set()
+        self.reports: Dict[str, List[Dict]] = {}
+
+    def observe(self, ping_result: Dict):
+        """
+        Registra um resultado de ping (observador do ProbeRegistry)
+
+        Args:
+            ping_result: Dicionário produzido pelo PingMonitor
+        """
+        ip = ping_result.get('ip')
+        status = ping_result.get('status')
+        # Somente pings ICMP reais (TCP/HTTP, passivos e suprimidos têm diagnóstico próprio ou nenhum)
+        if not ip or status == 'UNREACHABLE' or 'probe' in ping_result or 'source' in ping_result:
+            return
+        with self._lock:
+            previous = self._last_status.get(ip)
+            self._last_status[ip] = status
+            if previous is None or previous == status or ip in self._running:
+                return
+            now = self.clock.monotonic()
+            if now - self._last_run.get(ip, -self.cooldown) < self.cooldown:
+                return
+            self._last_run[ip] = now
+            self._running.add(ip)
+        threading.Thread(target=self._run, args=(ip,), daemon=True).start()
+
+    def _run(self, ip: str):
+        """Executa o diagnóstico em segundo plano"""
+        try:
+            hops = self.prober.trace(ip, rounds=self.rounds)
+        except Exception as e:
+            print(f"Erro no diagnóstico de caminho para {ip}: {e}")
+            return
+        finally:
+            with self._lock:
+                self._running.discard(ip)
+        self.reports[ip] = hops
+        if self.on_report:
+            self.on_report(ip, hops)
+
+
+def format_hops(hops: List[Dict]) -> List[str]:
+    """Formata as estatísticas por salto em linhas de texto (estilo MTR)"""
+    lines = []
+    for hop in hops:
+        if hop['received']:
+            lines.append(f"{hop['ttl']:>2}. {hop['address']:<15} perda={hop['loss_pct']:.0f}% "
+                         f"avg={hop['avg_ms']:.1f}ms melhor={hop['best_ms']:.1f}ms pior={hop['worst_ms']:.1f}ms")
+        else:
+            lines.append(f"{hop['ttl']:>2}. ???             perda=100%")
+    return lines
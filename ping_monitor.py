@@ -1,19 +1,125 @@
 """
 Monitor de IPs - Classe principal para gerenciamento de pings
 """
+import hashlib
+import math
 import subprocess
 import platform
 import re
 import time
-from datetime import datetime
-from typing import Optional, Callable, Dict
+from typing import Optional, Callable, Dict, List
 import threading
+from clock import Clock
+from adaptive_timeout import TimeoutEstimator
+from topology import DependencyTracker
+from rate_limiter import RateLimiter
+from neighbor_table import NeighborTable
+from instrumentation import ProbeInstrumentation
+
+
+# Status possíveis de um resultado (a ordem é o código numérico usado nos formatos compactos)
+STATUS_CODES = ('OK', 'TIMEOUT', 'ERROR', 'UNREACHABLE')
+
+
+def phase_offset(target: str, interval: float) -> float:
+    """
+    Calcula a fase de um alvo dentro do intervalo a partir de um hash do alvo
+    
+    O hash é determinístico, então a fase é a mesma entre reinícios e não muda
+    quando outros alvos são adicionados; alvos diferentes se espalham de forma
+    uniforme pelo intervalo.
+    
+    Args:
+        target: IP ou hostname
+        interval: Intervalo entre pings em segundos
+        
+    Returns:
+        Deslocamento em segundos, entre 0 e interval
+    """
+    digest = hashlib.sha1(target.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64 * interval
+
+
+def parse_burst_stats(output: str, system: str, sent: int) -> Dict:
+    """
+    Calcula as estatísticas de uma rajada de ecos a partir da saída do ping
+    
+    Os tempos vêm das linhas de resposta (no Windows, "Destination host unreachable"
+    também conta como recebido no resumo, então só respostas com tempo contam).
+    
+    Args:
+        output: Saída do comando ping
+        system: Sistema operacional (platform.system().lower())
+        sent: Ecos pedidos (usado se o resumo não informar os enviados)
+        
+    Returns:
+        Dicionário com sent, received, loss_pct, rtt_min, rtt_avg, rtt_max, rtt_mdev (ms)
+    """
+    if system == 'windows':
+        times = [0.5 if op == '<' else float(value) for op, value in
+                 re.findall(r'(?:time|tempo)\s*([<=])\s*(\d+)\s*ms', output, re.IGNORECASE)]
+        summary = re.search(r'(?:Sent|Enviados)\s*=\s*(\d+)', output, re.IGNORECASE)
+    else:
+        times = [float(value) for value in re.findall(r'time[<=](\d+\.?\d*)\s*ms', output, re.IGNORECASE)]
+        summary = re.search(r'(\d+)\s+packets transmitted', output, re.IGNORECASE)
+    if summary:
+        sent = int(summary.group(1))
+    received = len(times)
+    sent = max(sent, received)
+    
+    stats = {
+        'sent': sent,
+        'received': received,
+        'loss_pct': (sent - received) * 100.0 / sent if sent else 0.0,
+        'rtt_min': None,
+        'rtt_avg': None,
+        'rtt_max': None,
+        'rtt_mdev': None
+    }
+    if times:
+        avg = sum(times) / received
+        stats['rtt_min'] = min(times)
+        stats['rtt_avg'] = avg
+        stats['rtt_max'] = max(times)
+        # Desvio médio como no ping do Linux: sqrt(média dos quadrados - quadrado da média)
+        stats['rtt_mdev'] = math.sqrt(max(0.0, sum(t * t for t in times) / received - avg * avg))
+    return stats
+
+
+# Primeira versão do iputils que aceita frações de segundo em -W
+IPUTILS_FRACTIONAL_WAIT = 20190324
+
+
+def iputils_version() -> Optional[int]:
+    """
+    Versão do iputils do ping do sistema (ping -V)
+    
+    Returns:
+        Data da versão como inteiro AAAAMMDD, ou None se não for iputils
+    """
+    try:
+        completed = subprocess.run(['ping', '-V'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=2)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'iputils[- ]s?(\d{8})', completed.stdout.decode('utf-8', errors='ignore'))
+    return int(match.group(1)) if match else None
 
 
 class PingMonitor:
     """Classe para monitorar um IP através de ping"""
     
-    def __init__(self, ip: str, interval: int = 5, callback: Optional[Callable] = None):
+    # Timeout de resposta quando o timeout adaptativo está desligado (segundos)
+    DEFAULT_TIMEOUT = 5.0
+    # Com o pai fora do ar, reporta UNREACHABLE a cada N ciclos (sem pingar)
+    SUPPRESSED_REPORT_EVERY = 6
+    # ping do Linux aceita -W fracionário (None = consulta a versão do iputils no primeiro uso)
+    fractional_wait: Optional[bool] = None
+    
+    def __init__(self, ip: str, interval: int = 5, callback: Optional[Callable] = None,
+                 clock: Optional[Clock] = None, instrumentation: Optional[ProbeInstrumentation] = None,
+                 adaptive_timeout: bool = True, dependency: Optional[DependencyTracker] = None,
+                 phase_spread: bool = False, rate_limiter: Optional[RateLimiter] = None,
+                 burst: int = 1, burst_spacing: float = 0.2, neighbors: Optional[NeighborTable] = None):
         """
         Inicializa o monitor de ping
         
@@ -21,14 +127,36 @@ class PingMonitor:
             ip: IP ou hostname para monitorar
             interval: Intervalo entre pings em segundos (default: 5)
             callback: Função chamada após cada ping (recebe: dict com status, rtt_ms, timestamp, ttl, bytes, output, ip)
+            clock: Relógio usado para timestamps e esperas (None = relógio real)
+            instrumentation: Coletor de durações por etapa (None = sem instrumentação)
+            adaptive_timeout: Calcula o timeout pelo histórico de RTT (False = sempre 5 segundos)
+            dependency: Topologia de pais; com o pai fora do ar o alvo não é pingado (status UNREACHABLE)
+            phase_spread: Pinga em horários fixos do relógio com fase pelo hash do alvo (evita pings em rajada)
+            rate_limiter: Limitador central de pings por segundo (None = sem limite)
+            burst: Ecos por ciclo, enviados por um único processo de ping (default: 1)
+            burst_spacing: Espaçamento entre os ecos da rajada em segundos (Windows usa sempre 1 s)
+            neighbors: Tabela de vizinhos do kernel; vizinho REACHABLE dispensa o ping (None = sempre pinga)
         """
         self.ip = ip
         self.interval = interval
         self.callback = callback
+        self.clock = clock or Clock()
+        self.instrumentation = instrumentation
+        self.timeout_estimator = TimeoutEstimator() if adaptive_timeout else None
+        self.dependency = dependency
+        self._suppressed_cycles = 0
+        self.phase_spread = phase_spread
+        self._next_slot: Optional[float] = None  # Próximo horário (epoch) do ping com fase
+        self.rate_limiter = rate_limiter
+        self.burst = max(1, int(burst))
+        self.burst_spacing = burst_spacing
+        self.neighbors = neighbors
         self.is_running = False
         self.is_paused = False
         self.thread = None
         self._stop_event = threading.Event()
+        self._process = None  # Processo de ping em andamento (para cancelamento)
+        self._process_lock = threading.Lock()
         
     def _ping(self) -> Dict:
         """
@@ -37,94 +165,63 @@ class PingMonitor:
         Returns:
             Dicionário com: status, rtt_ms, timestamp, ttl, bytes, output
         """
-        timestamp = datetime.now().isoformat()
+        timestamp = self.clock.now().isoformat()
         system = platform.system().lower()
+        inst = self.instrumentation
+        
+        timeout = self.timeout_estimator.timeout() if self.timeout_estimator else self.DEFAULT_TIMEOUT
         
         try:
-            if system == 'windows':
-                # Windows: ping -n 1 -w timeout_ms (aumentado para 5000ms = 5 segundos)
-                cmd = ['ping', '-n', '1', '-w', '5000', self.ip]
-            else:
-                # Linux/Mac: ping -c 1 -W timeout_sec (aumentado para 5 segundos)
-                cmd = ['ping', '-c', '1', '-W', '5', self.ip]
+            cmd = self._build_command(system, timeout)
             
-            # Configuração para evitar que o CMD apareça no Windows
+            # Saída capturada em bytes e decodificada depois (etapas medidas separadamente)
             kwargs = {
-                'capture_output': True,
-                'text': True,
-                'encoding': 'utf-8',
-                'errors': 'ignore',
-                'timeout': 10  # Aumenta timeout para dar mais tempo
+                'stdout': subprocess.PIPE,
+                'stderr': subprocess.PIPE,
             }
             
             # No Windows, usa CREATE_NO_WINDOW para evitar que o CMD apareça
             if system == 'windows':
                 kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
             
-            result = subprocess.run(cmd, **kwargs)
+            started = time.perf_counter()
+            with self._process_lock:
+                # Não inicia processo novo se o monitor já foi parado
+                if self._stop_event.is_set():
+                    raise RuntimeError('Monitor parado')
+                process = subprocess.Popen(cmd, **kwargs)
+                self._process = process
+            spawned = time.perf_counter()
+            try:
+                stdout, stderr = process.communicate(timeout=self._deadline(system, timeout))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+            finally:
+                with self._process_lock:
+                    self._process = None
+            waited = time.perf_counter()
             
             # Parse do resultado
-            output_text = (result.stdout or '') + (result.stderr or '')
-            output_lower = output_text.lower()
-            
-            # Verifica se houve resposta (mais confiável que apenas returncode)
-            # Windows: "Reply from" ou "Resposta de"
-            # Linux: "64 bytes from"
-            has_reply = (
-                'reply from' in output_lower or 
-                'resposta de' in output_lower or
-                'bytes from' in output_lower or
-                'icmp_seq' in output_lower
-            )
+            output_text = (stdout or b'').decode('utf-8', errors='ignore') + (stderr or b'').decode('utf-8', errors='ignore')
+            decoded = time.perf_counter()
             
-            # Verifica se é timeout no output
-            is_timeout = (
-                'timeout' in output_lower or 
-                'tempo esgotado' in output_lower or 
-                'request timed out' in output_lower or
-                'timed out' in output_lower
-            )
+            result = self._parse_output(output_text, system, process.returncode, timestamp)
+            if self.burst > 1:
+                self._apply_burst_stats(result, output_text, system)
+            self._update_timeout(result)
             
-            # Se tem resposta, é OK (independente do returncode em alguns casos)
-            if has_reply:
-                # Extrair informações detalhadas
-                rtt = self._extract_rtt(output_text, system)
-                ttl = self._extract_ttl(output_text, system)
-                bytes_size = self._extract_bytes(output_text, system)
-                
-                return {
-                    'status': 'OK',
-                    'rtt_ms': rtt if rtt else 0.0,
-                    'timestamp': timestamp,
-                    'ttl': ttl,
-                    'bytes': bytes_size,
-                    'output': output_text,
-                    'ip': self.ip
-                }
-            elif is_timeout:
-                # Timeout confirmado
-                return {
-                    'status': 'TIMEOUT',
-                    'rtt_ms': None,
-                    'timestamp': timestamp,
-                    'ttl': None,
-                    'bytes': None,
-                    'output': output_text,
-                    'ip': self.ip
-                }
-            else:
-                # Outro tipo de erro
-                return {
-                    'status': 'ERROR',
-                    'rtt_ms': None,
-                    'timestamp': timestamp,
-                    'ttl': None,
-                    'bytes': None,
-                    'output': output_text if output_text else f'Returncode: {result.returncode}',
-                    'ip': self.ip
-                }
+            if inst:
+                inst.record('spawn', spawned - started)
+                inst.record('wait', waited - spawned)
+                inst.record('decode', decoded - waited)
+                inst.record('parse', time.perf_counter() - decoded)
+            return result
                     
         except subprocess.TimeoutExpired:
+            if self.timeout_estimator:
+                self.timeout_estimator.on_timeout()
             return {
                 'status': 'TIMEOUT',
                 'rtt_ms': None,
@@ -146,6 +243,173 @@ class PingMonitor:
                 'ip': self.ip
             }
     
+    def _build_command(self, system: str, timeout: float) -> List[str]:
+        """
+        Monta o comando de ping com o timeout de resposta
+        
+        Args:
+            system: Sistema operacional (platform.system().lower())
+            timeout: Timeout de resposta em segundos
+            
+        Returns:
+            Lista de argumentos do comando
+        """
+        count = str(self.burst)
+        if system == 'windows':
+            # Windows: ping -n N -w timeout_ms (espaçamento fixo de 1 s entre ecos)
+            return ['ping', '-n', count, '-w', str(max(1, int(round(timeout * 1000)))), self.ip]
+        spacing = ['-i', f'{self.burst_spacing:g}'] if self.burst > 1 else []
+        if system == 'darwin':
+            # Mac: ping -c N [-i espaçamento] -W timeout_ms
+            return ['ping', '-c', count] + spacing + ['-W', str(max(1, int(round(timeout * 1000)))), self.ip]
+        else:
+            # Linux: ping -c N [-i espaçamento] -W timeout_sec (frações só no iputils >= 20190324;
+            # versões antigas recusam o valor, então o timeout é arredondado para cima)
+            wait = f'{timeout:.3f}'.rstrip('0').rstrip('.')
+            if '.' in wait and not self._fractional_wait():
+                wait = str(math.ceil(timeout))
+            return ['ping', '-c', count] + spacing + ['-W', wait, self.ip]
+    
+    def _fractional_wait(self) -> bool:
+        """Indica se o ping do Linux aceita -W fracionário (versão consultada uma vez por processo)"""
+        if self.fractional_wait is None:
+            PingMonitor.fractional_wait = (iputils_version() or 0) >= IPUTILS_FRACTIONAL_WAIT
+        return self.fractional_wait
+    
+    def _burst_span(self, system: str) -> float:
+        """Duração do envio da rajada em segundos (0 para um único eco)"""
+        spacing = 1.0 if system == 'windows' else self.burst_spacing
+        return (self.burst - 1) * spacing
+    
+    def _deadline(self, system: str, timeout: float) -> float:
+        """
+        Tempo máximo de espera pelo processo de ping
+        
+        Cobre o pior caso da rajada, com todos os ecos esgotando o timeout (no Windows,
+        -n N -w ms leva cerca de N x timeout), mais a margem para o spawn do processo
+        (um único eco com timeout de 5 s -> 10 s, como antes).
+        
+        Args:
+            system: Sistema operacional (platform.system().lower())
+            timeout: Timeout de resposta de cada eco em segundos
+        """
+        return self.burst * timeout + max(1.0, timeout) + self._burst_span(system)
+    
+    def _apply_burst_stats(self, result: Dict, output: str, system: str):
+        """
+        Agrega os ecos da rajada no resultado do ciclo
+        
+        Adiciona sent, received, loss_pct, rtt_min, rtt_avg, rtt_max e rtt_mdev; com
+        pelo menos uma resposta o status é OK e rtt_ms passa a ser a média. Sem nenhuma
+        resposta com tempo (ex: só "Destination host unreachable", que casa com
+        "reply from") o ciclo é TIMEOUT.
+        
+        Args:
+            result: Resultado do _parse_output (alterado no lugar)
+            output: Saída do comando ping
+            system: Sistema operacional (platform.system().lower())
+        """
+        stats = parse_burst_stats(output, system, self.burst)
+        result.update(stats)
+        if result['status'] != 'OK':
+            return
+        if stats['received']:
+            result['rtt_ms'] = stats['rtt_avg']
+        else:
+            result.update({'status': 'TIMEOUT', 'rtt_ms': None, 'ttl': None, 'bytes': None})
+    
+    def _update_timeout(self, result: Dict):
+        """Atualiza o timeout adaptativo com o resultado de um ping"""
+        if not self.timeout_estimator:
+            return
+        if result['status'] == 'OK' and result['rtt_ms'] is not None:
+            self.timeout_estimator.observe(result['rtt_ms'] / 1000.0)
+        elif result['status'] == 'TIMEOUT' or self._is_lost(result):
+            self.timeout_estimator.on_timeout()
+    
+    @staticmethod
+    def _is_lost(result: Dict) -> bool:
+        """
+        Indica se um ERROR foi só perda do eco (o ping do Linux não imprime "timeout":
+        termina com "1 packets transmitted, 0 received, 100% packet loss")
+        """
+        if result['status'] != 'ERROR':
+            return False
+        return re.search(r'\b100(?:\.0+)?%\s*(?:packet\s+)?loss', result.get('output') or '',
+                         re.IGNORECASE) is not None
+    
+    def _parse_output(self, output_text: str, system: str, returncode: int, timestamp: str) -> Dict:
+        """
+        Interpreta a saída do comando ping
+        
+        Args:
+            output_text: Saída (stdout + stderr) decodificada
+            system: Sistema operacional (platform.system().lower())
+            returncode: Código de retorno do processo
+            timestamp: Timestamp ISO 8601 do ping
+            
+        Returns:
+            Dicionário com: status, rtt_ms, timestamp, ttl, bytes, output, ip
+        """
+        output_lower = output_text.lower()
+        
+        # Verifica se houve resposta (mais confiável que apenas returncode)
+        # Windows: "Reply from" ou "Resposta de"
+        # Linux: "64 bytes from"
+        has_reply = (
+            'reply from' in output_lower or 
+            'resposta de' in output_lower or
+            'bytes from' in output_lower or
+            'icmp_seq' in output_lower
+        )
+        
+        # Verifica se é timeout no output
+        is_timeout = (
+            'timeout' in output_lower or 
+            'tempo esgotado' in output_lower or 
+            'request timed out' in output_lower or
+            'timed out' in output_lower
+        )
+        
+        # Se tem resposta, é OK (independente do returncode em alguns casos)
+        if has_reply:
+            # Extrair informações detalhadas
+            rtt = self._extract_rtt(output_text, system)
+            ttl = self._extract_ttl(output_text, system)
+            bytes_size = self._extract_bytes(output_text, system)
+            
+            return {
+                'status': 'OK',
+                'rtt_ms': rtt if rtt else 0.0,
+                'timestamp': timestamp,
+                'ttl': ttl,
+                'bytes': bytes_size,
+                'output': output_text,
+                'ip': self.ip
+            }
+        elif is_timeout:
+            # Timeout confirmado
+            return {
+                'status': 'TIMEOUT',
+                'rtt_ms': None,
+                'timestamp': timestamp,
+                'ttl': None,
+                'bytes': None,
+                'output': output_text,
+                'ip': self.ip
+            }
+        else:
+            # Outro tipo de erro
+            return {
+                'status': 'ERROR',
+                'rtt_ms': None,
+                'timestamp': timestamp,
+                'ttl': None,
+                'bytes': None,
+                'output': output_text if output_text else f'Returncode: {returncode}',
+                'ip': self.ip
+            }
+    
     def _extract_ttl(self, output: str, system: str) -> Optional[int]:
         """Extrai o TTL (Time To Live) do output do ping"""
         try:
@@ -266,32 +530,135 @@ class PingMonitor:
         except (ValueError, IndexError):
             return None
     
+    def _delay_to_next_slot(self) -> float:
+        """
+        Calcula a espera até o próximo horário do alvo na grade do relógio
+        
+        Os horários são offset + k * interval (em tempo de relógio), então o ritmo não
+        deriva com a duração dos pings; horários perdidos (ping lento) são pulados. Se o
+        relógio voltar (NTP, ajuste manual), o próximo horário é recalculado na grade a
+        partir de agora, então a espera nunca passa de um intervalo.
+        
+        Returns:
+            Espera em segundos
+        """
+        now = self.clock.now().timestamp()
+        if self._next_slot is not None:
+            self._next_slot += self.interval
+            if self._next_slot <= now:
+                missed = math.floor((now - self._next_slot) / self.interval) + 1
+                self._next_slot += missed * self.interval
+        # Margem de 1 ms: logo após um ping instantâneo o próximo horário fica a um intervalo exato
+        if self._next_slot is None or self._next_slot - now > self.interval + 0.001:
+            offset = phase_offset(self.ip, self.interval)
+            self._next_slot = now + (offset - now) % self.interval
+        return min(max(0.0, self._next_slot - now), self.interval)
+    
+    def _next_result(self) -> Optional[Dict]:
+        """
+        Executa o ping do ciclo, ou suprime se um pai do alvo está fora do ar
+        
+        Com a tabela de vizinhos, hosts do segmento local confirmados pelo kernel não são
+        pingados; o ping ativo só confirma os que estão STALE, FAILED ou fora da tabela.
+        
+        Returns:
+            Resultado do ciclo, ou None se não há nada a reportar
+        """
+        parent = self.dependency.blocking_parent(self.ip) if self.dependency else None
+        if parent is None:
+            self._suppressed_cycles = 0
+            # Vizinho confirmado pelo kernel: resultado passivo, sem enviar pacotes
+            if self.neighbors:
+                passive = self.neighbors.lookup(self.ip)
+                if passive:
+                    return passive
+            # Aguarda a vez no limitador (False = monitor parado durante a espera)
+            if self.rate_limiter and not self.rate_limiter.acquire(self.ip, self._stop_event, tokens=self.burst):
+                return None
+            return self._ping()
+        
+        # Pai fora do ar: não pinga; reporta ao entrar na supressão e depois periodicamente
+        report = self._suppressed_cycles % self.SUPPRESSED_REPORT_EVERY == 0
+        self._suppressed_cycles += 1
+        if not report:
+            return None
+        return {
+            'status': 'UNREACHABLE',
+            'rtt_ms': None,
+            'timestamp': self.clock.now().isoformat(),
+            'ttl': None,
+            'bytes': None,
+            'output': f'Inacessível via pai {parent}',
+            'ip': self.ip,
+            'parent': parent
+        }
+    
+    def _deliver(self, ping_result: Dict):
+        """Entrega o resultado ao callback"""
+        if not self.callback:
+            return
+        if self.instrumentation:
+            started = time.perf_counter()
+            self.callback(ping_result)
+            self.instrumentation.record('callback', time.perf_counter() - started)
+        else:
+            self.callback(ping_result)
+    
     def _monitor_loop(self):
         """Loop principal de monitoramento"""
-        while self.is_running and not self._stop_event.is_set():
-            if not self.is_paused:
-                ping_result = self._ping()
-                if self.callback:
-                    self.callback(ping_result)
-            
-            # Aguarda o intervalo (ou até ser interrompido)
-            self._stop_event.wait(self.interval)
+        try:
+            if self.phase_spread:
+                # Aguarda a fase do alvo antes do primeiro ping
+                self.clock.wait(self._stop_event, self._delay_to_next_slot())
+            while self.is_running and not self._stop_event.is_set():
+                if not self.is_paused:
+                    ping_result = self._next_result()
+                    # Resultado de um ping cancelado pelo stop() é descartado
+                    if self._stop_event.is_set():
+                        break
+                    if ping_result is not None:
+                        self._deliver(ping_result)
+                
+                # Aguarda o intervalo (ou até ser interrompido)
+                if self.phase_spread:
+                    self.clock.wait(self._stop_event, self._delay_to_next_slot())
+                else:
+                    self.clock.wait(self._stop_event, self.interval)
+        finally:
+            self.clock.detach()
     
     def start(self):
         """Inicia o monitoramento"""
         if not self.is_running:
             self.is_running = True
             self.is_paused = False
+            self._next_slot = None
             self._stop_event.clear()
             self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
+            self.clock.attach(self.thread)
             self.thread.start()
     
-    def stop(self):
-        """Para o monitoramento"""
+    def request_stop(self):
+        """Sinaliza a parada sem aguardar a thread (mata o ping em andamento)"""
         self.is_running = False
-        self._stop_event.set()
-        if self.thread:
-            self.thread.join(timeout=2)
+        with self._process_lock:
+            self._stop_event.set()
+            process = self._process
+        if process and process.poll() is None:
+            try:
+                process.kill()
+            except OSError:
+                pass  # Processo já terminou
+    
+    def join(self, timeout: Optional[float] = None):
+        """Aguarda a thread de monitoramento terminar"""
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+    
+    def stop(self, timeout: float = 2):
+        """Para o monitoramento"""
+        self.request_stop()
+        self.join(timeout)
     
     def pause(self):
         """Pausa o monitoramento"""
@@ -310,3 +677,22 @@ class PingMonitor:
             self.pause()
             return True  # Agora está pausado
 
+
+def stop_all(monitors, timeout: float = 0.1):
+    """
+    Para vários monitores ao mesmo tempo
+    
+    Sinaliza todos primeiro (matando os pings em andamento) e só depois aguarda,
+    dividindo um único prazo entre todos, então o tempo total não cresce com a
+    quantidade de monitores.
+    
+    Args:
+        monitors: Monitores a parar (qualquer objeto com request_stop() e join())
+        timeout: Tempo máximo total de espera em segundos
+    """
+    monitors = [m for m in monitors if m is not None]
+    for monitor in monitors:
+        monitor.request_stop()
+    deadline = time.monotonic() + timeout
+    for monitor in monitors:
+        monitor.join(max(0.0, deadline - time.monotonic()))
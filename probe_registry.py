@@ -0,0 +1,196 @@
+"""
+Registro compartilhado de alvos monitorados
+Executa um único fluxo de pings por (endereço, intervalo) e distribui os resultados
+para todos os assinantes (painéis, varreduras, exportadores), com contagem de referências
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from http_probe import HTTPMonitor, HTTPProbe, is_http_target
+from ping_monitor import PingMonitor
+from tcp_probe import TCPMonitor, TCPProbeEngine, parse_tcp_target
+
+
+class Subscription:
+    """Assinatura de um consumidor em um fluxo de pings (mesma interface do PingMonitor)"""
+
+    def __init__(self, registry: 'ProbeRegistry', key: Tuple[str, int], callback: Optional[Callable], monitor):
+        self.registry = registry
+        self.key = key
+        self.ip, self.interval = key
+        self.callback = callback
+        self.monitor = monitor
+        self.is_running = True
+        self.is_paused = False
+
+    def pause(self):
+        """Pausa a entrega de resultados para este assinante"""
+        self.is_paused = True
+        self.registry._update_pause(self.key)
+
+    def resume(self):
+        """Retoma a entrega de resultados para este assinante"""
+        self.is_paused = False
+        self.registry._update_pause(self.key)
+
+    def toggle_pause(self):
+        """Alterna entre pausado e ativo"""
+        if self.is_paused:
+            self.resume()
+            return False  # Agora está ativo (não pausado)
+        else:
+            self.pause()
+            return True  # Agora está pausado
+
+    def request_stop(self):
+        """Cancela a assinatura (o fluxo para quando não houver mais assinantes)"""
+        if self.is_running:
+            self.is_running = False
+            self.registry.unsubscribe(self)
+
+    def join(self, timeout: Optional[float] = None):
+        """Aguarda o fluxo terminar, se esta era a última assinatura"""
+        if self.registry.get_monitor(self.key) is not self.monitor:
+            self.monitor.join(timeout)
+
+    def stop(self, timeout: float = 2):
+        """Cancela a assinatura"""
+        self.request_stop()
+        self.join(timeout)
+
+
+class _Stream:
+    """Fluxo de pings compartilhado por um ou mais assinantes"""
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+        self.subscribers: List[Subscription] = []
+
+
+class ProbeRegistry:
+    """Registro de fluxos de pings com deduplicação por (endereço, intervalo)"""
+
+    def __init__(self, monitor_factory: Optional[Callable] = None,
+                 tcp_engine: Optional[TCPProbeEngine] = None, http_probe: Optional[HTTPProbe] = None,
+                 sharded_engine=None, **monitor_kwargs):
+        """
+        Inicializa o registro
+
+        Args:
+            monitor_factory: Cria o monitor de um fluxo: factory(ip, interval, callback, **monitor_kwargs)
+                             (None = PingMonitor, TCPMonitor para host:porta, HTTPMonitor para URLs)
+            tcp_engine: Motor compartilhado pelos alvos host:porta (None = criado no primeiro uso)
+            http_probe: Probe HTTP (e pool keep-alive) compartilhado pelas URLs (None = criado no primeiro uso)
+            sharded_engine: ShardedProbeEngine que executa os pings ICMP em outros processos (None = threads locais)
+            **monitor_kwargs: Argumentos extras repassados ao monitor (clock, instrumentation, ...)
+        """
+        self.monitor_factory = monitor_factory or self._create_monitor
+        self.monitor_kwargs = monitor_kwargs
+        self.tcp_engine = tcp_engine
+        self.http_probe = http_probe
+        self.sharded_engine = sharded_engine
+        self._lock = threading.Lock()
+        self._streams: Dict[Tuple[str, int], _Stream] = {}
+        self._observers: List[Callable] = []
+
+    def _create_monitor(self, ip: str, interval: int, callback: Callable, **monitor_kwargs):
+        """Cria um HTTPMonitor para URLs, um TCPMonitor para host:porta e um PingMonitor para os demais"""
+        if is_http_target(ip):
+            if self.http_probe is None:
+                self.http_probe = HTTPProbe(clock=monitor_kwargs.get('clock'))
+            return HTTPMonitor(ip, interval, callback, probe=self.http_probe, **monitor_kwargs)
+        if parse_tcp_target(ip) is None:
+            if self.sharded_engine:
+                return self.sharded_engine.create_monitor(ip, interval, callback)
+            return PingMonitor(ip, interval, callback, **monitor_kwargs)
+        if self.tcp_engine is None:
+            self.tcp_engine = TCPProbeEngine(clock=monitor_kwargs.get('clock'))
+        return TCPMonitor(ip, interval, callback, engine=self.tcp_engine)
+
+    def add_observer(self, observer: Callable):
+        """
+        Adiciona um observador que recebe todos os resultados de todos os fluxos
+
+        Args:
+            observer: Função chamada uma vez por ping (recebe o dict do resultado)
+        """
+        self._observers.append(observer)
+
+    def subscribe(self, ip: str, interval: int, callback: Optional[Callable]) -> Subscription:
+        """
+        Assina o fluxo de pings de um alvo (cria o fluxo se ainda não existir)
+
+        Args:
+            ip: IP ou hostname
+            interval: Intervalo entre pings em segundos
+            callback: Função chamada a cada resultado
+
+        Returns:
+            Assinatura (use stop() para cancelar)
+        """
+        key = (ip.strip(), interval)
+        with self._lock:
+            stream = self._streams.get(key)
+            created = stream is None
+            if created:
+                monitor = self.monitor_factory(key[0], interval, lambda result: self._dispatch(key, result),
+                                               **self.monitor_kwargs)
+                stream = self._streams[key] = _Stream(monitor)
+            subscription = Subscription(self, key, callback, stream.monitor)
+            stream.subscribers.append(subscription)
+            stream.monitor.is_paused = False
+        if created:
+            stream.monitor.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove uma assinatura (para o fluxo se era a última)"""
+        with self._lock:
+            stream = self._streams.get(subscription.key)
+            if stream is None or subscription not in stream.subscribers:
+                return
+            stream.subscribers.remove(subscription)
+            if stream.subscribers:
+                self._update_pause_locked(stream)
+                return
+            del self._streams[subscription.key]
+        stream.monitor.request_stop()
+
+    def get_monitor(self, key: Tuple[str, int]):
+        """Retorna o monitor ativo de um fluxo (None se não existir)"""
+        with self._lock:
+            stream = self._streams.get(key)
+            return stream.monitor if stream else None
+
+    def stream_count(self) -> int:
+        """Retorna a quantidade de fluxos de pings ativos"""
+        with self._lock:
+            return len(self._streams)
+
+    def subscriber_count(self, ip: Optional[str] = None) -> int:
+        """Retorna a quantidade de assinaturas (de um IP ou de todos)"""
+        with self._lock:
+            return sum(len(stream.subscribers) for (stream_ip, _), stream in self._streams.items()
+                       if ip is None or stream_ip == ip)
+
+    def _update_pause(self, key: Tuple[str, int]):
+        """Pausa o fluxo somente quando todos os assinantes estão pausados"""
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream:
+                self._update_pause_locked(stream)
+
+    def _update_pause_locked(self, stream: _Stream):
+        stream.monitor.is_paused = all(sub.is_paused for sub in stream.subscribers)
+
+    def _dispatch(self, key: Tuple[str, int], ping_result: Dict):
+        """Entrega um resultado aos observadores e aos assinantes do fluxo"""
+        for observer in self._observers:
+            observer(ping_result)
+        with self._lock:
+            stream = self._streams.get(key)
+            subscribers = list(stream.subscribers) if stream else []
+        for subscription in subscribers:
+            if subscription.callback and not subscription.is_paused:
+                # Cada assinante recebe sua própria cópia (os painéis alteram o dict)
+                subscription.callback(dict(ping_result))
@@ -0,0 +1,224 @@
+"""
+Limitador global de pings (ICMP) com token buckets por sub-rede/gateway
+Evita que roteadores e firewalls descartem pings por excesso de taxa (falsos TIMEOUT)
+"""
+import ipaddress
+import itertools
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from clock import Clock
+
+
+class TokenBucket:
+    """Token bucket clássico: `rate` tokens por segundo, acumulando até `burst`"""
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = now
+
+    def refill(self, now: float):
+        """Repõe os tokens acumulados desde a última atualização"""
+        if now > self.last:
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+    def time_until(self, tokens: float) -> float:
+        """Tempo até haver `tokens` disponíveis (após refill)"""
+        missing = tokens - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+
+class _Waiter:
+    """Ping aguardando tokens"""
+
+    __slots__ = ('seq', 'key', 'tokens')
+
+    def __init__(self, seq: int, key: str, tokens: float):
+        self.seq = seq
+        self.key = key
+        self.tokens = tokens
+
+
+class RateLimiter:
+    """
+    Limitador central na frente dos backends de ping
+
+    Cada ping precisa de tokens do bucket global e do bucket da sua sub-rede (ou
+    gateway). Os pings de uma mesma sub-rede saem em ordem de chegada, e os tokens
+    globais vão para o ping mais antigo entre as sub-redes que podem ser atendidas,
+    então uma sub-rede limitada não bloqueia as outras.
+    """
+
+    # Espera máxima entre verificações (a ordem da fila pode mudar enquanto espera)
+    MAX_POLL = 0.05
+
+    def __init__(self, global_rate: float = 100.0, subnet_rate: float = 20.0,
+                 global_burst: Optional[float] = None, subnet_burst: Optional[float] = None,
+                 prefix_len: int = 24, key_func: Optional[Callable[[str], Optional[str]]] = None,
+                 clock: Optional[Clock] = None):
+        """
+        Inicializa o limitador
+
+        Args:
+            global_rate: Pings por segundo no total
+            subnet_rate: Pings por segundo por sub-rede/gateway
+            global_burst: Rajada máxima global (None = 1 segundo de taxa)
+            subnet_burst: Rajada máxima por sub-rede (None = 1 segundo de taxa)
+            prefix_len: Prefixo usado para agrupar IPv4 em sub-redes (default: /24)
+            key_func: Retorna a chave do bucket de um alvo (ex: gateway); None = usa a sub-rede
+            clock: Relógio usado para repor os tokens e aguardar (None = relógio real)
+        """
+        self.global_rate = global_rate
+        self.subnet_rate = subnet_rate
+        self.global_burst = global_burst or global_rate
+        self.subnet_burst = subnet_burst or subnet_rate
+        self.prefix_len = prefix_len
+        self.key_func = key_func
+        self.clock = clock or Clock()
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._global = TokenBucket(global_rate, self.global_burst, self.clock.monotonic())
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._queues: Dict[str, deque] = {}
+        self._waiting = 0
+        self.acquired = 0
+        self.deferred = 0
+        self.deferred_by_key: Dict[str, int] = {}
+        self.wait_seconds = 0.0
+
+    def key_for(self, target: str) -> str:
+        """
+        Retorna a chave do bucket de um alvo
+
+        Args:
+            target: IP ou hostname
+
+        Returns:
+            'gw:<gateway>' se key_func indicar, senão a sub-rede do IP, senão 'host:<nome>'
+        """
+        if self.key_func:
+            key = self.key_func(target)
+            if key:
+                return f'gw:{key}'
+        try:
+            address = ipaddress.ip_address(target)
+        except ValueError:
+            return f'host:{target}'
+        prefix = self.prefix_len if address.version == 4 else 64
+        return str(ipaddress.ip_network(f'{address}/{prefix}', strict=False))
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.subnet_rate, self.subnet_burst, now)
+        return bucket
+
+    def _try_take(self, waiter: _Waiter, now: float) -> float:
+        """
+        Tenta consumir os tokens do ping (com o lock adquirido)
+
+        Returns:
+            0 se conseguiu, senão a espera estimada em segundos
+        """
+        queue = self._queues[waiter.key]
+        if queue[0] is not waiter:
+            return self.MAX_POLL  # Pings mais antigos da mesma sub-rede saem primeiro
+
+        bucket = self._bucket(waiter.key, now)
+        bucket.refill(now)
+        self._global.refill(now)
+        if bucket.tokens < waiter.tokens:
+            return bucket.time_until(waiter.tokens)
+
+        # Tokens globais vão primeiro para os pings mais antigos entre as sub-redes que podem sair
+        reserved = 0.0
+        for key, other_queue in self._queues.items():
+            head = other_queue[0]
+            if head.seq < waiter.seq:
+                other_bucket = self._bucket(key, now)
+                other_bucket.refill(now)
+                if other_bucket.tokens >= head.tokens:
+                    reserved += head.tokens
+        if self._global.tokens - reserved < waiter.tokens:
+            if reserved:
+                return self.MAX_POLL
+            return self._global.time_until(waiter.tokens)
+
+        bucket.tokens -= waiter.tokens
+        self._global.tokens -= waiter.tokens
+        queue.popleft()
+        if not queue:
+            del self._queues[waiter.key]
+        return 0.0
+
+    def _leave(self, waiter: _Waiter):
+        """Remove um ping da fila (com o lock adquirido)"""
+        queue = self._queues.get(waiter.key)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del self._queues[waiter.key]
+
+    def acquire(self, target: str, stop_event: Optional[threading.Event] = None, tokens: int = 1) -> bool:
+        """
+        Aguarda permissão para enviar pacotes a um alvo
+
+        Args:
+            target: IP ou hostname
+            stop_event: Evento que cancela a espera (ex: monitor parado)
+            tokens: Quantidade de pacotes (limitada à rajada máxima)
+
+        Returns:
+            True se liberado, False se cancelado pelo stop_event
+        """
+        stop_event = stop_event or threading.Event()
+        key = self.key_for(target)
+        tokens = min(tokens, self.subnet_burst, self.global_burst)
+        with self._lock:
+            waiter = _Waiter(next(self._seq), key, tokens)
+            self._queues.setdefault(key, deque()).append(waiter)
+            start = self.clock.monotonic()
+            delay = self._try_take(waiter, start)
+            if delay == 0.0:
+                self.acquired += 1
+                return True
+            self.deferred += 1
+            self.deferred_by_key[key] = self.deferred_by_key.get(key, 0) + 1
+            self._waiting += 1
+
+        try:
+            while True:
+                if self.clock.wait(stop_event, min(max(delay, 0.001), self.MAX_POLL)):
+                    with self._lock:
+                        self._leave(waiter)
+                    return False
+                with self._lock:
+                    now = self.clock.monotonic()
+                    delay = self._try_take(waiter, now)
+                    if delay == 0.0:
+                        self.acquired += 1
+                        self.wait_seconds += now - start
+                        return True
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def queue_depth(self) -> int:
+        """Retorna a quantidade de pings aguardando tokens"""
+        with self._lock:
+            return self._waiting
+
+    def stats(self) -> Dict:
+        """Retorna os contadores do limitador"""
+        with self._lock:
+            return {
+                'acquired': self.acquired,
+                'deferred': self.deferred,
+                'waiting': self._waiting,
+                'wait_seconds': self.wait_seconds,
+                'deferred_by_key': dict(self.deferred_by_key),
+            }
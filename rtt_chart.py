@@ -0,0 +1,340 @@
+"""
+Gráfico de RTT e perda por alvo (Canvas)
+A série fica numa pirâmide de mínimos/máximos atualizada a cada amostra, então o desenho
+consulta só O(largura em pixels) agregados, com qualquer zoom e milhões de pontos por trás
+"""
+import math
+import tkinter as tk
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+
+# Amostras de um agregado em relação ao nível anterior
+FANOUT = 8
+# Até este número de amostras visíveis o desenho usa LTTB sobre os pontos brutos
+LTTB_LIMIT = 5000
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets: escolhe os pontos que preservam a forma da série
+
+    Args:
+        xs: Tempos (crescentes)
+        ys: Valores (sem NaN)
+        threshold: Quantidade de pontos desejada
+
+    Returns:
+        Índices dos pontos escolhidos (inclui o primeiro e o último)
+    """
+    count = len(xs)
+    if threshold >= count or threshold < 3:
+        return list(range(count))
+    selected = [0]
+    bucket_size = (count - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        # Média do próximo balde (o último ponto quando não há próximo balde)
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, count)
+        if next_start >= next_end:
+            avg_x, avg_y = xs[count - 1], ys[count - 1]
+        else:
+            span = next_end - next_start
+            avg_x = sum(xs[next_start:next_end]) / span
+            avg_y = sum(ys[next_start:next_end]) / span
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, min(end, count - 1)):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(count - 1)
+    return selected
+
+
+class MinMaxPyramid:
+    """Série (tempo, RTT) com agregados de mínimo/máximo/perda em níveis de FANOUT^n amostras"""
+
+    def __init__(self):
+        """Inicializa a série vazia (RTT NaN = perda)"""
+        self.times = array('d')
+        self.values = array('d')
+        # levels[n] = (mínimos, máximos, perdas) de blocos de FANOUT^(n+1) amostras
+        self.levels: List[Tuple[array, array, array]] = []
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def append(self, timestamp: float, rtt_ms: Optional[float]):
+        """
+        Acrescenta uma amostra (tempos crescentes), atualizando os agregados em O(níveis)
+
+        Args:
+            timestamp: Tempo em segundos (época)
+            rtt_ms: RTT em ms (None = perda)
+        """
+        value = math.nan if rtt_ms is None else rtt_ms
+        index = len(self.times)
+        self.times.append(timestamp)
+        self.values.append(value)
+        lost = value != value
+        size = FANOUT
+        level = 0
+        while True:
+            if level == len(self.levels):
+                if level and index < size // FANOUT:
+                    break  # Ainda cabe num único bloco do nível anterior
+                if level:
+                    # O primeiro bloco do novo nível começa igual ao bloco completo do nível anterior
+                    mins, maxs, losses = self.levels[level - 1]
+                    self.levels.append((array('d', mins[:1]), array('d', maxs[:1]), array('L', losses[:1])))
+                else:
+                    self.levels.append((array('d'), array('d'), array('L')))
+            mins, maxs, losses = self.levels[level]
+            block = index // size
+            if block == len(mins):
+                mins.append(math.inf if lost else value)
+                maxs.append(-math.inf if lost else value)
+                losses.append(1 if lost else 0)
+            elif lost:
+                losses[block] += 1
+            else:
+                if value < mins[block]:
+                    mins[block] = value
+                if value > maxs[block]:
+                    maxs[block] = value
+            size *= FANOUT
+            level += 1
+
+    def index_at(self, timestamp: float) -> int:
+        """Retorna o índice da primeira amostra com tempo >= timestamp"""
+        return bisect_left(self.times, timestamp)
+
+    def range_stats(self, low: int, high: int) -> Tuple[float, float, int, int]:
+        """
+        Mínimo, máximo, perdas e amostras do intervalo de índices [low, high)
+
+        Usa o maior nível cujos blocos cabem no intervalo; as bordas usam os níveis menores.
+
+        Returns:
+            (mínimo, máximo, perdas, amostras); mínimo/máximo são NaN sem RTT no intervalo
+        """
+        high = min(high, len(self.values))
+        low = max(low, 0)
+        minimum, maximum, lost = math.inf, -math.inf, 0
+        level = len(self.levels) - 1
+        position = low
+        while position < high:
+            # Maior bloco alinhado em position que cabe em [position, high)
+            while level >= 0:
+                size = FANOUT ** (level + 1)
+                if position % size == 0 and position + size <= high:
+                    break
+                level -= 1
+            if level < 0:
+                value = self.values[position]
+                if value != value:
+                    lost += 1
+                else:
+                    minimum = min(minimum, value)
+                    maximum = max(maximum, value)
+                position += 1
+                level = len(self.levels) - 1
+                continue
+            mins, maxs, losses = self.levels[level]
+            block = position // size
+            minimum = min(minimum, mins[block])
+            maximum = max(maximum, maxs[block])
+            lost += losses[block]
+            position += size
+            level = len(self.levels) - 1
+        if minimum == math.inf:
+            minimum = maximum = math.nan
+        return minimum, maximum, lost, max(high - low, 0)
+
+    def columns(self, start: float, end: float, width: int) -> List[Tuple[float, float, int, int]]:
+        """
+        Agrega a janela de tempo [start, end) em `width` colunas
+
+        Returns:
+            Lista de (mínimo, máximo, perdas, amostras) por coluna
+        """
+        step = (end - start) / width
+        edges = [self.index_at(start + step * column) for column in range(width + 1)]
+        return [self.range_stats(edges[column], edges[column + 1]) for column in range(width)]
+
+
+class RTTChart:
+    """Gráfico de RTT/perda de um painel, com zoom (roda do mouse) e rolagem (arrastar)"""
+
+    PADDING = 4
+    MIN_SPAN = 10.0  # Janela mínima em segundos
+
+    def __init__(self, parent, width: int = 300, height: int = 80, span: float = 300.0,
+                 bg: str = "#000000", fg: str = "#00ff41", loss_color: str = "#ff0040",
+                 grid_color: str = "#003300"):
+        """
+        Inicializa o gráfico
+
+        Args:
+            parent: Widget pai
+            width: Largura inicial em pixels
+            height: Altura em pixels
+            span: Janela visível em segundos
+            bg, fg, loss_color, grid_color: Cores do fundo, da série, das perdas e da grade
+        """
+        self.series = MinMaxPyramid()
+        self.span = span
+        self.end: Optional[float] = None  # None = acompanha a amostra mais recente
+        self.canvas = tk.Canvas(parent, width=width, height=height, bg=bg,
+                                highlightthickness=1, highlightbackground=grid_color)
+        # Itens criados uma vez e reutilizados (coords/itemconfigure a cada desenho)
+        self._line = self.canvas.create_line(0, 0, 0, 0, fill=fg, state='hidden')
+        self._label = self.canvas.create_text(self.PADDING, self.PADDING, anchor='nw', fill=fg,
+                                              font=('Consolas', 7), text='')
+        self._loss_color = loss_color
+        self._loss_items: List[int] = []
+        self._redraw_pending = False
+        self._drag_x: Optional[int] = None
+
+        self.canvas.bind('<Configure>', lambda e: self.schedule_redraw())
+        self.canvas.bind('<MouseWheel>', lambda e: self.zoom(0.8 if e.delta > 0 else 1.25))
+        self.canvas.bind('<Button-4>', lambda e: self.zoom(0.8))
+        self.canvas.bind('<Button-5>', lambda e: self.zoom(1.25))
+        self.canvas.bind('<ButtonPress-1>', self._on_press)
+        self.canvas.bind('<B1-Motion>', self._on_drag)
+        self.canvas.bind('<Double-Button-1>', lambda e: self.follow())
+
+    def append(self, timestamp: str, rtt_ms: Optional[float]):
+        """Acrescenta uma amostra (timestamp ISO 8601; rtt_ms None = perda) e agenda o desenho"""
+        try:
+            moment = datetime.fromisoformat(timestamp).timestamp()
+        except (TypeError, ValueError):
+            return
+        if len(self.series) and moment < self.series.times[-1]:
+            return  # Fora de ordem
+        self.series.append(moment, rtt_ms)
+        if self.end is None:
+            self.schedule_redraw()
+
+    def clear(self):
+        """Descarta a série"""
+        self.series = MinMaxPyramid()
+        self.end = None
+        self.schedule_redraw()
+
+    def zoom(self, factor: float):
+        """Multiplica a janela visível (mantendo o fim)"""
+        self.span = max(self.MIN_SPAN, self.span * factor)
+        self.schedule_redraw()
+
+    def follow(self):
+        """Volta a acompanhar a amostra mais recente"""
+        self.end = None
+        self.schedule_redraw()
+
+    def _on_press(self, event):
+        self._drag_x = event.x
+
+    def _on_drag(self, event):
+        if self._drag_x is None or not len(self.series):
+            return
+        width = max(self.canvas.winfo_width() - 2 * self.PADDING, 1)
+        end = self.end if self.end is not None else self.series.times[-1]
+        end -= (event.x - self._drag_x) * self.span / width
+        self._drag_x = event.x
+        self.end = None if end >= self.series.times[-1] else end
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        """Agrupa os pedidos de desenho num único redraw quando o Tk estiver ocioso"""
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.canvas.after_idle(self.redraw)
+
+    def redraw(self):
+        """Desenha a janela visível"""
+        self._redraw_pending = False
+        canvas = self.canvas
+        width = canvas.winfo_width() - 2 * self.PADDING
+        height = canvas.winfo_height() - 2 * self.PADDING
+        if width < 2 or height < 2 or not len(self.series):
+            canvas.itemconfigure(self._line, state='hidden')
+            self._show_losses([])
+            return
+        end = self.end if self.end is not None else self.series.times[-1]
+        start = end - self.span
+        points, losses, (low_ms, high_ms) = self._visible(start, end, width)
+
+        scale = (height - 1) / (high_ms - low_ms) if high_ms > low_ms else 0.0
+        bottom = self.PADDING + height - 1
+        coords = []
+        for x, value in points:
+            coords.append(self.PADDING + x)
+            coords.append(bottom - (value - low_ms) * scale)
+        if len(coords) >= 4:
+            canvas.coords(self._line, *coords)
+            canvas.itemconfigure(self._line, state='normal')
+        else:
+            canvas.itemconfigure(self._line, state='hidden')
+        self._show_losses([self.PADDING + x for x in losses], bottom)
+        loss_count = len(losses)
+        canvas.itemconfigure(self._label, text=f"{low_ms:.1f}-{high_ms:.1f} ms | {self.span:.0f}s"
+                             + (f" | perdas: {loss_count}" if loss_count else "")
+                             + ("" if self.end is None else " | pausado"))
+
+    def _visible(self, start: float, end: float, width: int):
+        """
+        Calcula os pontos da janela: LTTB nos pontos brutos quando são poucos,
+        senão mínimo/máximo por coluna de pixel pela pirâmide
+
+        Returns:
+            (pontos [(x, rtt)], colunas x com perda, (menor rtt, maior rtt))
+        """
+        series = self.series
+        low, high = series.index_at(start), series.index_at(end + 1e-9)
+        step = (end - start) / width
+        points, losses = [], []
+        if high - low <= LTTB_LIMIT:
+            xs, ys = [], []
+            for index in range(low, high):
+                value = series.values[index]
+                x = (series.times[index] - start) / step
+                if value != value:
+                    if not losses or losses[-1] != int(x):
+                        losses.append(int(x))
+                else:
+                    xs.append(x)
+                    ys.append(value)
+            points = [(xs[i], ys[i]) for i in lttb(xs, ys, width)]
+        else:
+            for column, (minimum, maximum, lost, _) in enumerate(series.columns(start, end, width)):
+                if lost:
+                    losses.append(column)
+                if minimum == minimum:
+                    points.append((column, minimum))
+                    if maximum != minimum:
+                        points.append((column, maximum))
+        if points:
+            values = [value for _, value in points]
+            value_range = (min(values), max(values))
+        else:
+            value_range = (0.0, 1.0)
+        return points, losses, value_range
+
+    def _show_losses(self, xs: List[float], bottom: float = 0):
+        """Posiciona as marcas de perda, reaproveitando os itens existentes"""
+        canvas = self.canvas
+        while len(self._loss_items) < len(xs):
+            self._loss_items.append(canvas.create_line(0, 0, 0, 0, fill=self._loss_color, state='hidden'))
+        for item, x in zip(self._loss_items, xs):
+            canvas.coords(item, x, bottom, x, self.PADDING)
+            canvas.itemconfigure(item, state='normal')
+        for item in self._loss_items[len(xs):]:
+            canvas.itemconfigure(item, state='hidden')
@@ -0,0 +1,397 @@
+"""
+Motor de pings particionado em processos (um por núcleo)
+Cada processo executa os PingMonitor da sua partição e grava os resultados em registros de
+tamanho fixo num anel em memória compartilhada; o processo principal lê os anéis sem pickle
+
+Somente pings ICMP (o ProbeRegistry mantém TCP/HTTP nas threads locais). O registro leva as
+estatísticas da rajada; topologia (UNREACHABLE/parent) e tabela de vizinhos (source) ficam no
+processo principal e não são aceitas pelo motor.
+"""
+import math
+import multiprocessing
+import os
+import queue
+import struct
+import threading
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+from ping_monitor import STATUS_CODES, PingMonitor, stop_all
+
+
+_STATUS_INDEX = {status: code for code, status in enumerate(STATUS_CODES)}
+
+# Registro: sequência, índice do alvo, status, ttl, bytes, timestamp (epoch), rtt_ms (NaN = None),
+# rajada: enviados, recebidos, rtt_min, rtt_max, rtt_mdev (NaN = None)
+RECORD = struct.Struct('=QIBHHddHHddd')
+_BURST_FIELDS = ('sent', 'received', 'rtt_min', 'rtt_max', 'rtt_mdev')
+# Argumentos de monitor que dependem de estado do processo principal
+LOCAL_ONLY_KWARGS = ('dependency', 'neighbors', 'rate_limiter', 'instrumentation', 'clock')
+# Cabeçalho: escrita (produtor), leitura (consumidor), descartados (produtor)
+HEADER = struct.Struct('=QQQ')
+_COUNTER = struct.Struct('=Q')
+
+
+class ResultRing:
+    """Anel de um produtor e um consumidor em memória compartilhada"""
+
+    def __init__(self, capacity: int = 4096, name: Optional[str] = None):
+        """
+        Cria o anel, ou se conecta a um anel existente
+
+        Args:
+            capacity: Quantidade de registros do anel
+            name: Nome do bloco de memória existente (None = cria um novo)
+        """
+        self.capacity = capacity
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER.size + capacity * RECORD.size)
+            HEADER.pack_into(self.shm.buf, 0, 0, 0, 0)
+        else:
+            # Os processos filhos compartilham o resource_tracker do criador, que remove o bloco
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+    def push(self, index: int, status: str, rtt_ms: Optional[float], ttl: Optional[int],
+             size: Optional[int], timestamp: float, burst: Optional[Dict] = None) -> bool:
+        """
+        Grava um resultado (somente o produtor)
+
+        Args:
+            burst: Estatísticas da rajada (sent, received, rtt_min, rtt_max, rtt_mdev; None = um eco)
+
+        Returns:
+            False se o anel estava cheio (o resultado é descartado e contado)
+        """
+        buf = self.shm.buf
+        write, read, dropped = HEADER.unpack_from(buf, 0)
+        if write - read >= self.capacity:
+            _COUNTER.pack_into(buf, 16, dropped + 1)
+            return False
+        offset = HEADER.size + (write % self.capacity) * RECORD.size
+        burst = burst or {}
+        RECORD.pack_into(buf, offset, write + 1, index, _STATUS_INDEX.get(status, 2),
+                         ttl or 0, size or 0, timestamp, math.nan if rtt_ms is None else rtt_ms,
+                         min(burst.get('sent') or 1, 0xFFFF), min(burst.get('received') or 0, 0xFFFF),
+                         *(math.nan if burst.get(field) is None else burst[field] for field in _BURST_FIELDS[2:]))
+        # Publica o registro só depois de gravado
+        _COUNTER.pack_into(buf, 0, write + 1)
+        return True
+
+    def pop_all(self, max_items: Optional[int] = None) -> List[tuple]:
+        """
+        Lê os registros publicados (somente o consumidor)
+
+        Returns:
+            Lista de tuplas (seq, índice, status, ttl, bytes, timestamp, rtt_ms,
+            sent, received, rtt_min, rtt_max, rtt_mdev)
+        """
+        buf = self.shm.buf
+        write, read, _ = HEADER.unpack_from(buf, 0)
+        count = write - read
+        if max_items is not None:
+            count = min(count, max_items)
+        records = [RECORD.unpack_from(buf, HEADER.size + ((read + i) % self.capacity) * RECORD.size)
+                   for i in range(count)]
+        _COUNTER.pack_into(buf, 8, read + count)
+        return records
+
+    def dropped(self) -> int:
+        """Retorna quantos resultados foram descartados com o anel cheio"""
+        return HEADER.unpack_from(self.shm.buf, 0)[2]
+
+    def close(self):
+        """Desconecta do bloco de memória (o criador também o remove)"""
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _worker_main(ring_name: str, capacity: int, commands, stop_event,
+                 monitor_factory: Callable, monitor_kwargs: Dict):
+    """Processo de uma partição: cria os monitores pedidos e grava os resultados no anel"""
+    ring = ResultRing(capacity, name=ring_name)
+    ring_lock = threading.Lock()  # Vários monitores, um único produtor no anel
+    monitors = {}
+
+    def make_callback(index):
+        def callback(result):
+            try:
+                timestamp = datetime.fromisoformat(result['timestamp']).timestamp()
+            except (KeyError, TypeError, ValueError):
+                timestamp = 0.0
+            with ring_lock:
+                ring.push(index, result.get('status', 'ERROR'), result.get('rtt_ms'),
+                          result.get('ttl'), result.get('bytes'), timestamp,
+                          result if result.get('sent', 1) > 1 else None)
+        return callback
+
+    try:
+        while not stop_event.is_set():
+            try:
+                action, index, *args = commands.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if action == 'add':
+                ip, interval = args
+                monitor = monitor_factory(ip, interval, make_callback(index), **monitor_kwargs)
+                monitors[index] = monitor
+                monitor.start()
+            elif action == 'remove':
+                monitor = monitors.pop(index, None)
+                if monitor:
+                    monitor.request_stop()
+            elif action in ('pause', 'resume') and index in monitors:
+                getattr(monitors[index], action)()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_all(list(monitors.values()))
+        ring.close()
+
+
+class ShardedMonitor:
+    """Alvo de um ShardedProbeEngine (mesma interface do PingMonitor)"""
+
+    def __init__(self, engine: 'ShardedProbeEngine', ip: str, interval: int, callback: Optional[Callable]):
+        self.engine = engine
+        self.ip = ip
+        self.interval = interval
+        self.callback = callback
+        self.index: Optional[int] = None
+        self.is_running = False
+        self._paused = False
+
+    @property
+    def is_paused(self) -> bool:
+        return self._paused
+
+    @is_paused.setter
+    def is_paused(self, paused: bool):
+        # O ProbeRegistry altera o atributo diretamente: repassa ao processo do alvo
+        if paused != self._paused:
+            self._paused = paused
+            if self.index is not None:
+                self.engine.send(self.index, 'pause' if paused else 'resume')
+
+    def start(self):
+        """Inicia o monitoramento na partição menos carregada"""
+        if not self.is_running:
+            self.is_running = True
+            self.index = self.engine.add(self.ip, self.interval, self.callback)
+            if self._paused:
+                self.engine.send(self.index, 'pause')
+
+    def request_stop(self):
+        """Para o monitoramento"""
+        if self.is_running:
+            self.is_running = False
+            self.engine.remove(self.index)
+
+    def join(self, timeout: Optional[float] = None):
+        """O monitor roda em outro processo: nada a aguardar"""
+        pass
+
+    def stop(self, timeout: float = 2):
+        """Para o monitoramento"""
+        self.request_stop()
+
+    def pause(self):
+        """Pausa o monitoramento"""
+        self.is_paused = True
+
+    def resume(self):
+        """Resume o monitoramento"""
+        self.is_paused = False
+
+    def toggle_pause(self):
+        """Alterna entre pausado e ativo"""
+        if self.is_paused:
+            self.resume()
+            return False  # Agora está ativo (não pausado)
+        else:
+            self.pause()
+            return True  # Agora está pausado
+
+
+class ShardedProbeEngine:
+    """Distribui os alvos entre processos e coleta os resultados dos anéis"""
+
+    def __init__(self, workers: Optional[int] = None, capacity: int = 4096, poll_interval: float = 0.05,
+                 monitor_factory: Callable = PingMonitor, **monitor_kwargs):
+        """
+        Inicializa o motor
+
+        Args:
+            workers: Quantidade de processos (None = um por núcleo)
+            capacity: Registros por anel (por processo)
+            poll_interval: Intervalo de leitura dos anéis pela thread de entrega em segundos
+            monitor_factory: Classe/função que cria o monitor no processo (precisa ser importável)
+            **monitor_kwargs: Argumentos do monitor (somente valores serializáveis: burst, phase_spread, ...)
+
+        Raises:
+            ValueError: Se monitor_kwargs tiver argumentos que só valem no processo principal
+                        (LOCAL_ONLY_KWARGS: topologia, vizinhos, limitador, ...)
+        """
+        local = [name for name in LOCAL_ONLY_KWARGS if monitor_kwargs.get(name) is not None]
+        if local:
+            raise ValueError(f"Argumentos não suportados no motor em processos: {', '.join(local)}")
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.monitor_factory = monitor_factory
+        self.monitor_kwargs = monitor_kwargs
+        self._lock = threading.Lock()
+        self._rings: List[ResultRing] = []
+        self._commands = []
+        self._processes = []
+        self._stop_event = None
+        self._targets: Dict[int, str] = {}  # {índice: ip}
+        self._shard_of: Dict[int, int] = {}  # {índice: partição}
+        self._callbacks: Dict[int, Callable] = {}
+        self._next_index = 0
+        self._dispatcher: Optional[threading.Thread] = None
+        self._dispatch_stop = threading.Event()
+
+    def start(self, dispatch: bool = True):
+        """
+        Inicia os processos
+
+        Args:
+            dispatch: Inicia a thread que lê os anéis e chama os callbacks
+                      (False = o chamador lê com poll())
+        """
+        context = multiprocessing.get_context()
+        self._stop_event = context.Event()
+        for _ in range(self.workers):
+            ring = ResultRing(self.capacity)
+            commands = context.Queue()
+            process = context.Process(
+                target=_worker_main,
+                args=(ring.name, self.capacity, commands, self._stop_event,
+                      self.monitor_factory, self.monitor_kwargs),
+                daemon=True
+            )
+            process.start()
+            self._rings.append(ring)
+            self._commands.append(commands)
+            self._processes.append(process)
+        if dispatch:
+            self._dispatch_stop.clear()
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+            self._dispatcher.start()
+
+    def add(self, ip: str, interval: int, callback: Optional[Callable] = None) -> int:
+        """
+        Adiciona um alvo na partição com menos alvos
+
+        Returns:
+            Índice do alvo (identifica os registros no anel)
+        """
+        with self._lock:
+            index = self._next_index
+            self._next_index += 1
+            loads = [0] * self.workers
+            for shard in self._shard_of.values():
+                loads[shard] += 1
+            shard = loads.index(min(loads))
+            self._targets[index] = ip
+            self._shard_of[index] = shard
+            if callback:
+                self._callbacks[index] = callback
+        self._commands[shard].put(('add', index, ip, interval))
+        return index
+
+    def remove(self, index: int):
+        """Remove um alvo"""
+        with self._lock:
+            shard = self._shard_of.pop(index, None)
+            self._callbacks.pop(index, None)
+        if shard is not None:
+            self._commands[shard].put(('remove', index))
+
+    def send(self, index: int, action: str):
+        """Envia um comando (pause/resume) ao processo do alvo"""
+        with self._lock:
+            shard = self._shard_of.get(index)
+        if shard is not None:
+            self._commands[shard].put((action, index))
+
+    def create_monitor(self, ip: str, interval: int, callback: Optional[Callable] = None,
+                       **ignored) -> ShardedMonitor:
+        """Cria um monitor no motor (compatível com o monitor_factory do ProbeRegistry)"""
+        return ShardedMonitor(self, ip, interval, callback)
+
+    def poll(self, max_items: Optional[int] = None) -> List[Dict]:
+        """
+        Lê os resultados de todos os anéis
+
+        Args:
+            max_items: Máximo de registros lidos por anel (None = todos)
+
+        Returns:
+            Resultados no formato do PingMonitor (sem a saída textual do ping)
+        """
+        results = []
+        for ring in self._rings:
+            for (_, index, status, ttl, size, timestamp, rtt_ms,
+                 sent, received, rtt_min, rtt_max, rtt_mdev) in ring.pop_all(max_items):
+                with self._lock:
+                    ip = self._targets.get(index)
+                if ip is None:
+                    continue
+                result = {
+                    'status': STATUS_CODES[status] if status < len(STATUS_CODES) else 'ERROR',
+                    'rtt_ms': None if math.isnan(rtt_ms) else rtt_ms,
+                    'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+                    'ttl': ttl or None,
+                    'bytes': size or None,
+                    'output': '',
+                    'ip': ip,
+                    'shard_index': index
+                }
+                if sent > 1:
+                    result.update({
+                        'sent': sent,
+                        'received': received,
+                        'loss_pct': (sent - received) * 100.0 / sent,
+                        'rtt_min': None if math.isnan(rtt_min) else rtt_min,
+                        'rtt_avg': result['rtt_ms'] if received else None,
+                        'rtt_max': None if math.isnan(rtt_max) else rtt_max,
+                        'rtt_mdev': None if math.isnan(rtt_mdev) else rtt_mdev
+                    })
+                results.append(result)
+        return results
+
+    def _dispatch_loop(self):
+        """Lê os anéis periodicamente e entrega os resultados aos callbacks"""
+        while not self._dispatch_stop.wait(self.poll_interval):
+            for result in self.poll():
+                with self._lock:
+                    callback = self._callbacks.get(result['shard_index'])
+                if callback:
+                    callback(result)
+
+    def dropped(self) -> int:
+        """Retorna o total de resultados descartados com anéis cheios"""
+        return sum(ring.dropped() for ring in self._rings)
+
+    def stop(self, timeout: float = 2):
+        """Para os processos e libera a memória compartilhada"""
+        self._dispatch_stop.set()
+        if self._dispatcher:
+            self._dispatcher.join(timeout)
+            self._dispatcher = None
+        if self._stop_event:
+            self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for commands in self._commands:
+            commands.close()
+        for ring in self._rings:
+            ring.close()
+        self._rings, self._commands, self._processes = [], [], []
@@ -0,0 +1,452 @@
+"""
+Probe de conexão TCP (host:porta) multiplexado com selectors
+Uma única thread executa milhares de connects não bloqueantes, mede o RTT do handshake
+e produz o mesmo dicionário de resultado do PingMonitor; nomes são resolvidos fora dessa
+thread (pool pequeno com cache), para um DNS lento não atrasar os outros connects
+"""
+import errno
+import heapq
+import itertools
+import os
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from clock import Clock
+
+
+def parse_tcp_target(target: str) -> Optional[Tuple[str, int]]:
+    """
+    Interpreta um alvo TCP no formato host:porta ou [ipv6]:porta
+
+    Args:
+        target: Texto do alvo
+
+    Returns:
+        (host, porta) ou None se o alvo não for TCP (IP/hostname simples)
+    """
+    target = target.strip()
+    if target.startswith('['):
+        host, sep, rest = target[1:].partition(']')
+        if not sep or not rest.startswith(':'):
+            return None
+        port_text = rest[1:]
+    else:
+        if target.count(':') != 1:
+            return None  # IP/hostname sem porta, ou IPv6 sem colchetes
+        host, port_text = target.split(':')
+    if not host or not port_text.isdigit() or not 0 < int(port_text) < 65536:
+        return None
+    return host, int(port_text)
+
+
+def _result(target: str, status: str, timestamp: str, rtt_ms: Optional[float], output: str) -> Dict:
+    """Monta o resultado no formato do PingMonitor"""
+    return {
+        'status': status,
+        'rtt_ms': rtt_ms,
+        'timestamp': timestamp,
+        'ttl': None,
+        'bytes': None,
+        'output': output,
+        'ip': target,
+        'probe': 'tcp'
+    }
+
+
+class Resolver:
+    """Resolução de nomes em um pool de threads, com cache por tempo"""
+
+    def __init__(self, ttl: float = 60.0, workers: int = 4, getaddrinfo: Callable = socket.getaddrinfo):
+        """
+        Inicializa o resolvedor
+
+        Args:
+            ttl: Tempo em segundos que um endereço resolvido fica no cache
+            workers: Resoluções simultâneas no máximo
+            getaddrinfo: Função de resolução (mesma assinatura do socket.getaddrinfo)
+        """
+        self.ttl = ttl
+        self.workers = workers
+        self.getaddrinfo = getaddrinfo
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, int], Tuple[float, tuple]] = {}  # {(host, porta): (validade, addrinfo)}
+        self._pending: Dict[Tuple[str, int], List[Callable]] = {}  # Resoluções em andamento e quem espera
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def cached(self, host: str, port: int) -> Optional[tuple]:
+        """
+        Retorna o endereço sem bloquear: IP literal ou nome no cache
+
+        Returns:
+            (family, socktype, proto, canonname, address) ou None se precisar resolver
+        """
+        try:
+            return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM, flags=socket.AI_NUMERICHOST)[0]
+        except (OSError, UnicodeError):
+            pass
+        with self._lock:
+            entry = self._cache.get((host, port))
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def resolve(self, host: str, port: int, callback: Callable[[Optional[tuple], Optional[str]], None]):
+        """
+        Resolve em segundo plano (pedidos iguais em andamento são agrupados)
+
+        Args:
+            callback: Chamada no pool com (addrinfo, None) ou (None, mensagem de erro)
+        """
+        key = (host, port)
+        with self._lock:
+            waiting = self._pending.get(key)
+            if waiting is not None:
+                waiting.append(callback)
+                return
+            self._pending[key] = [callback]
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='tcp-resolver')
+            pool = self._pool
+        pool.submit(self._resolve, key)
+
+    def _resolve(self, key: Tuple[str, int]):
+        info, error = None, None
+        try:
+            info = self.getaddrinfo(key[0], key[1], type=socket.SOCK_STREAM)[0]
+        except (OSError, UnicodeError) as e:
+            error = str(e)
+        with self._lock:
+            if info is not None:
+                self._cache[key] = (time.monotonic() + self.ttl, info)
+            callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            callback(info, error)
+
+    def close(self):
+        """Encerra o pool (resoluções em andamento terminam sozinhas)"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False)
+
+
+class _Probe:
+    """Connect em andamento"""
+
+    __slots__ = ('target', 'sock', 'started', 'deadline', 'timestamp', 'done')
+
+    def __init__(self, target: str, sock, started: float, deadline: float, timestamp: str,
+                 done: Callable[[Dict], None]):
+        self.target = target
+        self.sock = sock
+        self.started = started
+        self.deadline = deadline
+        self.timestamp = timestamp
+        self.done = done
+
+
+class TCPProbeEngine:
+    """Motor de probes TCP: agenda os alvos e multiplexa os connects em uma thread"""
+
+    def __init__(self, timeout: float = 2.0, max_in_flight: int = 512, clock: Optional[Clock] = None,
+                 resolver: Optional[Resolver] = None):
+        """
+        Inicializa o motor
+
+        Args:
+            timeout: Tempo máximo do handshake em segundos (e da resolução do nome)
+            max_in_flight: Connects simultâneos no máximo (limita descritores abertos)
+            clock: Relógio usado nos timestamps (as esperas usam o tempo real do selector)
+            resolver: Resolvedor de nomes (None = pool próprio com cache de 60 s)
+        """
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.clock = clock or Clock()
+        self.resolver = resolver or Resolver()
+        self._resolving = 0  # Resoluções pedidas e ainda não tratadas pela thread do motor
+        self._resolved: List[tuple] = []  # Resoluções prontas: (addrinfo, erro, pedido)
+        self._selector = selectors.DefaultSelector()
+        self._lock = threading.Lock()
+        self._schedule: List = []  # heap de (prazo, seq, monitor)
+        self._seq = itertools.count()
+        self._in_flight: Dict[int, _Probe] = {}  # {fileno: probe}
+        self._busy = set()  # Monitores com connect em andamento
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    # ---- Agendamento ----
+
+    def add(self, monitor: 'TCPMonitor', delay: float = 0.0):
+        """Agenda um monitor (primeiro connect após `delay` segundos)"""
+        with self._lock:
+            heapq.heappush(self._schedule, (time.monotonic() + delay, next(self._seq), monitor))
+            if not self._running:
+                self._start_locked()
+        self._wake()
+
+    def _start_locked(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _wake(self):
+        """Acorda a thread do motor (novo agendamento ou parada)"""
+        try:
+            self._wake_w.send(b'\0')
+        except (BlockingIOError, OSError):
+            pass  # Já há um aviso pendente
+
+    def stop(self, timeout: float = 2):
+        """Para o motor e fecha os connects em andamento"""
+        with self._lock:
+            self._running = False
+        self._wake()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self.resolver.close()
+
+    # ---- Connects ----
+
+    def _launch(self, host: str, port: int, target: str, timeout: float, done: Callable[[Dict], None]):
+        """Inicia um connect não bloqueante (resultado entregue em `done`)"""
+        timestamp = self.clock.now().isoformat()
+        info = self.resolver.cached(host, port)
+        if info is not None:
+            self._connect(info, target, timeout, timestamp, done)
+            return
+        # Nome fora do cache: resolve no pool e conecta quando a thread do motor receber o endereço
+        request = (target, timeout, timestamp, done, time.monotonic())
+        with self._lock:
+            self._resolving += 1
+
+        def resolved(info, error):
+            with self._lock:
+                self._resolved.append((info, error, request))
+            self._wake()
+
+        self.resolver.resolve(host, port, resolved)
+
+    def _take_resolved(self):
+        """Conecta (ou reporta o erro) os alvos com a resolução concluída"""
+        with self._lock:
+            ready, self._resolved = self._resolved, []
+            self._resolving -= len(ready)
+        for info, error, (target, timeout, timestamp, done, requested) in ready:
+            if info is None:
+                done(_result(target, 'ERROR', timestamp, None, error))
+            elif time.monotonic() - requested >= timeout:
+                done(_result(target, 'TIMEOUT', timestamp, None, 'Tempo esgotado na resolução do nome'))
+            else:
+                self._connect(info, target, timeout, timestamp, done)
+
+    def _connect(self, info: tuple, target: str, timeout: float, timestamp: str, done: Callable[[Dict], None]):
+        """Abre o socket e inicia o connect para um endereço já resolvido"""
+        family, socktype, proto, _, address = info
+        try:
+            sock = socket.socket(family, socktype, proto)
+        except OSError as e:
+            done(_result(target, 'ERROR', timestamp, None, str(e)))
+            return
+        sock.setblocking(False)
+        started = time.monotonic()
+        code = sock.connect_ex(address)
+        if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', -1)):
+            sock.close()
+            done(_result(target, 'ERROR', timestamp, None, os.strerror(code)))
+            return
+        probe = _Probe(target, sock, started, started + timeout, timestamp, done)
+        self._in_flight[sock.fileno()] = probe
+        self._selector.register(sock, selectors.EVENT_WRITE, probe)
+
+    def _close(self, probe: _Probe):
+        """Remove o connect do selector (o socket é fechado depois de ler o erro)"""
+        self._in_flight.pop(probe.sock.fileno(), None)
+        try:
+            self._selector.unregister(probe.sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _poll(self, timeout: Optional[float]):
+        """Aguarda eventos do selector e expira connects vencidos"""
+        for key, _ in self._selector.select(timeout):
+            if key.data is None:
+                try:
+                    while self._wake_r.recv(4096):
+                        pass
+                except (BlockingIOError, OSError):
+                    pass
+                self._take_resolved()
+                continue
+            probe = key.data
+            now = time.monotonic()
+            code = probe.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            self._close(probe)
+            probe.sock.close()
+            if code == 0:
+                rtt_ms = (now - probe.started) * 1000.0
+                probe.done(_result(probe.target, 'OK', probe.timestamp, rtt_ms,
+                                   f'Conexão TCP com {probe.target}: tempo={rtt_ms:.2f}ms'))
+            else:
+                probe.done(_result(probe.target, 'ERROR', probe.timestamp, None, os.strerror(code)))
+
+        now = time.monotonic()
+        for probe in [p for p in self._in_flight.values() if p.deadline <= now]:
+            self._close(probe)
+            probe.sock.close()
+            probe.done(_result(probe.target, 'TIMEOUT', probe.timestamp, None, 'Tempo esgotado na conexão TCP'))
+
+    def probe_many(self, targets: List[str], timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Testa vários alvos host:porta de uma vez (bloqueia até todos terminarem)
+
+        Não pode ser usado enquanto o motor agendado está rodando.
+
+        Args:
+            targets: Alvos no formato host:porta
+            timeout: Tempo máximo do handshake (None = timeout do motor)
+
+        Returns:
+            Resultados na mesma ordem dos alvos
+        """
+        timeout = self.timeout if timeout is None else timeout
+        results: List[Optional[Dict]] = [None] * len(targets)
+        pending = list(enumerate(targets))
+        pending.reverse()
+
+        while pending or self._in_flight or self._resolving:
+            while pending and len(self._in_flight) + self._resolving < self.max_in_flight:
+                index, target = pending.pop()
+                parsed = parse_tcp_target(target)
+                if parsed is None:
+                    results[index] = _result(target, 'ERROR', self.clock.now().isoformat(), None,
+                                             'Alvo TCP inválido (use host:porta)')
+                    continue
+
+                def done(result, index=index):
+                    results[index] = result
+
+                self._launch(parsed[0], parsed[1], target, timeout, done)
+            if self._in_flight:
+                next_deadline = min(p.deadline for p in self._in_flight.values())
+                self._poll(max(0.0, next_deadline - time.monotonic()))
+            elif self._resolving:
+                self._poll(None)  # Só resoluções pendentes: acorda quando alguma terminar
+        return results
+
+    # ---- Loop do motor ----
+
+    def _loop(self):
+        """Loop da thread do motor"""
+        while True:
+            with self._lock:
+                if not self._running:
+                    break
+                now = time.monotonic()
+                due = []
+                while self._schedule and self._schedule[0][0] <= now and \
+                        len(self._in_flight) + self._resolving + len(due) < self.max_in_flight:
+                    due.append(heapq.heappop(self._schedule))
+
+            for deadline, _, monitor in due:
+                if not monitor.is_running:
+                    continue  # Removido: não reagenda
+                # Próximo connect na grade do intervalo (pula horários perdidos)
+                next_due = deadline + monitor.interval
+                if next_due <= now:
+                    next_due = now + monitor.interval
+                with self._lock:
+                    heapq.heappush(self._schedule, (next_due, next(self._seq), monitor))
+                if monitor.is_paused or monitor in self._busy:
+                    continue
+                self._busy.add(monitor)
+
+                def done(result, monitor=monitor):
+                    self._busy.discard(monitor)
+                    if monitor.is_running and monitor.callback:
+                        monitor.callback(result)
+
+                self._launch(monitor.host, monitor.port, monitor.ip, self.timeout, done)
+
+            with self._lock:
+                next_due = self._schedule[0][0] if self._schedule else None
+            deadlines = [p.deadline for p in self._in_flight.values()]
+            if next_due is not None:
+                deadlines.append(next_due)
+            wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            self._poll(wait)
+
+        # Parada: fecha os connects em andamento sem reportar
+        for probe in list(self._in_flight.values()):
+            self._close(probe)
+            probe.sock.close()
+        self._busy.clear()
+
+
+class TCPMonitor:
+    """Monitor de um alvo host:porta no TCPProbeEngine (mesma interface do PingMonitor)"""
+
+    def __init__(self, target: str, interval: int = 5, callback: Optional[Callable] = None,
+                 engine: Optional[TCPProbeEngine] = None):
+        """
+        Inicializa o monitor TCP
+
+        Args:
+            target: Alvo no formato host:porta
+            interval: Intervalo entre connects em segundos
+            callback: Função chamada após cada connect (mesmo dict do PingMonitor)
+            engine: Motor compartilhado (None = cria um motor próprio)
+        """
+        parsed = parse_tcp_target(target)
+        if parsed is None:
+            raise ValueError(f"Alvo TCP inválido: {target} (use host:porta)")
+        self.ip = target
+        self.host, self.port = parsed
+        self.interval = interval
+        self.callback = callback
+        self.engine = engine or TCPProbeEngine()
+        self.is_running = False
+        self.is_paused = False
+
+    def start(self):
+        """Inicia o monitoramento"""
+        if not self.is_running:
+            self.is_running = True
+            self.is_paused = False
+            self.engine.add(self)
+
+    def request_stop(self):
+        """Para o monitoramento (o motor descarta o agendamento)"""
+        self.is_running = False
+
+    def join(self, timeout: Optional[float] = None):
+        """Sem thread própria: nada a aguardar"""
+        pass
+
+    def stop(self, timeout: float = 2):
+        """Para o monitoramento"""
+        self.request_stop()
+
+    def pause(self):
+        """Pausa o monitoramento"""
+        self.is_paused = True
+
+    def resume(self):
+        """Resume o monitoramento"""
+        self.is_paused = False
+
+    def toggle_pause(self):
+        """Alterna entre pausado e ativo"""
+        if self.is_paused:
+            self.resume()
+            return False  # Agora está ativo (não pausado)
+        else:
+            self.pause()
+            return True  # Agora está pausado
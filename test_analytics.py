@@ -0,0 +1,102 @@
+"""
+Testes para a análise vetorizada do histórico (requer NumPy)
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from analytics import HAS_NUMPY
+from csv_logger import CSVLogger
+
+if HAS_NUMPY:
+    import numpy as np
+    from analytics import load_csv, load_npz, percentiles, resample, rolling_loss, rtt_histogram, sla
+
+
+START = datetime(2024, 1, 15, 10, 0, 0)
+
+
+def ts(seconds: int) -> str:
+    return (START + timedelta(seconds=seconds)).isoformat()
+
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy não instalado")
+class TestAnalytics(unittest.TestCase):
+    """Testes para o carregamento e os cálculos vetorizados"""
+
+    def setUp(self):
+        """Dois alvos a cada segundo por 2 minutos; 10.0.0.2 fora do ar de 60 a 89 s"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'ping_logs.csv')
+        logger = CSVLogger(self.path)
+        for i in range(120):
+            logger.log(ts(i), "10.0.0.1", float(1 + i % 10), "OK")
+            if 60 <= i < 90:
+                logger.log(ts(i), "10.0.0.2", None, "TIMEOUT")
+            else:
+                logger.log(ts(i), "10.0.0.2", 5.0, "OK")
+        self.history = load_csv(self.path, chunk_rows=7)
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        shutil.rmtree(self.tmp)
+
+    def test_load_csv(self):
+        """Testa o carregamento em blocos e a seleção por alvo e intervalo"""
+        self.assertEqual(len(self.history), 240)
+        self.assertEqual(self.history.targets, ["10.0.0.1", "10.0.0.2"])
+        self.assertTrue(np.isnan(self.history.select("10.0.0.2", ts(60), ts(60)).rtt_ms[0]))
+        self.assertEqual(len(self.history.select(start=ts(10), end=ts(19))), 20)
+        self.assertEqual(len(self.history.select("10.0.0.9")), 0)
+
+    def test_sla(self):
+        """Testa a perda por amostras e a disponibilidade por tempo"""
+        report = sla(self.history)
+        self.assertEqual(report["10.0.0.1"]['loss_pct'], 0.0)
+        self.assertEqual(report["10.0.0.1"]['availability_pct'], 100.0)
+        self.assertEqual(report["10.0.0.2"]['samples'], 120)
+        self.assertEqual(report["10.0.0.2"]['loss_pct'], 25.0)
+        self.assertAlmostEqual(report["10.0.0.2"]['availability_pct'], 100.0 * 89 / 119)
+
+    def test_rolling_loss(self):
+        """Testa a perda móvel"""
+        times, loss = rolling_loss(self.history, "10.0.0.2", window=10)
+        self.assertEqual(len(loss), 120)
+        self.assertEqual(loss[59], 0.0)
+        self.assertEqual(loss[64], 50.0)
+        self.assertEqual(loss[89], 100.0)
+        self.assertEqual(loss[99], 0.0)
+
+    def test_percentiles_and_histogram(self):
+        """Testa os percentis exatos e o histograma de RTT"""
+        result = percentiles(self.history)
+        self.assertEqual(result["10.0.0.1"]['p50'], 5.5)
+        self.assertEqual(result["10.0.0.2"], {'p50': 5.0, 'p95': 5.0, 'p99': 5.0})
+        counts, edges = rtt_histogram(self.history, "10.0.0.1", bins=10, range_ms=(0.5, 10.5))
+        self.assertEqual(counts.tolist(), [12] * 10)
+        self.assertEqual(rtt_histogram(self.history)[0].sum(), 210)
+
+    def test_resample(self):
+        """Testa a agregação por minuto"""
+        series = resample(self.history, "10.0.0.2", bucket_seconds=60)
+        self.assertEqual(series['samples'].tolist(), [60, 60])
+        self.assertEqual(series['loss_pct'].tolist(), [0.0, 50.0])
+        self.assertEqual(series['rtt_mean'].tolist(), [5.0, 5.0])
+        self.assertEqual(str(series['start'][1]), '2024-01-15T10:01:00.000000')
+
+        series = resample(self.history.select("10.0.0.2", ts(60), ts(89)), "10.0.0.2", bucket_seconds=60)
+        self.assertTrue(np.isnan(series['rtt_min'][0]))
+
+    def test_npz_roundtrip(self):
+        """Testa o formato binário"""
+        path = os.path.join(self.tmp, 'history.npz')
+        self.history.save(path)
+        loaded = load_npz(path)
+        self.assertEqual(loaded.targets, self.history.targets)
+        self.assertTrue(np.array_equal(loaded.times, self.history.times))
+        self.assertEqual(sla(loaded), sla(self.history))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+Testes da comparação de benchmarks com o baseline
+"""
+import unittest
+from benchmark import compare_results, bench_parse
+
+
+class TestBenchmarkCompare(unittest.TestCase):
+    """Testes para compare_results"""
+    
+    def _results(self, value, higher_is_better=True):
+        return {'results': {'parse': {'outputs_per_s': {
+            'value': value, 'unit': 'outputs/s', 'higher_is_better': higher_is_better
+        }}}}
+    
+    def test_flags_regression_above_threshold(self):
+        """Testa se uma queda acima do limite é marcada como regressão"""
+        comparisons = compare_results(self._results(100.0), self._results(80.0), threshold=0.10)
+        self.assertEqual(len(comparisons), 1)
+        self.assertTrue(comparisons[0]['regression'])
+    
+    def test_ignores_change_within_threshold(self):
+        """Testa se variações pequenas ou melhorias não são regressão"""
+        self.assertFalse(compare_results(self._results(100.0), self._results(95.0))[0]['regression'])
+        self.assertFalse(compare_results(self._results(100.0), self._results(150.0))[0]['regression'])
+    
+    def test_lower_is_better_metric(self):
+        """Testa métricas onde menor é melhor (ex: latência)"""
+        comparisons = compare_results(self._results(10.0, False), self._results(12.0, False))
+        self.assertTrue(comparisons[0]['regression'])
+    
+    def test_parse_benchmark_runs(self):
+        """Testa se o benchmark de parse produz uma métrica positiva"""
+        self.assertGreater(bench_parse()['outputs_per_s']['value'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
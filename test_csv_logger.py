@@ -0,0 +1,147 @@
+"""
+Testes para o logger CSV (rotação, compressão e modo deadband)
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from clock import VirtualClock
+from csv_logger import CSVLogger, iter_log_records, list_segments, reconstruct_series
+
+
+class TestCSVLoggerRotation(unittest.TestCase):
+    """Testes para a rotação, compressão e retenção do CSVLogger"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'ping_logs.csv')
+        self.clock = VirtualClock(datetime(2024, 1, 15, 10, 0, 0))
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        shutil.rmtree(self.tmp)
+
+    def log_rows(self, logger, count, start=0):
+        for i in range(start, start + count):
+            logger.log(f"2024-01-15T10:00:{i % 60:02d}", "192.168.224.22", float(i), "OK")
+
+    def test_without_rotation_single_file(self):
+        """Testa o comportamento original: um único arquivo com cabeçalho"""
+        logger = CSVLogger(self.path)
+        self.log_rows(logger, 3)
+        logger.log("2024-01-15T10:00:03", "192.168.224.22", None, "TIMEOUT")
+        self.assertEqual(list_segments(self.path), [])
+        records = list(iter_log_records(self.path))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0], {'timestamp': "2024-01-15T10:00:00", 'ip': "192.168.224.22",
+                                      'rtt_ms': 0.0, 'status': 'OK'})
+        self.assertIsNone(records[3]['rtt_ms'])
+
+    def test_rotation_by_size_compresses_segments(self):
+        """Testa a rotação por tamanho, a compressão e a leitura através dos segmentos"""
+        logger = CSVLogger(self.path, max_bytes=200, clock=self.clock)
+        self.log_rows(logger, 20)
+        logger.close()
+        segments = list_segments(self.path)
+        self.assertGreater(len(segments), 1)
+        self.assertTrue(all(path.endswith('.csv.gz') for path in segments))
+        self.assertTrue(all(os.path.getsize(path) > 0 for path in segments))
+        self.assertLessEqual(os.path.getsize(self.path), 200)
+        self.assertEqual([r['rtt_ms'] for r in iter_log_records(self.path)], [float(i) for i in range(20)])
+
+    def test_rotation_by_time(self):
+        """Testa a rotação ao entrar num novo período"""
+        logger = CSVLogger(self.path, rotate_interval=3600, compress=False, clock=self.clock)
+        self.log_rows(logger, 2)
+        self.clock.advance(1800)
+        self.log_rows(logger, 2, start=2)
+        self.assertEqual(list_segments(self.path), [])
+        self.clock.advance(3600)
+        self.log_rows(logger, 1, start=4)
+        segments = list_segments(self.path)
+        self.assertEqual([os.path.basename(path) for path in segments], ['ping_logs.20240115-113000.csv'])
+        self.assertEqual([r['rtt_ms'] for r in iter_log_records(segments[0])], [0.0, 1.0, 2.0, 3.0])
+        self.assertEqual(len(list(iter_log_records(self.path))), 5)
+
+    def test_retention_by_count_and_age(self):
+        """Testa a remoção dos segmentos mais antigos"""
+        logger = CSVLogger(self.path, compress=False, backup_count=2, clock=self.clock)
+        for i in range(4):
+            self.log_rows(logger, 1, start=i)
+            logger.rotate()
+        self.assertEqual([r['rtt_ms'] for r in iter_log_records(self.path)], [2.0, 3.0])
+
+        logger.max_age = 60
+        self.clock.advance(120)
+        self.log_rows(logger, 1, start=4)
+        logger.rotate()
+        self.assertEqual([r['rtt_ms'] for r in iter_log_records(self.path)], [4.0])
+
+    def test_same_second_segments_keep_order(self):
+        """Testa segmentos fechados no mesmo segundo"""
+        logger = CSVLogger(self.path, max_bytes=60, compress=False, clock=self.clock)
+        self.log_rows(logger, 12)
+        self.assertGreater(len(list_segments(self.path)), 2)
+        self.assertEqual([r['rtt_ms'] for r in iter_log_records(self.path)], [float(i) for i in range(12)])
+
+
+class TestCSVLoggerDeadband(unittest.TestCase):
+    """Testes para o modo deadband (somente mudanças) do CSVLogger"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'ping_logs.csv')
+        self.logger = CSVLogger(self.path, mode='deadband', deadband_ms=0.5, heartbeat=60)
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        shutil.rmtree(self.tmp)
+
+    def test_invalid_mode(self):
+        """Testa a rejeição de um modo desconhecido"""
+        with self.assertRaises(ValueError):
+            CSVLogger(self.path, mode='delta')
+
+    def test_stable_series_writes_few_rows(self):
+        """Testa a redução de linhas numa rede estável, com heartbeat"""
+        for i in range(600):
+            rtt = 1.0 + (i % 5) * 0.1  # Variação dentro da faixa
+            self.logger.log(f"2024-01-15T10:{i // 60:02d}:{i % 60:02d}", "10.0.0.1", rtt, "OK")
+        self.logger.close()
+        records = list(iter_log_records(self.path))
+        # Primeira amostra + heartbeat por minuto + última amostra (flush)
+        self.assertEqual(len(records), 11)
+        self.assertEqual(self.logger.suppressed, 600 - 10)
+        self.assertEqual(records[1]['timestamp'], "2024-01-15T10:01:00")
+        self.assertEqual(records[-1]['timestamp'], "2024-01-15T10:09:59")
+
+    def test_transitions_and_reconstruction(self):
+        """Testa a gravação das transições e a reconstrução dentro da tolerância"""
+        samples = [(1.0, 'OK'), (1.2, 'OK'), (1.4, 'OK'), (1.6, 'OK'), (None, 'TIMEOUT'),
+                   (None, 'TIMEOUT'), (5.0, 'OK'), (5.3, 'OK'), (4.4, 'OK'), (4.6, 'OK')]
+        timestamps = [f"2024-01-15T10:00:{i:02d}" for i in range(len(samples))]
+        for timestamp, (rtt, status) in zip(timestamps, samples):
+            self.logger.log(timestamp, "10.0.0.1", rtt, status)
+            self.logger.log(timestamp, "10.0.0.2", 2.0, "OK")
+        self.logger.close()
+
+        records = list(iter_log_records(self.path))
+        written = [(r['timestamp'][-2:], r['rtt_ms'], r['status']) for r in records if r['ip'] == "10.0.0.1"]
+        self.assertEqual(written, [('00', 1.0, 'OK'), ('03', 1.6, 'OK'), ('04', None, 'TIMEOUT'),
+                                   ('06', 5.0, 'OK'), ('08', 4.4, 'OK'), ('09', 4.6, 'OK')])
+
+        series = reconstruct_series(records, "10.0.0.1", timestamps)
+        for (rtt, status), record in zip(samples, series):
+            self.assertEqual(record['status'], status)
+            if rtt is None:
+                self.assertIsNone(record['rtt_ms'])
+            else:
+                self.assertLessEqual(abs(record['rtt_ms'] - rtt), 0.5)
+        self.assertEqual(reconstruct_series(records, "10.0.0.2", ["2024-01-14T00:00:00"]), [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
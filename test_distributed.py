@@ -0,0 +1,178 @@
+"""
+Testes para os agentes distribuídos e o coletor central
+"""
+import io
+import socket
+import struct
+import time
+import unittest
+import zlib
+from contextlib import redirect_stdout
+from distributed import MAX_FRAME, Collector, ProbeAgent, recv_frame, send_frame
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    """Aguarda a condição ficar verdadeira (tempo real)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def make_result(i: int) -> dict:
+    return {'ip': '10.0.0.1', 'status': 'OK', 'rtt_ms': float(i), 'timestamp': f'2024-01-01T00:00:{i % 60:02d}'}
+
+
+class TestDistributed(unittest.TestCase):
+    """Testes para o ProbeAgent e o Collector"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.results = []
+        self.collector = Collector(host='127.0.0.1', port=0, on_result=self.results.append)
+        self.collector.start()
+        self.agents = []
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        for agent in self.agents:
+            agent.stop()
+        self.collector.stop()
+
+    def make_agent(self, **kwargs) -> ProbeAgent:
+        kwargs.setdefault('batch_size', 10)
+        kwargs.setdefault('flush_interval', 0.05)
+        kwargs.setdefault('retry_interval', 0.05)
+        agent = ProbeAgent('site-a', ('127.0.0.1', self.collector.port), **kwargs)
+        self.agents.append(agent)
+        return agent
+
+    def test_results_delivered_in_order(self):
+        """Testa a entrega em ordem, com o nome do site no alvo"""
+        agent = self.make_agent()
+        agent.start()
+        for i in range(25):
+            agent.observe(make_result(i))
+        self.assertTrue(wait_until(lambda: len(self.results) == 25))
+        self.assertEqual([r['rtt_ms'] for r in self.results], [float(i) for i in range(25)])
+        self.assertEqual(self.results[0]['ip'], 'site-a/10.0.0.1')
+        self.assertEqual(self.results[0]['agent'], 'site-a')
+        self.assertTrue(wait_until(lambda: agent.stats()['spooled'] == 0))
+
+    def test_spool_while_collector_down(self):
+        """Testa o spool limitado durante a queda e a entrega após a volta do coletor"""
+        port = self.collector.port
+        self.collector.stop()
+        agent = self.make_agent(spool_limit=20)
+        agent.start()
+        for i in range(30):
+            agent.observe(make_result(i))
+        self.assertEqual(agent.stats()['dropped'], 10)
+        self.assertEqual(agent.spooled(), 20)
+
+        self.collector.port = port
+        self.collector.start()
+        self.assertTrue(wait_until(lambda: len(self.results) == 20))
+        self.assertEqual([r['rtt_ms'] for r in self.results], [float(i) for i in range(10, 30)])
+
+    def test_collector_restart_resends_unacked(self):
+        """Testa o reenvio após a queda do coletor sem duplicar o que já foi gravado"""
+        agent = self.make_agent()
+        agent.start()
+        for i in range(10):
+            agent.observe(make_result(i))
+        self.assertTrue(wait_until(lambda: len(self.results) == 10))
+
+        port = self.collector.port
+        self.collector.stop()
+        self.assertTrue(wait_until(lambda: not agent.connected.is_set()))
+        for i in range(10, 20):
+            agent.observe(make_result(i))
+        self.collector.port = port
+        self.collector.start()
+
+        self.assertTrue(wait_until(lambda: len(self.results) == 20))
+        self.assertEqual([r['rtt_ms'] for r in self.results], [float(i) for i in range(20)])
+        self.assertEqual(self.collector.last_seq('site-a'), 2)
+
+    def test_duplicate_batch_ignored(self):
+        """Testa se um lote repetido é confirmado de novo, mas não gravado"""
+        sock = socket.create_connection(('127.0.0.1', self.collector.port), timeout=5)
+        try:
+            send_frame(sock, {'type': 'hello', 'agent': 'raw'})
+            self.assertEqual(recv_frame(sock), {'type': 'welcome', 'last_seq': 0})
+            batch = {'type': 'batch', 'agent': 'raw', 'seq': 1, 'items': [make_result(1)]}
+            send_frame(sock, batch)
+            self.assertEqual(recv_frame(sock), {'type': 'ack', 'seq': 1})
+            send_frame(sock, batch)
+            self.assertEqual(recv_frame(sock), {'type': 'ack', 'seq': 1})
+        finally:
+            sock.close()
+        self.assertEqual(len(self.results), 1)
+        self.assertEqual(self.collector.duplicates, 1)
+
+    def test_decompression_bomb_rejected(self):
+        """Testa se uma mensagem pequena que expande além de MAX_FRAME é recusada"""
+        left, right = socket.socketpair()
+        try:
+            payload = zlib.compress(b'{"x":"' + b'a' * (MAX_FRAME + 1024) + b'"}', 9)
+            self.assertLess(len(payload), MAX_FRAME)
+            left.sendall(struct.pack('!I', len(payload)) + payload)
+            with self.assertRaises(ValueError):
+                recv_frame(right)
+        finally:
+            left.close()
+            right.close()
+
+    def test_malformed_batch_drops_connection(self):
+        """Testa se um lote sem seq/items encerra só a conexão do agente"""
+        sock = socket.create_connection(('127.0.0.1', self.collector.port), timeout=5)
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                send_frame(sock, {'type': 'hello', 'agent': 'raw'})
+                recv_frame(sock)
+                send_frame(sock, {'type': 'batch', 'items': [make_result(1)]})
+                self.assertEqual(sock.recv(1), b'')  # Conexão encerrada pelo coletor
+        finally:
+            sock.close()
+        self.assertIn('Lote inválido', output.getvalue())
+        self.assertEqual(self.results, [])
+
+        # O coletor continua atendendo outros agentes
+        agent = self.make_agent()
+        agent.start()
+        agent.observe(make_result(2))
+        self.assertTrue(wait_until(lambda: len(self.results) == 1))
+
+    def test_token_required(self):
+        """Testa se, com token, o coletor só aceita agentes autenticados"""
+        results = []
+        collector = Collector(port=0, on_result=results.append, token='segredo')
+        collector.start()
+        self.addCleanup(collector.stop)
+
+        sock = socket.create_connection(('127.0.0.1', collector.port), timeout=5)
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                send_frame(sock, {'type': 'hello', 'agent': 'intruso', 'token': 'errado'})
+                self.assertEqual(recv_frame(sock)['type'], 'error')
+                self.assertEqual(sock.recv(1), b'')
+        finally:
+            sock.close()
+        self.assertIn('Token inválido', output.getvalue())
+
+        agent = ProbeAgent('site-b', ('127.0.0.1', collector.port), flush_interval=0.05,
+                           retry_interval=0.05, token='segredo')
+        self.agents.append(agent)
+        agent.start()
+        agent.observe(make_result(3))
+        self.assertTrue(wait_until(lambda: len(results) == 1))
+        self.assertEqual(results[0]['ip'], 'site-b/10.0.0.1')
+
+
+if __name__ == '__main__':
+    unittest.main()
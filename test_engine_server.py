@@ -0,0 +1,183 @@
+"""
+Testes para o motor de pings em processo separado
+"""
+import os
+import socket
+import tempfile
+import time
+import unittest
+from engine_server import (MAX_LINE, EngineClient, EngineServer, RemoteMonitor, _open_socket, _read_lines,
+                           parse_address)
+from probe_registry import ProbeRegistry
+from test_ping_monitor import FakePingMonitor
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    """Aguarda a condição ficar verdadeira (tempo real)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class TestEngineServer(unittest.TestCase):
+    """Testes para o EngineServer e o EngineClient"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.tmp = tempfile.mkdtemp()
+        if hasattr(socket, 'AF_UNIX'):
+            address = os.path.join(self.tmp, 'engine.sock')
+        else:
+            address = ('127.0.0.1', 0)
+        self.engine_registry = ProbeRegistry(monitor_factory=FakePingMonitor)
+        self.server = EngineServer(self.engine_registry, address=address, batch_interval=0.01)
+        self.server.start()
+        self.clients = []
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        for client in self.clients:
+            client.close()
+        self.server.stop()
+        os.rmdir(self.tmp)
+
+    def connect(self) -> EngineClient:
+        client = EngineClient(self.server.address, retry_interval=0.05)
+        self.clients.append(client)
+        self.assertTrue(client.connected.wait(5))
+        return client
+
+    def test_parse_address(self):
+        """Testa os endereços de socket Unix e TCP"""
+        self.assertEqual(parse_address('127.0.0.1:9465'), ('127.0.0.1', 9465))
+        self.assertEqual(parse_address(':9465'), ('127.0.0.1', 9465))
+        self.assertEqual(parse_address('/tmp/engine.sock'), '/tmp/engine.sock')
+
+    def test_results_reach_gui_registry(self):
+        """Testa a assinatura remota com o ProbeRegistry da interface"""
+        client = self.connect()
+        gui_registry = ProbeRegistry(monitor_factory=client.create_monitor)
+        results = []
+        observed = []
+        gui_registry.add_observer(observed.append)
+
+        subscription = gui_registry.subscribe("192.168.224.22", 1, results.append)
+        self.assertIsInstance(subscription.monitor, RemoteMonitor)
+        self.assertTrue(wait_until(lambda: results))
+        self.assertEqual(results[0]['ip'], "192.168.224.22")
+        self.assertEqual(results[0]['status'], 'OK')
+        self.assertEqual(len(observed), len(results))
+
+        subscription.stop()
+        self.assertTrue(wait_until(lambda: self.engine_registry.stream_count() == 0))
+
+    def test_two_guis_share_one_stream(self):
+        """Testa duas interfaces acompanhando o mesmo alvo do motor"""
+        results_a, results_b = [], []
+        monitor_a = self.connect().create_monitor("10.0.0.1", 1, results_a.append)
+        monitor_b = self.connect().create_monitor("10.0.0.1", 1, results_b.append)
+        monitor_a.start()
+        monitor_b.start()
+
+        self.assertTrue(wait_until(lambda: self.engine_registry.subscriber_count("10.0.0.1") == 2))
+        self.assertEqual(self.engine_registry.stream_count(), 1)
+        self.assertTrue(wait_until(lambda: results_a and results_b))
+
+        monitor_a.pause()
+        self.assertTrue(wait_until(
+            lambda: self.engine_registry.get_monitor(("10.0.0.1", 1)) is not None and
+            any(sub.is_paused for stream in self.engine_registry._streams.values() for sub in stream.subscribers)
+        ))
+
+    def test_disconnect_cancels_subscriptions(self):
+        """Testa se a queda da interface cancela as assinaturas dela"""
+        client = self.connect()
+        client.create_monitor("10.0.0.2", 1, None).start()
+        self.assertTrue(wait_until(lambda: self.engine_registry.stream_count() == 1))
+        client.close()
+        self.clients.remove(client)
+        self.assertTrue(wait_until(lambda: self.engine_registry.stream_count() == 0))
+        self.assertTrue(wait_until(lambda: self.server.client_count() == 0))
+
+    def raw_connect(self, address) -> socket.socket:
+        sock = _open_socket(address)
+        sock.settimeout(5)
+        sock.connect(address)
+        self.addCleanup(sock.close)
+        return sock
+
+    def test_malformed_commands_get_error_reply(self):
+        """Testa se comandos inválidos recebem erro sem derrubar a conexão"""
+        sock = self.raw_connect(self.server.address)
+        sock.sendall(b'{"op": "subscribe", "id": 1}\n'
+                     b'isto nao e json\n'
+                     b'[1, 2]\n'
+                     b'{"op": "pause"}\n'
+                     b'{"op": "subscribe", "id": 2, "ip": "10.0.0.5", "interval": 1}\n')
+        messages = _read_lines(sock)
+        errors = [next(messages) for _ in range(4)]
+        self.assertEqual([m['op'] for m in errors], ['error'] * 4)
+        self.assertIn("'ip'", errors[0]['error'])
+        self.assertEqual(errors[3]['command'], 'pause')
+        results = next(messages)
+        self.assertEqual(results['op'], 'results')
+        self.assertEqual(results['items'][0]['id'], 2)
+        self.assertEqual(self.server.client_count(), 1)
+
+    def test_oversized_line_closes_connection(self):
+        """Testa se uma linha sem quebra maior que MAX_LINE recebe erro e encerra a conexão"""
+        sock = self.raw_connect(self.server.address)
+        sock.sendall(b'x' * (MAX_LINE + 1))
+        error = next(_read_lines(sock))
+        self.assertEqual(error['op'], 'error')
+        self.assertIn(str(MAX_LINE), error['error'])
+        self.assertEqual(sock.recv(1), b'')  # Conexão encerrada
+        self.assertTrue(wait_until(lambda: self.server.client_count() == 0))
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Requer socket Unix")
+    def test_unix_socket_is_private(self):
+        """Testa se o socket Unix é criado só para o usuário"""
+        self.assertEqual(os.stat(self.server.address).st_mode & 0o077, 0)  # Nem grupo nem outros
+
+    def test_token_required(self):
+        """Testa se, com token, só interfaces autenticadas assinam alvos"""
+        registry = ProbeRegistry(monitor_factory=FakePingMonitor)
+        server = EngineServer(registry, address=('127.0.0.1', 0), batch_interval=0.01, token='segredo')
+        server.start()
+        self.addCleanup(server.stop)
+
+        sock = self.raw_connect(server.address)
+        sock.sendall(b'{"op": "subscribe", "id": 1, "ip": "10.0.0.6", "interval": 1}\n')
+        self.assertEqual(next(_read_lines(sock))['op'], 'error')
+        self.assertEqual(sock.recv(1), b'')  # Conexão encerrada
+        self.assertEqual(registry.stream_count(), 0)
+
+        client = EngineClient(server.address, retry_interval=0.05, token='segredo')
+        self.clients.append(client)
+        results = []
+        client.create_monitor("10.0.0.6", 1, results.append).start()
+        self.assertTrue(wait_until(lambda: results))
+
+    def test_client_resubscribes_after_engine_restart(self):
+        """Testa a reconexão do cliente e a reassinatura dos alvos"""
+        client = self.connect()
+        results = []
+        client.create_monitor("10.0.0.3", 1, results.append).start()
+        self.assertTrue(wait_until(lambda: results))
+
+        address = self.server.address
+        self.server.stop()
+        self.assertTrue(wait_until(lambda: not client.connected.is_set()))
+        self.engine_registry = ProbeRegistry(monitor_factory=FakePingMonitor)
+        self.server = EngineServer(self.engine_registry, address=address, batch_interval=0.01)
+        self.server.start()
+
+        self.assertTrue(client.connected.wait(5))
+        self.assertTrue(wait_until(lambda: self.engine_registry.stream_count() == 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Testes para o armazenamento compacto do histórico do painel
+"""
+import io
+import unittest
+from history_view import HistoryStore
+
+
+def make_result(i: int, status: str = 'OK', **extra) -> dict:
+    result = {'status': status, 'timestamp': f"2024-01-15T10:{i // 60 % 60:02d}:{i % 60:02d}.250000",
+              'ip': "192.168.224.22", 'rtt_ms': float(i) if status == 'OK' else None,
+              'ttl': 64 if status == 'OK' else None, 'bytes': 32 if status == 'OK' else None}
+    result.update(extra)
+    return result
+
+
+def format_line(record: dict) -> str:
+    if record['status'] == 'NOTE':
+        return record['text']
+    return f"{record['timestamp']} {record['ip']} {record['status']} {record['rtt_ms']}"
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Testes para o HistoryStore"""
+
+    def test_record_roundtrip(self):
+        """Testa a reconstrução dos resultados, inclusive campos raros"""
+        store = HistoryStore()
+        store.append(make_result(1))
+        store.append(make_result(2, 'ERROR', output="Ping request could not find host x"))
+        store.append(make_result(3, 'UNREACHABLE', parent="10.0.0.1"))
+        store.append(make_result(4, probe='http', http_status=200))
+        store.append(make_result(5, sent=5, received=4, loss_pct=20.0, rtt_min=1.0,
+                                 rtt_avg=2.0, rtt_max=3.0, rtt_mdev=0.5))
+        store.append_note(">> TRACE")
+
+        ok = store.record(0)
+        self.assertEqual(ok['timestamp'], "2024-01-15T10:00:01.250000")
+        self.assertEqual((ok['ip'], ok['rtt_ms'], ok['ttl'], ok['bytes']), ("192.168.224.22", 1.0, 64, 32))
+        error = store.record(1)
+        self.assertEqual(error['output'], "Ping request could not find host x")
+        self.assertIsNone(error['rtt_ms'])
+        self.assertEqual(store.record(2)['parent'], "10.0.0.1")
+        self.assertEqual((store.record(3)['probe'], store.record(3)['http_status']), ('http', 200))
+        self.assertEqual(store.record(4)['loss_pct'], 20.0)
+        self.assertEqual(store.record(5), {'status': 'NOTE', 'text': ">> TRACE"})
+
+    def test_strings_are_interned(self):
+        """Testa se IPs e saídas repetidas ocupam uma única entrada"""
+        store = HistoryStore()
+        for i in range(100):
+            store.append(make_result(i, 'ERROR', output="Request timed out."))
+        self.assertEqual(len(store._strings), 3)  # '', IP e a saída
+
+    def test_trim_keeps_last_records(self):
+        """Testa o limite de memória com descarte dos mais antigos"""
+        store = HistoryStore(max_records=100)
+        for i in range(500):
+            if i % 50 == 0:
+                store.append(make_result(i, sent=3, received=3, loss_pct=0.0, rtt_min=1.0,
+                                         rtt_avg=1.0, rtt_max=1.0, rtt_mdev=0.0))
+            else:
+                store.append(make_result(i, 'ERROR', output=f"erro {i // 100}"))
+        self.assertLessEqual(len(store), 110)
+        self.assertEqual(store.record(len(store) - 1)['output'], "erro 4")
+        self.assertEqual(store.record(len(store) - 50)['loss_pct'], 0.0)
+        self.assertNotIn("erro 0", store._strings)
+        self.assertTrue(all(index >= store._offset for index in store._extras))
+
+    def test_write_streams_formatted_lines(self):
+        """Testa a exportação formatando registro a registro"""
+        store = HistoryStore()
+        for i in range(3):
+            store.append(make_result(i))
+        store.append_note("fim")
+        output = io.StringIO()
+        self.assertEqual(store.write(output, format_line), 4)
+        self.assertEqual(output.getvalue().splitlines()[0], "2024-01-15T10:00:00.250000 192.168.224.22 OK 0.0")
+        self.assertEqual(output.getvalue().splitlines()[-1], "fim")
+        self.assertEqual(list(store.iter_lines(format_line, 1, 2)), [format_line(store.record(1))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Testes para o health-check HTTP com pool keep-alive
+"""
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http_probe import HTTPMonitor, HTTPProbe, is_http_target
+from probe_registry import ProbeRegistry
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Servidor de teste HTTP/1.1 com keep-alive"""
+
+    protocol_version = 'HTTP/1.1'
+    connections = set()
+
+    def do_GET(self):
+        StandInHandler.connections.add(self.client_address)
+        status = 500 if self.path.startswith('/erro') else 200
+        body = b'ok' if status == 200 else b'falha'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        if self.path.startswith('/fechar'):
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHTTPProbe(unittest.TestCase):
+    """Testes para o HTTPProbe e o HTTPMonitor"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        StandInHandler.connections = set()
+        StandInHandler.timeout = None
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.probe = HTTPProbe(timeout=2.0)
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        self.probe.pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_is_http_target(self):
+        """Testa o reconhecimento de URLs"""
+        self.assertTrue(is_http_target("https://mes.local/health"))
+        self.assertTrue(is_http_target("HTTP://10.0.0.1:8080/"))
+        self.assertFalse(is_http_target("10.0.0.1:8080"))
+
+    def test_keep_alive_reuses_connection(self):
+        """Testa se o segundo check reaproveita a conexão e não mede DNS/conexão"""
+        first = self.probe.check(self.base + '/health')
+        second = self.probe.check(self.base + '/health')
+
+        self.assertEqual(first['status'], 'OK')
+        self.assertEqual(first['http_status'], 200)
+        self.assertFalse(first['reused'])
+        self.assertIsNotNone(first['dns_ms'])
+        self.assertIsNotNone(first['connect_ms'])
+        self.assertIsNone(first['tls_ms'])
+        self.assertIsNotNone(first['ttfb_ms'])
+
+        self.assertEqual(second['status'], 'OK')
+        self.assertTrue(second['reused'])
+        self.assertIsNone(second['connect_ms'])
+        self.assertIsNotNone(second['ttfb_ms'])
+        self.assertEqual(len(StandInHandler.connections), 1)
+
+    def test_error_status_and_connection_close(self):
+        """Testa status HTTP de erro e resposta com Connection: close"""
+        result = self.probe.check(self.base + '/erro')
+        self.assertEqual(result['status'], 'ERROR')
+        self.assertEqual(result['http_status'], 500)
+
+        self.probe.pool.close()
+        self.probe.check(self.base + '/fechar')
+        self.assertEqual(self.probe.pool.idle_count(), 0)
+
+    def test_stale_connection_is_retried(self):
+        """Testa se uma conexão ociosa fechada pelo servidor é substituída"""
+        StandInHandler.timeout = 0.1  # Servidor fecha conexões ociosas após 100 ms
+        self.probe.check(self.base + '/health')
+        time.sleep(0.3)
+        result = self.probe.check(self.base + '/health')
+        self.assertEqual(result['status'], 'OK')
+        self.assertFalse(result['reused'])
+        self.assertEqual(len(StandInHandler.connections), 2)
+
+    def test_connection_refused(self):
+        """Testa erro de conexão"""
+        self.server.server_close()
+        result = self.probe.check(self.base + '/health')
+        self.assertEqual(result['status'], 'ERROR')
+        self.assertIsNone(result['http_status'])
+
+    def test_registry_creates_http_monitor(self):
+        """Testa se o registro usa o HTTPMonitor para URLs"""
+        registry = ProbeRegistry(http_probe=self.probe)
+        done = threading.Event()
+        results = []
+
+        def callback(result):
+            results.append(result)
+            done.set()
+
+        subscription = registry.subscribe(self.base + '/health', 1, callback)
+        self.assertIsInstance(subscription.monitor, HTTPMonitor)
+        self.assertTrue(done.wait(5))
+        subscription.stop()
+
+        self.assertEqual(results[0]['status'], 'OK')
+        self.assertEqual(results[0]['ip'], self.base + '/health')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+Testes para o relatório do histórico de pings
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from clock import VirtualClock
+from csv_logger import CSVLogger, list_segments
+from instrumentation import Histogram
+from log_report import build_report, iter_range, main, seek_to_time
+
+
+START = datetime(2024, 1, 15, 10, 0, 0)
+
+
+def ts(seconds: int) -> str:
+    return (START + timedelta(seconds=seconds)).isoformat()
+
+
+class TestLogReport(unittest.TestCase):
+    """Testes para iter_range, build_report e a linha de comando"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'ping_logs.csv')
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        shutil.rmtree(self.tmp)
+
+    def write_log(self, logger, seconds: int = 100):
+        """Dois alvos a cada segundo; 10.0.0.2 fora do ar de 40 a 49 s"""
+        for i in range(seconds):
+            logger.log(ts(i), "10.0.0.1", 1.0 + (i % 10), "OK")
+            if 40 <= i < 50:
+                logger.log(ts(i), "10.0.0.2", None, "TIMEOUT")
+            else:
+                logger.log(ts(i), "10.0.0.2", 5.0, "OK")
+
+    def test_seek_to_time(self):
+        """Testa a busca binária pelo primeiro registro do intervalo"""
+        self.write_log(CSVLogger(self.path))
+        with open(self.path, 'rb') as f:
+            seek_to_time(f, ts(37))
+            self.assertTrue(f.readline().startswith(ts(37).encode() + b',10.0.0.1'))
+            seek_to_time(f, "2000-01-01T00:00:00")
+            self.assertTrue(f.readline().startswith(ts(0).encode()))
+            seek_to_time(f, "2100-01-01T00:00:00")
+            self.assertEqual(f.readline(), b'')
+
+    def test_iter_range_limits(self):
+        """Testa os limites do intervalo"""
+        self.write_log(CSVLogger(self.path))
+        records = list(iter_range(self.path, ts(10), ts(19)))
+        self.assertEqual(len(records), 20)
+        self.assertEqual(records[0]['timestamp'], ts(10))
+        self.assertEqual(records[-1]['timestamp'], ts(19))
+
+    def test_iter_range_skips_old_segments(self):
+        """Testa a leitura através dos segmentos, pulando os anteriores ao intervalo"""
+        clock = VirtualClock(START)
+        logger = CSVLogger(self.path, rotate_interval=30, clock=clock)
+        for i in range(100):
+            clock.advance(1)
+            logger.log(ts(i), "10.0.0.1", 1.0, "OK")
+        logger.close()
+        segments = list_segments(self.path)
+        self.assertEqual(len(segments), 3)
+
+        os.remove(segments[0])  # Pulado pelo nome: a leitura não depende dele
+        records = list(iter_range(self.path, ts(35), ts(70)))
+        self.assertEqual([r['timestamp'] for r in records], [ts(i) for i in range(35, 71)])
+
+    def test_report_uptime_loss_percentiles_outages(self):
+        """Testa disponibilidade, perda, percentis e quedas"""
+        self.write_log(CSVLogger(self.path))
+        report = {target['ip']: target for target in build_report(iter_range(self.path))}
+
+        stable = report["10.0.0.1"]
+        self.assertEqual(stable['samples'], 100)
+        self.assertEqual(stable['loss_pct'], 0.0)
+        self.assertEqual(stable['uptime_pct'], 100.0)
+        self.assertEqual(stable['rtt_min'], 1.0)
+        self.assertEqual(stable['rtt_max'], 10.0)
+        self.assertAlmostEqual(stable['rtt_p50'], 5.0, delta=5.0 * 0.07)
+        self.assertEqual(stable['outages'], [])
+
+        flaky = report["10.0.0.2"]
+        self.assertEqual(flaky['loss_pct'], 10.0)
+        self.assertAlmostEqual(flaky['uptime_pct'], 100.0 * 89 / 99)
+        self.assertEqual(flaky['outages'], [{'start': ts(40), 'end': ts(50), 'duration_s': 10.0,
+                                             'samples': 10, 'recovered': True}])
+
+        self.assertEqual(build_report(iter_range(self.path), min_outage=30)[1]['outages'], [])
+        self.assertEqual([t['ip'] for t in build_report(iter_range(self.path), ips=["10.0.0.2"])], ["10.0.0.2"])
+
+    def test_deadband_log_loss_is_weighted(self):
+        """Testa a perda num log deadband: cada linha vale pelas amostras repetidas que representa"""
+        logger = CSVLogger(self.path, mode='deadband', deadband_ms=0.5)
+        # 90 s OK e 10 s fora do ar, uma amostra por segundo: só as mudanças viram linhas
+        for i in range(100):
+            if 50 <= i < 60:
+                logger.log(ts(i), "10.0.0.3", None, "TIMEOUT")
+            else:
+                logger.log(ts(i), "10.0.0.3", 2.0, "OK")
+        logger.close()
+        records = list(iter_range(self.path))
+        self.assertLess(len(records), 10)
+
+        self.assertAlmostEqual(build_report(records, interval=1.0)[0]['loss_pct'], 10.0)
+
+        # Sem interval: estimado pela queda de uma amostra (linhas a 1 s uma da outra)
+        logger = CSVLogger(self.path, mode='deadband', deadband_ms=0.5)
+        logger.log(ts(100), "10.0.0.3", None, "TIMEOUT")
+        logger.log(ts(101), "10.0.0.3", 2.0, "OK")
+        logger.close()
+        target = build_report(iter_range(self.path))[0]
+        self.assertAlmostEqual(target['loss_pct'], 100.0 * 11 / 102)
+
+    def test_cli_json(self):
+        """Testa a linha de comando com saída JSON"""
+        self.write_log(CSVLogger(self.path))
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(main(['--log', self.path, '--start', ts(45), '--ip', '10.0.0.2', '--json']), 0)
+        report = json.loads(output.getvalue())
+        self.assertEqual(report[0]['samples'], 55)
+        self.assertEqual(report[0]['outages'][0]['start'], ts(45))
+
+
+class TestHistogramSubBuckets(unittest.TestCase):
+    """Testes para os baldes lineares por oitava do Histogram"""
+
+    def test_sub_buckets_precision(self):
+        """Testa se os percentis ficam dentro do erro relativo de um sub-balde"""
+        histogram = Histogram(min_value=0.01, buckets=400, sub_buckets=16)
+        for value in range(1, 1001):
+            histogram.record(value / 10.0)
+        self.assertAlmostEqual(histogram.percentile(50), 50.0, delta=50.0 / 16)
+        self.assertAlmostEqual(histogram.percentile(99), 99.0, delta=99.0 / 16)
+
+    def test_default_is_base_two(self):
+        """Testa se o padrão mantém os baldes de base 2"""
+        histogram = Histogram()
+        self.assertEqual(histogram.upper_bound(histogram._index(3e-6)), 4e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Testes para o exportador OpenMetrics
+"""
+import unittest
+import urllib.request
+from metrics_exporter import MetricsExporter, CONTENT_TYPE
+
+
+def make_result(ip, status, rtt_ms=None):
+    """Cria um resultado no formato do PingMonitor"""
+    return {
+        'status': status,
+        'rtt_ms': rtt_ms,
+        'timestamp': '2024-01-15T10:30:45',
+        'ttl': None,
+        'bytes': None,
+        'output': '',
+        'ip': ip
+    }
+
+
+class TestMetricsExporter(unittest.TestCase):
+    """Testes para o MetricsExporter"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.exporter = MetricsExporter(port=0, refresh_interval=3600, loss_window=4,
+                                        queue_depth=lambda: 7)
+    
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        self.exporter.stop()
+    
+    def test_render_gauges_and_histogram(self):
+        """Testa RTT, perda, contagens por status e histograma"""
+        for status, rtt in [('OK', 0.8), ('OK', 12.0), ('TIMEOUT', None), ('OK', 3.0)]:
+            self.exporter.observe(make_result('192.168.224.22', status, rtt))
+        text = self.exporter.render().decode('utf-8')
+        
+        self.assertIn('monitorip_last_rtt_milliseconds{target="192.168.224.22"} 3', text)
+        self.assertIn('monitorip_loss_ratio{target="192.168.224.22"} 0.25', text)
+        self.assertIn('monitorip_probes_total{target="192.168.224.22",status="OK"} 3', text)
+        self.assertIn('monitorip_probes_total{target="192.168.224.22",status="TIMEOUT"} 1', text)
+        self.assertIn('monitorip_rtt_milliseconds_bucket{target="192.168.224.22",le="1"} 1', text)
+        self.assertIn('monitorip_rtt_milliseconds_bucket{target="192.168.224.22",le="+Inf"} 3', text)
+        self.assertIn('monitorip_probe_queue_depth 7', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+    
+    def test_loss_window_slides(self):
+        """Testa se a taxa de perda considera apenas a janela recente"""
+        for _ in range(4):
+            self.exporter.observe(make_result('8.8.8.8', 'TIMEOUT'))
+        for _ in range(4):
+            self.exporter.observe(make_result('8.8.8.8', 'OK', 10.0))
+        self.assertIn('monitorip_loss_ratio{target="8.8.8.8"} 0', self.exporter.render().decode('utf-8'))
+    
+    def test_http_serves_snapshot(self):
+        """Testa se o HTTP serve o snapshot (atualizado apenas no tick)"""
+        self.exporter.start()
+        self.exporter.observe(make_result('1.1.1.1', 'OK', 5.0))
+        url = f'http://127.0.0.1:{self.exporter.port}/metrics'
+        
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+            self.assertNotIn('1.1.1.1', response.read().decode('utf-8'))
+        
+        self.exporter.refresh()
+        with urllib.request.urlopen(url, timeout=5) as response:
+            self.assertIn('target="1.1.1.1"', response.read().decode('utf-8'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Testes para a vivacidade passiva pela tabela de vizinhos
+"""
+import socket
+import struct
+import sys
+import unittest
+from clock import VirtualClock
+from neighbor_table import NeighborTable, parse_netlink_neighbors, parse_proc_arp, read_neighbors
+from test_ping_monitor import FakePingMonitor
+
+
+PROC_ARP = (
+    "IP address       HW type     Flags       HW address            Mask     Device\n"
+    "192.168.224.22   0x1         0x2         00:11:22:33:44:55     *        eth0\n"
+    "192.168.224.23   0x1         0x0         00:00:00:00:00:00     *        eth0\n"
+)
+
+
+def netlink_neighbor(ip: str, state: int) -> bytes:
+    """Monta uma mensagem RTM_NEWNEIGH com o atributo NDA_DST"""
+    address = socket.inet_aton(ip)
+    attr = struct.pack('=HH', 4 + len(address), 1) + address
+    body = struct.pack('=BBHiHBB', socket.AF_INET, 0, 0, 2, state, 0, 1) + attr
+    return struct.pack('=IHHII', 16 + len(body), 28, 2, 1, 0) + body
+
+
+class TestNeighborTable(unittest.TestCase):
+    """Testes para a NeighborTable e a integração com o PingMonitor"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.clock = VirtualClock()
+        self.table_data = {'192.168.224.22': 'REACHABLE', '192.168.224.23': 'STALE'}
+        self.reads = 0
+
+        def reader():
+            self.reads += 1
+            return dict(self.table_data)
+
+        self.table = NeighborTable(max_age=1.0, reader=reader, clock=self.clock)
+
+    def test_parse_netlink_dump(self):
+        """Testa a interpretação das mensagens netlink"""
+        data = netlink_neighbor('192.168.224.22', 0x02) + netlink_neighbor('192.168.224.23', 0x20)
+        data += struct.pack('=IHHII', 20, 3, 2, 1, 0) + b'\0' * 4  # NLMSG_DONE
+        self.assertEqual(parse_netlink_neighbors(data),
+                         {'192.168.224.22': 'REACHABLE', '192.168.224.23': 'FAILED'})
+
+    def test_parse_proc_arp(self):
+        """Testa o /proc/net/arp (sem estado NUD: nada dispensa o ping)"""
+        self.assertEqual(parse_proc_arp(PROC_ARP),
+                         {'192.168.224.22': 'STALE', '192.168.224.23': 'INCOMPLETE'})
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "Tabela de vizinhos somente no Linux")
+    def test_read_kernel_table(self):
+        """Testa a leitura real da tabela do kernel"""
+        self.assertIsInstance(read_neighbors(), dict)
+
+    def test_one_read_serves_many_lookups(self):
+        """Testa se as consultas dentro de max_age usam a mesma leitura"""
+        for _ in range(100):
+            self.table.lookup('192.168.224.22')
+            self.table.lookup('192.168.224.23')
+        self.assertEqual(self.reads, 1)
+        self.clock.advance(1.0)
+        self.table.lookup('192.168.224.22')
+        self.assertEqual(self.reads, 2)
+
+    def test_lookup_result(self):
+        """Testa o resultado passivo no formato do PingMonitor"""
+        result = self.table.lookup('192.168.224.22')
+        self.assertEqual(result['status'], 'OK')
+        self.assertEqual(result['source'], 'neighbor')
+        self.assertEqual(result['ip'], '192.168.224.22')
+        self.assertIsNone(self.table.lookup('192.168.224.23'))
+        self.assertIsNone(self.table.lookup('8.8.8.8'))
+
+    def test_permanent_entry_needs_ping(self):
+        """Testa se uma entrada estática (PERMANENT) não dispensa o ping ativo"""
+        self.table_data['192.168.224.30'] = 'PERMANENT'
+        self.assertIsNone(self.table.lookup('192.168.224.30'))
+
+    def test_monitor_pings_only_unconfirmed_hosts(self):
+        """Testa se o ping ativo só é usado para vizinhos não confirmados"""
+        pings = []
+
+        class CountingMonitor(FakePingMonitor):
+            def _ping(self):
+                pings.append(self.ip)
+                return super()._ping()
+
+        live = CountingMonitor('192.168.224.22', clock=self.clock, neighbors=self.table)
+        stale = CountingMonitor('192.168.224.23', clock=self.clock, neighbors=self.table)
+        self.assertEqual(live._next_result()['source'], 'neighbor')
+        self.assertNotIn('source', stale._next_result())
+        self.assertEqual(pings, ['192.168.224.23'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Testes para o diagnóstico de caminho (MTR)
+"""
+import io
+import sys
+import threading
+import unittest
+from contextlib import redirect_stdout
+from clock import VirtualClock
+from path_probe import HopStats, PathDiagnostics, PathProber, format_hops
+
+
+class FakeProber:
+    """Prober que não envia pacotes (registra os alvos diagnosticados)"""
+
+    def __init__(self):
+        self.targets = []
+
+    def trace(self, target, rounds=5):
+        self.targets.append(target)
+        stats = HopStats(1)
+        stats.add(target, 1.0)
+        return [stats.to_dict()]
+
+
+class TestPathProbe(unittest.TestCase):
+    """Testes para o PathProber e o PathDiagnostics"""
+
+    def test_hop_stats(self):
+        """Testa perda, média e desvio acumulados por salto"""
+        stats = HopStats(3)
+        for rtt in (10.0, None, 20.0, 30.0):
+            stats.add('10.0.0.1', rtt)
+        hop = stats.to_dict()
+        self.assertEqual(hop['sent'], 4)
+        self.assertEqual(hop['received'], 3)
+        self.assertAlmostEqual(hop['loss_pct'], 25.0)
+        self.assertAlmostEqual(hop['avg_ms'], 20.0)
+        self.assertAlmostEqual(hop['stdev_ms'], 10.0)
+        self.assertEqual((hop['best_ms'], hop['worst_ms']), (10.0, 30.0))
+
+    @unittest.skipUnless(PathProber.available(), "IP_RECVERR indisponível (somente Linux)")
+    def test_trace_loopback(self):
+        """Testa uma rodada real contra o 127.0.0.1 (destino no primeiro salto)"""
+        prober = PathProber(max_hops=8, timeout=1.0)
+        hops = prober.probe_round('127.0.0.1')
+        self.assertEqual(len(hops), 1)
+        self.assertEqual(hops[0]['address'], '127.0.0.1')
+        self.assertTrue(hops[0]['reached'])
+
+        report = prober.trace('127.0.0.1', rounds=3, interval=0.01)
+        self.assertEqual(len(report), 1)
+        self.assertEqual(report[0]['sent'], 3)
+        self.assertEqual(report[0]['received'], 3)
+        self.assertIn('127.0.0.1', format_hops(report)[0])
+
+    def test_diagnostics_trigger_on_status_change(self):
+        """Testa se o diagnóstico roda só na mudança de status e respeita o cooldown"""
+        clock = VirtualClock()
+        prober = FakeProber()
+        reported = threading.Event()
+        diagnostics = PathDiagnostics(prober=prober, cooldown=60, clock=clock,
+                                      on_report=lambda ip, hops: reported.set())
+
+        diagnostics.observe({'ip': '10.0.0.1', 'status': 'OK'})
+        diagnostics.observe({'ip': '10.0.0.1', 'status': 'OK'})
+        self.assertEqual(prober.targets, [])
+
+        diagnostics.observe({'ip': '10.0.0.1', 'status': 'TIMEOUT'})
+        self.assertTrue(reported.wait(5))
+        reported.clear()
+
+        # Dentro do cooldown: nova mudança não dispara outro diagnóstico
+        diagnostics.observe({'ip': '10.0.0.1', 'status': 'OK'})
+        # Probes TCP/HTTP e resultados sintéticos são ignorados
+        diagnostics.observe({'ip': 'db:5432', 'status': 'OK', 'probe': 'tcp'})
+        diagnostics.observe({'ip': 'db:5432', 'status': 'ERROR', 'probe': 'tcp'})
+        self.assertEqual(prober.targets, ['10.0.0.1'])
+
+        clock.advance(60)
+        diagnostics.observe({'ip': '10.0.0.1', 'status': 'TIMEOUT'})
+        self.assertTrue(reported.wait(5))
+        self.assertEqual(prober.targets, ['10.0.0.1', '10.0.0.1'])
+        self.assertIn('10.0.0.1', diagnostics.reports)
+
+    def test_available_only_on_linux(self):
+        """Testa se fora do Linux o diagnóstico fica desligado"""
+        platform = sys.platform
+        try:
+            sys.platform = 'win32'
+            self.assertFalse(PathProber.available())
+        finally:
+            sys.platform = platform
+
+    def test_unexpected_error_is_logged(self):
+        """Testa se um erro inesperado da sonda é registrado e libera o alvo"""
+        class BrokenProber:
+            def trace(self, target, rounds=5):
+                raise AttributeError("'socket' object has no attribute 'recvmsg'")
+
+        diagnostics = PathDiagnostics(prober=BrokenProber())
+        output = io.StringIO()
+        with redirect_stdout(output):
+            diagnostics._running.add('10.0.0.1')
+            diagnostics._run('10.0.0.1')
+        self.assertIn('recvmsg', output.getvalue())
+        self.assertNotIn('10.0.0.1', diagnostics._running)
+        self.assertNotIn('10.0.0.1', diagnostics.reports)
+
+
+if __name__ == '__main__':
+    unittest.main()
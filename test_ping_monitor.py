@@ -4,8 +4,72 @@ Testes básicos para o Monitor de IPs
 import unittest
 import time
 import os
-from ping_monitor import PingMonitor
+import platform
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from ping_monitor import PingMonitor, stop_all, phase_offset, parse_burst_stats
 from csv_logger import CSVLogger
+from clock import VirtualClock
+from instrumentation import Histogram, ProbeInstrumentation
+from adaptive_timeout import TimeoutEstimator
+from topology import DependencyTracker
+from ip_catalog import IPCatalog
+
+
+LINUX_REPLY = (
+    "PING 8.8.8.8 (8.8.8.8) 56(84) bytes of data.\n"
+    "64 bytes from 8.8.8.8: icmp_seq=1 ttl=117 time=12.3 ms\n\n"
+    "--- 8.8.8.8 ping statistics ---\n"
+    "1 packets transmitted, 1 received, 0% packet loss, time 0ms\n"
+    "rtt min/avg/max/mdev = 12.345/12.345/12.345/0.000 ms\n"
+)
+
+LINUX_BURST = (
+    "PING 10.0.0.1 (10.0.0.1) 56(84) bytes of data.\n"
+    "64 bytes from 10.0.0.1: icmp_seq=1 ttl=64 time=1.00 ms\n"
+    "64 bytes from 10.0.0.1: icmp_seq=2 ttl=64 time=3.00 ms\n"
+    "64 bytes from 10.0.0.1: icmp_seq=4 ttl=64 time=2.00 ms\n\n"
+    "--- 10.0.0.1 ping statistics ---\n"
+    "4 packets transmitted, 3 received, 25% packet loss, time 603ms\n"
+    "rtt min/avg/max/mdev = 1.000/2.000/3.000/0.816 ms\n"
+)
+
+
+class FakePingMonitor(PingMonitor):
+    """PingMonitor que não executa ping real (resposta imediata com RTT fixo)"""
+    
+    def _ping(self):
+        return {
+            'status': 'OK',
+            'rtt_ms': 1.0,
+            'timestamp': self.clock.now().isoformat(),
+            'ttl': 64,
+            'bytes': 64,
+            'output': '',
+            'ip': self.ip
+        }
+
+
+class FakePingPath:
+    """Coloca um script 'ping' falso no início do PATH (apenas Linux/Mac)"""
+    
+    def __init__(self, script_body: str):
+        self.script_body = script_body
+    
+    def __enter__(self):
+        self.fake_bin = tempfile.mkdtemp()
+        self.old_path = os.environ.get('PATH', '')
+        script = os.path.join(self.fake_bin, 'ping')
+        with open(script, 'w') as f:
+            f.write("#!/bin/sh\n" + self.script_body + "\n")
+        os.chmod(script, 0o755)
+        os.environ['PATH'] = self.fake_bin + os.pathsep + self.old_path
+        return self
+    
+    def __exit__(self, *exc):
+        os.environ['PATH'] = self.old_path
+        shutil.rmtree(self.fake_bin)
 
 
 class TestCSVLogger(unittest.TestCase):
@@ -60,9 +124,9 @@ class TestPingMonitor(unittest.TestCase):
         """Configuração antes de cada teste"""
         self.results = []
     
-    def ping_callback(self, status, rtt_ms, timestamp):
+    def ping_callback(self, ping_result):
         """Callback para coletar resultados de ping"""
-        self.results.append((status, rtt_ms, timestamp))
+        self.results.append((ping_result['status'], ping_result['rtt_ms'], ping_result['timestamp']))
     
     def test_monitor_creation(self):
         """Testa criação do monitor"""
@@ -74,19 +138,20 @@ class TestPingMonitor(unittest.TestCase):
     
     def test_monitor_start_stop(self):
         """Testa iniciar e parar o monitor"""
-        monitor = PingMonitor("8.8.8.8", interval=1, callback=self.ping_callback)
+        clock = VirtualClock()
+        monitor = FakePingMonitor("8.8.8.8", interval=1, callback=self.ping_callback, clock=clock)
         
         monitor.start()
         self.assertTrue(monitor.is_running)
         self.assertFalse(monitor.is_paused)
         
-        time.sleep(2)  # Aguarda 2 segundos para ter pelo menos um ping
+        clock.advance(2)  # Avança 2 segundos virtuais
         
         monitor.stop()
         self.assertFalse(monitor.is_running)
         
-        # Verifica se houve pelo menos um resultado
-        self.assertGreater(len(self.results), 0)
+        # Ping imediato + um a cada segundo
+        self.assertEqual(len(self.results), 3)
         
         # Verifica formato do resultado
         status, rtt_ms, timestamp = self.results[0]
@@ -95,16 +160,17 @@ class TestPingMonitor(unittest.TestCase):
     
     def test_monitor_pause_resume(self):
         """Testa pausar e retomar o monitor"""
-        monitor = PingMonitor("8.8.8.8", interval=1, callback=self.ping_callback)
+        clock = VirtualClock()
+        monitor = FakePingMonitor("8.8.8.8", interval=1, callback=self.ping_callback, clock=clock)
         
         monitor.start()
-        time.sleep(1)
+        clock.advance(1)
         
         initial_count = len(self.results)
         
         monitor.pause()
         self.assertTrue(monitor.is_paused)
-        time.sleep(2)  # Durante pausa, não deve fazer ping
+        clock.advance(2)  # Durante pausa, não deve fazer ping
         
         paused_count = len(self.results)
         # Não deve ter novos resultados durante pausa
@@ -112,12 +178,53 @@ class TestPingMonitor(unittest.TestCase):
         
         monitor.resume()
         self.assertFalse(monitor.is_paused)
-        time.sleep(2)  # Após retomar, deve fazer ping
+        clock.advance(2)  # Após retomar, deve fazer ping
         
         monitor.stop()
         # Deve ter novos resultados após retomar
         self.assertGreater(len(self.results), paused_count)
     
+    def test_monitor_virtual_soak_24h(self):
+        """Testa 24 horas de monitoramento em tempo virtual"""
+        clock = VirtualClock(start=datetime(2024, 1, 15))
+        monitors = [
+            FakePingMonitor(f"10.0.0.{i}", interval=60, callback=self.ping_callback, clock=clock)
+            for i in range(1, 4)
+        ]
+        for monitor in monitors:
+            monitor.start()
+        
+        clock.advance(24 * 3600)
+        
+        for monitor in monitors:
+            monitor.stop()
+        
+        # 1 ping por minuto por monitor (incluindo o ping inicial)
+        self.assertEqual(len(self.results), 3 * (24 * 60 + 1))
+        self.assertEqual(self.results[-1][2], "2024-01-16T00:00:00")
+    
+    @unittest.skipIf(platform.system().lower() == 'windows', "Usa script de shell como ping falso")
+    def test_stop_all_kills_inflight_pings(self):
+        """Testa se stop_all cancela pings bloqueados rapidamente"""
+        with FakePingPath("exec sleep 10"):
+            monitors = [PingMonitor(f"10.0.0.{i}", interval=1, callback=self.ping_callback) for i in range(10)]
+            for monitor in monitors:
+                monitor.start()
+            time.sleep(0.3)  # Aguarda os pings começarem
+            processes = [m._process for m in monitors]
+            
+            started = time.monotonic()
+            stop_all(monitors, timeout=1)
+            elapsed = time.monotonic() - started
+        
+        self.assertLess(elapsed, 0.5)
+        self.assertTrue(all(not m.thread.is_alive() for m in monitors))
+        for process in processes:
+            if process is not None:
+                self.assertIsNotNone(process.wait(timeout=1))
+        # Pings cancelados não chegam ao callback
+        self.assertEqual(self.results, [])
+    
     def test_monitor_invalid_ip(self):
         """Testa monitor com IP inválido"""
         monitor = PingMonitor("999.999.999.999", interval=1, callback=self.ping_callback)
@@ -132,6 +239,367 @@ class TestPingMonitor(unittest.TestCase):
         self.assertIn(status, ['ERROR', 'TIMEOUT'])
 
 
+class TestPingParsing(unittest.TestCase):
+    """Testes para a interpretação da saída do ping"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.monitor = PingMonitor("8.8.8.8")
+    
+    def test_parse_linux_reply(self):
+        """Testa resposta do ping no Linux"""
+        result = self.monitor._parse_output(LINUX_REPLY, 'linux', 0, "2024-01-15T10:30:45")
+        self.assertEqual(result['status'], 'OK')
+        self.assertAlmostEqual(result['rtt_ms'], 12.3)
+        self.assertEqual(result['ttl'], 117)
+        self.assertEqual(result['bytes'], 64)
+    
+    def test_parse_windows_reply(self):
+        """Testa resposta do ping no Windows (português)"""
+        output = "Resposta de 192.168.224.22: bytes=32 tempo=3ms TTL=128\n"
+        result = self.monitor._parse_output(output, 'windows', 0, "2024-01-15T10:30:45")
+        self.assertEqual(result['status'], 'OK')
+        self.assertEqual(result['rtt_ms'], 3.0)
+        self.assertEqual(result['ttl'], 128)
+        self.assertEqual(result['bytes'], 32)
+    
+    def test_parse_timeout_and_error(self):
+        """Testa timeout e erro sem saída"""
+        result = self.monitor._parse_output("Request timed out.\n", 'windows', 1, "2024-01-15T10:30:45")
+        self.assertEqual(result['status'], 'TIMEOUT')
+        result = self.monitor._parse_output("", 'linux', 2, "2024-01-15T10:30:45")
+        self.assertEqual(result['status'], 'ERROR')
+        self.assertEqual(result['output'], 'Returncode: 2')
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Testes para a instrumentação por etapa"""
+    
+    def test_histogram_percentiles(self):
+        """Testa percentis aproximados do histograma"""
+        histogram = Histogram(min_value=0.001)
+        for value in [0.001] * 90 + [0.1] * 10:
+            histogram.record(value)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 0.001)
+        self.assertLessEqual(histogram.percentile(99), 0.1)
+        self.assertGreater(histogram.percentile(99), 0.05)
+    
+    @unittest.skipIf(platform.system().lower() == 'windows', "Usa script de shell como ping falso")
+    def test_ping_records_stages(self):
+        """Testa se o ping registra spawn, wait, decode e parse"""
+        with FakePingPath("printf '%s'" % LINUX_REPLY.replace('%', '%%').replace('\n', '\\n')):
+            instrumentation = ProbeInstrumentation()
+            monitor = PingMonitor("8.8.8.8", instrumentation=instrumentation)
+            result = monitor._ping()
+        
+        self.assertEqual(result['status'], 'OK')
+        snapshot = instrumentation.snapshot()
+        for stage in ('spawn', 'wait', 'decode', 'parse'):
+            self.assertEqual(snapshot[stage]['count'], 1)
+        self.assertIn('spawn', instrumentation.dump())
+
+
+class TestAdaptiveTimeout(unittest.TestCase):
+    """Testes para o timeout adaptativo"""
+    
+    def test_initial_timeout_is_ceiling(self):
+        """Testa se sem histórico o timeout é o teto (5 segundos)"""
+        self.assertEqual(TimeoutEstimator().timeout(), 5.0)
+    
+    def test_lan_host_converges_to_floor(self):
+        """Testa se hosts com RTT sub-ms chegam ao piso"""
+        estimator = TimeoutEstimator(floor=0.05, ceiling=5.0)
+        for _ in range(20):
+            estimator.observe(0.0005)
+        self.assertAlmostEqual(estimator.timeout(), 0.05)
+    
+    def test_jittery_host_uses_variance(self):
+        """Testa se a variação do RTT aumenta o timeout"""
+        estimator = TimeoutEstimator()
+        for rtt in [0.1, 0.3] * 10:
+            estimator.observe(rtt)
+        self.assertGreater(estimator.timeout(), 0.3)
+        self.assertLess(estimator.timeout(), 5.0)
+    
+    def test_backoff_reaches_ceiling(self):
+        """Testa se, sem limite explícito, timeouts seguidos levam um alvo no piso até o teto"""
+        estimator = TimeoutEstimator(floor=0.05, ceiling=5.0)
+        estimator.observe(0.0005)
+        for _ in range(10):
+            estimator.on_timeout()
+        self.assertAlmostEqual(estimator.timeout(), 5.0)
+    
+    def test_backoff_is_bounded(self):
+        """Testa se timeouts seguidos dobram o timeout até o limite"""
+        estimator = TimeoutEstimator(floor=0.05, max_backoff=4)
+        estimator.observe(0.0005)
+        for _ in range(10):
+            estimator.on_timeout()
+        self.assertAlmostEqual(estimator.timeout(), 0.2)
+        estimator.observe(0.0005)
+        self.assertAlmostEqual(estimator.timeout(), 0.05)
+    
+    def test_command_uses_timeout(self):
+        """Testa o timeout no comando de cada sistema"""
+        monitor = PingMonitor("192.168.224.22")
+        monitor.fractional_wait = True
+        self.assertEqual(monitor._build_command('linux', 0.05), ['ping', '-c', '1', '-W', '0.05', '192.168.224.22'])
+        self.assertEqual(monitor._build_command('linux', 5.0), ['ping', '-c', '1', '-W', '5', '192.168.224.22'])
+        self.assertEqual(monitor._build_command('windows', 0.05), ['ping', '-n', '1', '-w', '50', '192.168.224.22'])
+        # iputils antigo: -W só aceita segundos inteiros
+        monitor.fractional_wait = False
+        self.assertEqual(monitor._build_command('linux', 0.05), ['ping', '-c', '1', '-W', '1', '192.168.224.22'])
+        self.assertEqual(monitor._build_command('linux', 1.2), ['ping', '-c', '1', '-W', '2', '192.168.224.22'])
+    
+    def test_linux_lost_echo_backs_off(self):
+        """Testa se o eco perdido no Linux (ERROR sem texto de timeout) aumenta o timeout"""
+        output = (
+            "PING 10.0.0.9 (10.0.0.9) 56(84) bytes of data.\n\n"
+            "--- 10.0.0.9 ping statistics ---\n"
+            "1 packets transmitted, 0 received, 100% packet loss, time 0ms\n"
+        )
+        monitor = PingMonitor("10.0.0.9")
+        monitor.timeout_estimator.observe(0.001)
+        before = monitor.timeout_estimator.timeout()
+        result = monitor._parse_output(output, 'linux', 1, "2024-01-15T10:30:45")
+        self.assertEqual(result['status'], 'ERROR')
+        monitor._update_timeout(result)
+        self.assertGreater(monitor.timeout_estimator.timeout(), before)
+    
+    def test_monitor_updates_estimator(self):
+        """Testa se os resultados do ping alimentam o estimador"""
+        monitor = PingMonitor("192.168.224.22")
+        monitor._update_timeout(monitor._parse_output(LINUX_REPLY, 'linux', 0, "2024-01-15T10:30:45"))
+        self.assertLess(monitor.timeout_estimator.timeout(), 5.0)
+        self.assertIsNone(PingMonitor("8.8.8.8", adaptive_timeout=False).timeout_estimator)
+
+
+class TestDependencySuppression(unittest.TestCase):
+    """Testes para a supressão de pings de filhos com o pai fora do ar"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.catalog_file = "test_ip_catalog.json"
+        self.tracker = DependencyTracker({"192.168.224.22": "192.168.224.1", "192.168.224.1": "10.0.0.1"})
+    
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        if os.path.exists(self.catalog_file):
+            os.remove(self.catalog_file)
+    
+    def _result(self, ip, status):
+        return {'ip': ip, 'status': status, 'rtt_ms': None, 'timestamp': '', 'ttl': None, 'bytes': None, 'output': ''}
+    
+    def test_catalog_topology(self):
+        """Testa entradas com pai no catálogo (por nome ou IP)"""
+        catalog = IPCatalog(self.catalog_file)
+        catalog.add("Gateway Planta", "192.168.224.1")
+        catalog.add("MES DB", "192.168.224.24", parent="Gateway Planta")
+        catalog.add("MES APLICATION", "192.168.224.22", parent="192.168.224.1")
+        
+        reloaded = IPCatalog(self.catalog_file)
+        self.assertEqual(reloaded.get_ip("MES DB"), "192.168.224.24")
+        self.assertEqual(reloaded.get_parent("MES DB"), "192.168.224.1")
+        self.assertIn(("MES DB", "192.168.224.24"), reloaded.get_all())
+        self.assertEqual(reloaded.get_topology()["192.168.224.22"], "192.168.224.1")
+        
+        self.assertTrue(reloaded.set_parent("MES DB", None))
+        self.assertIsNone(reloaded.get_parent("MES DB"))
+        self.assertEqual(reloaded.catalog["MES DB"], "192.168.224.24")
+    
+    def test_parent_confirmed_down(self):
+        """Testa se o pai só é considerado fora do ar após falhas seguidas"""
+        self.tracker.observe(self._result("192.168.224.1", "TIMEOUT"))
+        self.assertIsNone(self.tracker.blocking_parent("192.168.224.22"))
+        self.tracker.observe(self._result("192.168.224.1", "TIMEOUT"))
+        self.assertEqual(self.tracker.blocking_parent("192.168.224.22"), "192.168.224.1")
+        self.tracker.observe(self._result("192.168.224.1", "OK"))
+        self.assertIsNone(self.tracker.blocking_parent("192.168.224.22"))
+    
+    def test_grandparent_down_blocks_child(self):
+        """Testa se a queda de um ancestral mais distante também bloqueia"""
+        for _ in range(2):
+            self.tracker.observe(self._result("10.0.0.1", "ERROR"))
+        self.assertEqual(self.tracker.blocking_parent("192.168.224.22"), "10.0.0.1")
+    
+    def test_child_not_pinged_while_parent_down(self):
+        """Testa se o filho não é pingado e reporta UNREACHABLE periodicamente"""
+        pings = []
+        
+        class CountingMonitor(FakePingMonitor):
+            def _ping(self):
+                pings.append(self.ip)
+                return super()._ping()
+        
+        for _ in range(2):
+            self.tracker.observe(self._result("192.168.224.1", "TIMEOUT"))
+        
+        results = []
+        clock = VirtualClock()
+        monitor = CountingMonitor("192.168.224.22", interval=1, callback=results.append,
+                                  clock=clock, dependency=self.tracker)
+        monitor.start()
+        clock.advance(11)  # 12 ciclos
+        
+        self.assertEqual(pings, [])
+        self.assertEqual([r['status'] for r in results], ['UNREACHABLE', 'UNREACHABLE'])
+        self.assertEqual(results[0]['parent'], "192.168.224.1")
+        
+        # Pai volta: filho volta a ser pingado no ciclo seguinte
+        self.tracker.observe(self._result("192.168.224.1", "OK"))
+        clock.advance(1)
+        monitor.stop()
+        self.assertEqual(pings, ["192.168.224.22"])
+        self.assertEqual(results[-1]['status'], 'OK')
+
+
+class TestPhaseSpread(unittest.TestCase):
+    """Testes para o espalhamento de fase dos pings"""
+    
+    def test_phase_offset_is_deterministic(self):
+        """Testa se a fase depende só do alvo e do intervalo"""
+        self.assertEqual(phase_offset("192.168.224.22", 5), phase_offset("192.168.224.22", 5))
+        self.assertNotEqual(phase_offset("192.168.224.22", 5), phase_offset("192.168.224.24", 5))
+        self.assertTrue(0 <= phase_offset("8.8.8.8", 5) < 5)
+    
+    def test_monitors_spread_across_interval(self):
+        """Testa se muitos alvos iniciados juntos não pingam em rajada"""
+        clock = VirtualClock(start=datetime(2024, 1, 15))
+        start_ts = clock.now().timestamp()
+        times = {}
+        
+        def callback(result):
+            times.setdefault(result['ip'], []).append(
+                datetime.fromisoformat(result['timestamp']).timestamp() - start_ts)
+        
+        monitors = [
+            FakePingMonitor(f"10.0.{i // 256}.{i % 256}", interval=10, callback=callback,
+                            clock=clock, phase_spread=True)
+            for i in range(200)
+        ]
+        for monitor in monitors:
+            monitor.start()
+        clock.advance(30)
+        for monitor in monitors:
+            monitor.stop()
+        
+        # Cada alvo pinga na sua fase, uma vez por intervalo, sem derivar
+        for monitor in monitors:
+            offset = phase_offset(monitor.ip, 10)
+            samples = times[monitor.ip]
+            self.assertGreaterEqual(len(samples), 3)
+            for k, t in enumerate(samples):
+                self.assertAlmostEqual(t, offset + 10 * k, places=3)
+        
+        # Primeira rodada distribuída pelo intervalo (nenhum segundo com mais de 15% dos pings)
+        per_second = [0] * 10
+        for samples in times.values():
+            per_second[int(samples[0])] += 1
+        self.assertLess(max(per_second), 30)
+
+    
+    def test_backward_clock_step_keeps_probing(self):
+        """Testa se um ajuste do relógio para trás não suspende os pings pelo tamanho do ajuste"""
+        clock = VirtualClock(start=datetime(2024, 1, 15))
+        monitor = FakePingMonitor("192.168.224.22", interval=10, clock=clock, phase_spread=True)
+        offset = phase_offset(monitor.ip, 10)
+        self.assertLessEqual(monitor._delay_to_next_slot(), 10)
+        
+        clock._start -= timedelta(hours=1)  # Relógio de parede volta uma hora
+        delay = monitor._delay_to_next_slot()
+        self.assertLessEqual(delay, 10)
+        self.assertAlmostEqual((clock.now().timestamp() + delay - offset) % 10, 0, places=3)
+
+
+class TestBurst(unittest.TestCase):
+    """Testes para a rajada de ecos por ciclo"""
+    
+    def test_parse_linux_burst(self):
+        """Testa as estatísticas de uma rajada com perda no Linux"""
+        stats = parse_burst_stats(LINUX_BURST, 'linux', 4)
+        self.assertEqual(stats['sent'], 4)
+        self.assertEqual(stats['received'], 3)
+        self.assertAlmostEqual(stats['loss_pct'], 25.0)
+        self.assertEqual((stats['rtt_min'], stats['rtt_avg'], stats['rtt_max']), (1.0, 2.0, 3.0))
+        self.assertAlmostEqual(stats['rtt_mdev'], 0.816, places=3)
+    
+    def test_parse_windows_burst(self):
+        """Testa as estatísticas de uma rajada no Windows (português)"""
+        output = (
+            "Resposta de 192.168.224.22: bytes=32 tempo=3ms TTL=128\n"
+            "Esgotado o tempo limite do pedido.\n"
+            "Resposta de 192.168.224.22: bytes=32 tempo<1ms TTL=128\n"
+            "Resposta de 192.168.224.22: Host de destino inacessível.\n\n"
+            "Estatísticas do Ping para 192.168.224.22:\n"
+            "    Pacotes: Enviados = 4, Recebidos = 3, Perdidos = 1 (25% de perda),\n"
+        )
+        stats = parse_burst_stats(output, 'windows', 4)
+        self.assertEqual(stats['sent'], 4)
+        self.assertEqual(stats['received'], 2)
+        self.assertAlmostEqual(stats['loss_pct'], 50.0)
+        self.assertEqual(stats['rtt_min'], 0.5)
+        self.assertEqual(stats['rtt_max'], 3.0)
+    
+    def test_windows_burst_all_unreachable(self):
+        """Testa se uma rajada sem nenhuma resposta com tempo não é OK"""
+        output = (
+            "Pinging 10.0.0.9 with 32 bytes of data:\n"
+            "Reply from 10.0.0.1: Destination host unreachable.\n"
+            "Reply from 10.0.0.1: Destination host unreachable.\n"
+            "Reply from 10.0.0.1: Destination host unreachable.\n\n"
+            "Ping statistics for 10.0.0.9:\n"
+            "    Packets: Sent = 3, Received = 3, Lost = 0 (0% loss),\n"
+        )
+        monitor = PingMonitor("10.0.0.9", burst=3)
+        result = monitor._parse_output(output, 'windows', 0, "2024-01-15T10:30:45")
+        monitor._apply_burst_stats(result, output, 'windows')
+        self.assertEqual(result['status'], 'TIMEOUT')
+        self.assertIsNone(result['rtt_ms'])
+        self.assertEqual(result['received'], 0)
+        self.assertEqual(result['loss_pct'], 100.0)
+    
+    def test_burst_deadline_covers_lost_echoes(self):
+        """Testa se o prazo do processo cobre todos os ecos esgotando o timeout"""
+        self.assertEqual(PingMonitor("10.0.0.1")._deadline('linux', 5.0), 10.0)
+        monitor = PingMonitor("10.0.0.1", burst=5)
+        self.assertGreaterEqual(monitor._deadline('windows', 2.0), 5 * 2.0 + 4 * 1.0)
+    
+    def test_burst_command(self):
+        """Testa a quantidade de ecos e o espaçamento no comando"""
+        monitor = PingMonitor("192.168.224.22", burst=5, burst_spacing=0.2)
+        self.assertEqual(monitor._build_command('linux', 1.0),
+                         ['ping', '-c', '5', '-i', '0.2', '-W', '1', '192.168.224.22'])
+        self.assertEqual(monitor._build_command('windows', 1.0),
+                         ['ping', '-n', '5', '-w', '1000', '192.168.224.22'])
+    
+    @unittest.skipIf(platform.system() == 'Windows', "Script de ping falso requer shell POSIX")
+    def test_burst_cycle_single_spawn(self):
+        """Testa se um ciclo com rajada gera um único resultado agregado"""
+        spawns = tempfile.mktemp()
+        script = "echo x >> %s\nprintf '%s'" % (spawns, LINUX_BURST.replace('%', '%%').replace('\n', '\\n'))
+        
+        class CountingLimiter:
+            tokens = []
+            
+            def acquire(self, target, stop_event=None, tokens=1):
+                self.tokens.append(tokens)
+                return True
+        
+        limiter = CountingLimiter()
+        with FakePingPath(script):
+            monitor = PingMonitor("10.0.0.1", burst=4, rate_limiter=limiter)
+            result = monitor._next_result()
+        
+        with open(spawns) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        os.remove(spawns)
+        self.assertEqual(limiter.tokens, [4])
+        self.assertEqual(result['status'], 'OK')
+        self.assertAlmostEqual(result['rtt_ms'], 2.0)
+        self.assertAlmostEqual(result['loss_pct'], 25.0)
+
+
 class TestIntegration(unittest.TestCase):
     """Testes de integração"""
     
@@ -141,11 +609,10 @@ class TestIntegration(unittest.TestCase):
         self.logger = CSVLogger(self.test_file)
         self.results = []
     
-    def ping_callback(self, status, rtt_ms, timestamp):
+    def ping_callback(self, ping_result):
         """Callback que salva no logger"""
-        ip = "8.8.8.8"
-        self.logger.log(timestamp, ip, rtt_ms, status)
-        self.results.append((status, rtt_ms, timestamp))
+        self.logger.log(ping_result['timestamp'], ping_result['ip'], ping_result['rtt_ms'], ping_result['status'])
+        self.results.append((ping_result['status'], ping_result['rtt_ms'], ping_result['timestamp']))
     
     def tearDown(self):
         """Limpeza após cada teste"""
@@ -154,10 +621,11 @@ class TestIntegration(unittest.TestCase):
     
     def test_monitor_with_logger(self):
         """Testa integração entre monitor e logger"""
-        monitor = PingMonitor("8.8.8.8", interval=1, callback=self.ping_callback)
+        clock = VirtualClock()
+        monitor = FakePingMonitor("8.8.8.8", interval=1, callback=self.ping_callback, clock=clock)
         
         monitor.start()
-        time.sleep(2)
+        clock.advance(2)
         monitor.stop()
         
         # Verifica se há resultados
@@ -184,6 +652,12 @@ def run_tests():
     # Adiciona testes
     suite.addTests(loader.loadTestsFromTestCase(TestCSVLogger))
     suite.addTests(loader.loadTestsFromTestCase(TestPingMonitor))
+    suite.addTests(loader.loadTestsFromTestCase(TestPingParsing))
+    suite.addTests(loader.loadTestsFromTestCase(TestInstrumentation))
+    suite.addTests(loader.loadTestsFromTestCase(TestAdaptiveTimeout))
+    suite.addTests(loader.loadTestsFromTestCase(TestDependencySuppression))
+    suite.addTests(loader.loadTestsFromTestCase(TestPhaseSpread))
+    suite.addTests(loader.loadTestsFromTestCase(TestBurst))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
     
     # Executa testes
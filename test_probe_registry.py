@@ -0,0 +1,89 @@
+"""
+Testes para o registro compartilhado de fluxos de pings
+"""
+import unittest
+from clock import VirtualClock
+from probe_registry import ProbeRegistry
+from test_ping_monitor import FakePingMonitor
+
+
+class TestProbeRegistry(unittest.TestCase):
+    """Testes para o ProbeRegistry"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.clock = VirtualClock()
+        self.registry = ProbeRegistry(monitor_factory=FakePingMonitor, clock=self.clock)
+        self.results_a = []
+        self.results_b = []
+        self.observed = []
+        self.registry.add_observer(self.observed.append)
+    
+    def test_same_target_shares_one_stream(self):
+        """Testa se dois assinantes do mesmo alvo usam um único fluxo"""
+        sub_a = self.registry.subscribe("192.168.224.22", 1, self.results_a.append)
+        self.clock.advance(0)  # Aguarda o ping inicial
+        sub_b = self.registry.subscribe("192.168.224.22", 1, self.results_b.append)
+        self.assertEqual(self.registry.stream_count(), 1)
+        self.assertIs(sub_a.monitor, sub_b.monitor)
+        
+        self.clock.advance(2)
+        
+        self.assertEqual(len(self.results_a), 3)
+        self.assertEqual(len(self.results_b), 2)
+        # Observadores recebem cada ping uma única vez
+        self.assertEqual(len(self.observed), 3)
+        # Cada assinante recebe sua própria cópia
+        self.assertIsNot(self.results_a[-1], self.results_b[-1])
+        
+        sub_a.stop()
+        sub_b.stop()
+    
+    def test_different_interval_is_separate_stream(self):
+        """Testa se intervalos diferentes geram fluxos diferentes"""
+        sub_a = self.registry.subscribe("8.8.8.8", 1, self.results_a.append)
+        sub_b = self.registry.subscribe("8.8.8.8", 5, self.results_b.append)
+        self.assertEqual(self.registry.stream_count(), 2)
+        sub_a.stop()
+        sub_b.stop()
+    
+    def test_reference_counting(self):
+        """Testa se o fluxo só para quando o último assinante sai"""
+        sub_a = self.registry.subscribe("8.8.8.8", 1, self.results_a.append)
+        self.clock.advance(0)  # Aguarda o ping inicial
+        sub_b = self.registry.subscribe("8.8.8.8", 1, self.results_b.append)
+        monitor = sub_a.monitor
+        
+        sub_a.stop()
+        self.assertTrue(monitor.is_running)
+        self.clock.advance(1)
+        self.assertEqual(len(self.results_b), 1)
+        
+        sub_b.stop()
+        self.assertFalse(monitor.is_running)
+        self.assertEqual(self.registry.stream_count(), 0)
+        self.assertFalse(monitor.thread.is_alive())
+    
+    def test_pause_is_per_subscriber(self):
+        """Testa se o fluxo só pausa quando todos os assinantes pausam"""
+        sub_a = self.registry.subscribe("8.8.8.8", 1, self.results_a.append)
+        self.clock.advance(0)  # Aguarda o ping inicial
+        sub_b = self.registry.subscribe("8.8.8.8", 1, self.results_b.append)
+        
+        self.assertTrue(sub_a.toggle_pause())
+        self.assertFalse(sub_a.monitor.is_paused)
+        self.clock.advance(1)
+        self.assertEqual(len(self.results_a), 1)  # Apenas o ping inicial
+        self.assertEqual(len(self.results_b), 1)
+        
+        sub_b.pause()
+        self.assertTrue(sub_a.monitor.is_paused)
+        
+        self.assertFalse(sub_a.toggle_pause())
+        self.assertFalse(sub_a.monitor.is_paused)
+        sub_a.stop()
+        sub_b.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Testes para o limitador central de pings
+"""
+import threading
+import time
+import unittest
+from clock import VirtualClock
+from rate_limiter import RateLimiter
+from test_ping_monitor import FakePingMonitor
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Testes para o RateLimiter"""
+    
+    def test_bucket_keys(self):
+        """Testa a chave do bucket por sub-rede, gateway e hostname"""
+        limiter = RateLimiter(key_func={"192.168.224.22": "192.168.224.1"}.get)
+        self.assertEqual(limiter.key_for("10.1.2.3"), "10.1.2.0/24")
+        self.assertEqual(limiter.key_for("192.168.224.22"), "gw:192.168.224.1")
+        self.assertEqual(limiter.key_for("example.com"), "host:example.com")
+    
+    def test_burst_then_deferred(self):
+        """Testa se após a rajada os pings passam a ser adiados"""
+        limiter = RateLimiter(global_rate=1000, subnet_rate=20, subnet_burst=2)
+        self.assertTrue(limiter.acquire("10.0.0.1"))
+        self.assertTrue(limiter.acquire("10.0.0.2"))
+        started = time.monotonic()
+        self.assertTrue(limiter.acquire("10.0.0.3"))
+        self.assertGreaterEqual(time.monotonic() - started, 0.03)
+        self.assertEqual(limiter.stats()['deferred'], 1)
+        self.assertEqual(limiter.stats()['deferred_by_key'], {"10.0.0.0/24": 1})
+    
+    def test_stop_event_cancels_wait(self):
+        """Testa se o stop_event libera um ping que está aguardando"""
+        limiter = RateLimiter(global_rate=0.01, subnet_rate=0.01, global_burst=1, subnet_burst=1)
+        limiter.acquire("10.0.0.1")
+        stop_event = threading.Event()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(limiter.acquire("10.0.0.1", stop_event)))
+        thread.start()
+        time.sleep(0.1)
+        self.assertEqual(limiter.queue_depth(), 1)
+        stop_event.set()
+        thread.join(timeout=1)
+        self.assertEqual(results, [False])
+        self.assertEqual(limiter.queue_depth(), 0)
+    
+    def test_subnet_limit_is_fair_and_isolated(self):
+        """Testa limite por sub-rede, ordem justa e isolamento entre sub-redes"""
+        clock = VirtualClock()
+        limiter = RateLimiter(global_rate=1000, subnet_rate=10, clock=clock)
+        counts = {}
+        
+        def callback(result):
+            counts[result['ip']] = counts.get(result['ip'], 0) + 1
+        
+        busy = [FakePingMonitor(f"10.0.0.{i}", interval=1, callback=callback, clock=clock, rate_limiter=limiter)
+                for i in range(30)]
+        quiet = [FakePingMonitor(f"10.0.1.{i}", interval=1, callback=callback, clock=clock, rate_limiter=limiter)
+                 for i in range(5)]
+        for monitor in busy + quiet:
+            monitor.start()
+        clock.advance(10)
+        for monitor in busy + quiet:
+            monitor.request_stop()
+        for monitor in busy + quiet:
+            monitor.join(2)
+        
+        busy_total = sum(counts.get(m.ip, 0) for m in busy)
+        # 10 pings/s + rajada inicial de 10
+        self.assertLessEqual(busy_total, 10 * 10 + 10 + 1)
+        self.assertGreater(busy_total, 90)
+        # Ordem justa: todos os alvos da sub-rede limitada são atendidos
+        self.assertGreaterEqual(min(counts.get(m.ip, 0) for m in busy), 2)
+        # A outra sub-rede não é afetada
+        for monitor in quiet:
+            self.assertEqual(counts[monitor.ip], 11)
+        self.assertGreater(limiter.stats()['deferred_by_key']["10.0.0.0/24"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
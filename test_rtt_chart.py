@@ -0,0 +1,77 @@
+"""
+Testes para a redução de pontos do gráfico de RTT
+"""
+import math
+import random
+import unittest
+from rtt_chart import FANOUT, MinMaxPyramid, lttb
+
+
+class TestLTTB(unittest.TestCase):
+    """Testes para o Largest-Triangle-Three-Buckets"""
+
+    def test_keeps_endpoints_and_peak(self):
+        """Testa se as pontas e um pico isolado são preservados"""
+        xs = [float(i) for i in range(1000)]
+        ys = [1.0] * 1000
+        ys[537] = 50.0
+        selected = lttb(xs, ys, 20)
+        self.assertEqual(len(selected), 20)
+        self.assertEqual(selected[0], 0)
+        self.assertEqual(selected[-1], 999)
+        self.assertIn(537, selected)
+        self.assertEqual(selected, sorted(selected))
+
+    def test_small_series_unchanged(self):
+        """Testa séries menores que o limite"""
+        self.assertEqual(lttb([0.0, 1.0, 2.0], [1.0, 2.0, 3.0], 10), [0, 1, 2])
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+    """Testes para a pirâmide de mínimos/máximos"""
+
+    def setUp(self):
+        """Série aleatória com perdas"""
+        rng = random.Random(42)
+        self.values = [None if rng.random() < 0.1 else rng.uniform(1, 100) for _ in range(3000)]
+        self.pyramid = MinMaxPyramid()
+        for i, value in enumerate(self.values):
+            self.pyramid.append(float(i), value)
+
+    def brute_force(self, low, high):
+        window = self.values[low:high]
+        rtts = [v for v in window if v is not None]
+        lost = len(window) - len(rtts)
+        if not rtts:
+            return None, None, lost
+        return min(rtts), max(rtts), lost
+
+    def test_levels_are_incremental(self):
+        """Testa a quantidade de blocos por nível"""
+        self.assertEqual(len(self.pyramid.levels[0][0]), math.ceil(3000 / FANOUT))
+        self.assertEqual(len(self.pyramid.levels[1][0]), math.ceil(3000 / FANOUT ** 2))
+
+    def test_range_stats_matches_brute_force(self):
+        """Testa intervalos arbitrários contra o cálculo direto"""
+        rng = random.Random(7)
+        for _ in range(300):
+            low = rng.randrange(0, 3000)
+            high = rng.randrange(low, 3001)
+            minimum, maximum, lost, count = self.pyramid.range_stats(low, high)
+            expected = self.brute_force(low, high)
+            self.assertEqual((lost, count), (expected[2], high - low))
+            if expected[0] is None:
+                self.assertTrue(math.isnan(minimum))
+            else:
+                self.assertEqual((minimum, maximum), expected[:2])
+
+    def test_columns_cover_time_window(self):
+        """Testa a agregação de uma janela de tempo em colunas"""
+        columns = self.pyramid.columns(1000.0, 2000.0, 10)
+        self.assertEqual(len(columns), 10)
+        self.assertEqual(sum(column[3] for column in columns), 1000)
+        self.assertEqual(columns[3][:3], self.pyramid.range_stats(1300, 1400)[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Testes para o motor de pings particionado em processos
+"""
+import threading
+import time
+import unittest
+from probe_registry import ProbeRegistry
+from sharded_engine import ResultRing, ShardedMonitor, ShardedProbeEngine
+from topology import DependencyTracker
+from test_ping_monitor import FakePingMonitor
+
+
+class TestResultRing(unittest.TestCase):
+    """Testes para o anel em memória compartilhada"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.ring = ResultRing(capacity=4)
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        self.ring.close()
+
+    def test_push_and_pop(self):
+        """Testa a gravação e a leitura de registros, inclusive RTT ausente"""
+        self.assertTrue(self.ring.push(7, 'OK', 1.5, 64, 32, 1700000000.0))
+        self.assertTrue(self.ring.push(8, 'TIMEOUT', None, None, None, 1700000001.0))
+        first, second = self.ring.pop_all()
+        self.assertEqual(first[1:6], (7, 0, 64, 32, 1700000000.0))
+        self.assertEqual(first[6], 1.5)
+        self.assertEqual(second[2], 1)
+        self.assertNotEqual(second[6], second[6])  # NaN
+        self.assertEqual(self.ring.pop_all(), [])
+
+    def test_wraparound_and_full(self):
+        """Testa a volta do anel e o descarte com o anel cheio"""
+        for round_index in range(3):
+            for i in range(4):
+                self.assertTrue(self.ring.push(i, 'OK', float(i), 0, 0, 0.0))
+            self.assertFalse(self.ring.push(9, 'OK', 9.0, 0, 0, 0.0))
+            records = self.ring.pop_all()
+            self.assertEqual([r[1] for r in records], [0, 1, 2, 3])
+        self.assertEqual(self.ring.dropped(), 3)
+
+    def test_burst_fields(self):
+        """Testa se as estatísticas da rajada atravessam o anel"""
+        engine = ShardedProbeEngine(workers=1)
+        engine._rings.append(self.ring)
+        engine._targets[3] = "10.0.0.3"
+        burst = {'sent': 5, 'received': 4, 'rtt_min': 1.0, 'rtt_max': 3.0, 'rtt_mdev': 0.5}
+        self.ring.push(3, 'OK', 2.0, 64, 32, 1700000000.0, burst)
+        self.ring.push(3, 'OK', 2.0, 64, 32, 1700000001.0)
+        burst_result, single = engine.poll()
+        self.assertEqual((burst_result['sent'], burst_result['received']), (5, 4))
+        self.assertAlmostEqual(burst_result['loss_pct'], 20.0)
+        self.assertEqual((burst_result['rtt_min'], burst_result['rtt_avg'], burst_result['rtt_max']),
+                         (1.0, 2.0, 3.0))
+        self.assertNotIn('sent', single)
+
+    def test_attach_by_name(self):
+        """Testa um segundo handle conectado pelo nome (como o processo de trabalho)"""
+        producer = ResultRing(capacity=4, name=self.ring.name)
+        producer.push(1, 'ERROR', None, None, None, 0.0)
+        producer.close()
+        self.assertEqual(self.ring.pop_all()[0][1:3], (1, 2))
+
+
+class TestShardedProbeEngine(unittest.TestCase):
+    """Testes para o ShardedProbeEngine"""
+
+    def test_targets_spread_across_workers(self):
+        """Testa se os alvos de várias partições chegam pelos anéis"""
+        engine = ShardedProbeEngine(workers=2, monitor_factory=FakePingMonitor)
+        engine.start(dispatch=False)
+        try:
+            targets = [f"10.0.0.{i}" for i in range(6)]
+            for ip in targets:
+                engine.add(ip, 1)
+            self.assertEqual(sorted(engine._shard_of.values()), [0, 0, 0, 1, 1, 1])
+
+            seen = set()
+            deadline = time.monotonic() + 10
+            while seen != set(targets) and time.monotonic() < deadline:
+                for result in engine.poll():
+                    self.assertEqual(result['status'], 'OK')
+                    self.assertEqual(result['rtt_ms'], 1.0)
+                    seen.add(result['ip'])
+                time.sleep(0.05)
+            self.assertEqual(seen, set(targets))
+        finally:
+            engine.stop()
+
+    def test_rejects_local_only_arguments(self):
+        """Testa se argumentos do processo principal (topologia, vizinhos) são recusados"""
+        with self.assertRaises(ValueError):
+            ShardedProbeEngine(workers=1, dependency=DependencyTracker({}))
+        ShardedProbeEngine(workers=1, burst=5, neighbors=None)
+
+    def test_registry_uses_sharded_monitors(self):
+        """Testa a entrega aos callbacks pelo ProbeRegistry"""
+        engine = ShardedProbeEngine(workers=1, monitor_factory=FakePingMonitor, poll_interval=0.01)
+        engine.start()
+        try:
+            registry = ProbeRegistry(sharded_engine=engine)
+            received = threading.Event()
+            results = []
+
+            def callback(result):
+                results.append(result)
+                received.set()
+
+            subscription = registry.subscribe("192.168.224.22", 1, callback)
+            self.assertIsInstance(subscription.monitor, ShardedMonitor)
+            self.assertTrue(received.wait(10))
+            subscription.stop()
+            self.assertEqual(results[0]['ip'], "192.168.224.22")
+            self.assertEqual(engine._shard_of, {})
+        finally:
+            engine.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Testes para o probe de conexão TCP
+"""
+import socket
+import threading
+import time
+import unittest
+from probe_registry import ProbeRegistry
+from tcp_probe import Resolver, TCPMonitor, TCPProbeEngine, parse_tcp_target
+
+
+def free_port() -> int:
+    """Retorna uma porta local sem ninguém escutando"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestTCPProbe(unittest.TestCase):
+    """Testes para o TCPProbeEngine e o TCPMonitor"""
+
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(128)
+        self.open_target = f"127.0.0.1:{self.listener.getsockname()[1]}"
+        self.closed_target = f"127.0.0.1:{free_port()}"
+
+    def tearDown(self):
+        """Limpeza após cada teste"""
+        self.listener.close()
+
+    def test_parse_target(self):
+        """Testa o reconhecimento de alvos host:porta"""
+        self.assertEqual(parse_tcp_target("10.0.0.1:443"), ("10.0.0.1", 443))
+        self.assertEqual(parse_tcp_target("example.com:80"), ("example.com", 80))
+        self.assertEqual(parse_tcp_target("[::1]:22"), ("::1", 22))
+        self.assertIsNone(parse_tcp_target("10.0.0.1"))
+        self.assertIsNone(parse_tcp_target("::1"))
+        self.assertIsNone(parse_tcp_target("10.0.0.1:99999"))
+
+    def test_probe_many(self):
+        """Testa connects simultâneos em porta aberta e fechada"""
+        engine = TCPProbeEngine(timeout=2.0)
+        targets = [self.open_target] * 50 + [self.closed_target, "sem-porta"]
+        results = engine.probe_many(targets)
+
+        self.assertEqual(len(results), len(targets))
+        for result in results[:50]:
+            self.assertEqual(result['status'], 'OK')
+            self.assertEqual(result['ip'], self.open_target)
+            self.assertGreaterEqual(result['rtt_ms'], 0)
+            self.assertEqual(result['probe'], 'tcp')
+        self.assertEqual(results[50]['status'], 'ERROR')
+        self.assertEqual(results[51]['status'], 'ERROR')
+
+    def test_slow_resolver_does_not_stall_other_probes(self):
+        """Testa se um nome lento resolve fora da thread do motor sem atrasar os outros connects"""
+        calls = []
+
+        def slow_getaddrinfo(host, port, type=0):
+            calls.append(host)
+            if host == 'lento.example':
+                time.sleep(0.5)
+            return socket.getaddrinfo('127.0.0.1', port, type=type)
+
+        engine = TCPProbeEngine(timeout=2.0, resolver=Resolver(getaddrinfo=slow_getaddrinfo))
+        port = self.open_target.split(':')[1]
+        results = engine.probe_many([self.open_target, f"lento.example:{port}", f"rapido.example:{port}"])
+        self.assertEqual([r['status'] for r in results], ['OK', 'OK', 'OK'])
+        # O RTT mede só o handshake: a resolução lenta não entra em nenhum resultado
+        for result in results:
+            self.assertLess(result['rtt_ms'], 400)
+
+        # Segunda rodada: nomes no cache, sem nova resolução
+        engine.probe_many([f"lento.example:{port}", f"rapido.example:{port}"])
+        self.assertEqual(sorted(calls), ['lento.example', 'rapido.example'])
+        engine.stop()
+
+    def test_resolution_timeout(self):
+        """Testa o TIMEOUT quando a resolução passa do timeout do probe"""
+        def stuck_getaddrinfo(host, port, type=0):
+            time.sleep(0.3)
+            return socket.getaddrinfo('127.0.0.1', port, type=type)
+
+        engine = TCPProbeEngine(timeout=0.1, resolver=Resolver(getaddrinfo=stuck_getaddrinfo))
+        result = engine.probe_many([f"preso.example:{self.open_target.split(':')[1]}"])[0]
+        self.assertEqual(result['status'], 'TIMEOUT')
+        engine.stop()
+
+    def test_monitor_reports_periodically(self):
+        """Testa o TCPMonitor agendado no motor compartilhado"""
+        engine = TCPProbeEngine(timeout=1.0)
+        received = []
+        done = threading.Event()
+
+        def callback(result):
+            received.append(result)
+            if len(received) >= 2:
+                done.set()
+
+        monitor = TCPMonitor(self.open_target, interval=0.05, callback=callback, engine=engine)
+        monitor.start()
+        self.assertTrue(done.wait(5))
+        monitor.stop()
+        engine.stop()
+
+        self.assertTrue(all(r['status'] == 'OK' for r in received))
+        self.assertFalse(engine._in_flight)
+
+    def test_registry_creates_tcp_monitor(self):
+        """Testa se o registro usa o motor TCP para alvos host:porta"""
+        registry = ProbeRegistry()
+        done = threading.Event()
+        results = []
+
+        def callback(result):
+            results.append(result)
+            done.set()
+
+        subscription = registry.subscribe(self.closed_target, 1, callback)
+        self.assertIsInstance(subscription.monitor, TCPMonitor)
+        self.assertTrue(done.wait(5))
+        subscription.stop()
+        registry.tcp_engine.stop()
+
+        self.assertEqual(results[0]['status'], 'ERROR')
+        self.assertEqual(results[0]['ip'], self.closed_target)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Testes para o histórico em camadas
+"""
+import unittest
+from datetime import datetime, timedelta
+from tiered_history import TieredHistory
+
+
+START = datetime(2024, 1, 15, 0, 0, 0)
+
+
+def make_result(seconds: float, status: str = 'OK', rtt_ms: float = 1.0) -> dict:
+    return {'timestamp': (START + timedelta(seconds=seconds)).isoformat(), 'status': status,
+            'rtt_ms': rtt_ms if status == 'OK' else None}
+
+
+def epoch(seconds: float) -> float:
+    return (START + timedelta(seconds=seconds)).timestamp()
+
+
+class TestTieredHistory(unittest.TestCase):
+    """Testes para o TieredHistory"""
+
+    def test_recent_range_uses_raw_samples(self):
+        """Testa a consulta recente em amostras brutas e as últimas amostras"""
+        history = TieredHistory()
+        for i in range(100):
+            history.append(make_result(i, rtt_ms=float(i)))
+        width, points = history.series(epoch(90))
+        self.assertIsNone(width)
+        self.assertEqual([p['rtt_ms'] for p in points], [float(i) for i in range(90, 100)])
+        self.assertEqual([p['rtt_ms'] for p in history.latest(3)], [97.0, 98.0, 99.0])
+
+    def test_rollup_to_minutes_and_quarters(self):
+        """Testa os agregados incrementais depois que a janela bruta expira"""
+        history = TieredHistory(raw_window=3600)
+        # 3 horas a cada 10 s; a segunda hora tem 30 s de queda por minuto
+        for i in range(0, 3 * 3600, 10):
+            lost = 3600 <= i < 7200 and i % 60 < 30
+            history.append(make_result(i, 'TIMEOUT' if lost else 'OK', rtt_ms=2.0 + (i % 60) / 10))
+        self.assertLessEqual(len(history), 361)
+
+        width, points = history.series(epoch(3600), epoch(7199))
+        self.assertEqual(width, 60)
+        self.assertEqual(len(points), 60)
+        self.assertEqual(points[0]['samples'], 6)
+        self.assertEqual(points[0]['loss_pct'], 50.0)
+        self.assertEqual((points[0]['rtt_min'], points[0]['rtt_max']), (5.0, 7.0))
+
+        summary = history.summary(epoch(0))
+        self.assertEqual(summary['samples'], 3 * 360)
+        self.assertAlmostEqual(summary['loss_pct'], 100.0 * 180 / 1080)
+        self.assertEqual(summary['rtt_min'], 2.0)
+
+    def test_fixed_memory_and_coarse_fallback(self):
+        """Testa o limite de cada camada e a consulta antiga na camada de 15 minutos"""
+        history = TieredHistory(raw_window=600, raw_capacity=100, tiers=((60, 30), (900, 10)))
+        for i in range(0, 4 * 3600, 5):
+            history.append(make_result(i))
+        self.assertEqual(len(history), 100)
+        self.assertEqual(len(history._closed[0]), 30)
+        self.assertEqual(len(history._closed[1]), 10)
+        self.assertEqual(history.memory_bound(), {'raw': 100, '60s': 31, '900s': 11})
+
+        width, points = history.series(epoch(4500), epoch(4500 + 3600 - 1))
+        self.assertEqual(width, 900)
+        self.assertEqual([p['samples'] for p in points], [180] * 4)
+        self.assertEqual(history.series(epoch(3 * 3600 + 2000))[0], 60)
+
+    def test_clear_and_invalid_input(self):
+        """Testa o descarte e entradas sem timestamp ou fora de ordem"""
+        history = TieredHistory()
+        history.append(make_result(10))
+        history.append(make_result(5))
+        history.append({'status': 'OK', 'timestamp': 'x'})
+        self.assertEqual(len(history), 1)
+        history.clear()
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.summary(epoch(0))['samples'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
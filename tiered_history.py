@@ -0,0 +1,197 @@
+"""
+Histórico em memória por alvo, em camadas com resolução decrescente
+Amostras brutas da última hora, agregados de 1 minuto do último dia e de 15 minutos do
+último mês; os agregados são atualizados a cada amostra, com memória fixa por alvo
+"""
+import math
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class Bucket:
+    """Agregado de um intervalo: amostras, perdas e RTT (mínimo, máximo, soma)"""
+
+    __slots__ = ('start', 'count', 'lost', 'rtt_count', 'rtt_sum', 'rtt_min', 'rtt_max')
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.lost = 0
+        self.rtt_count = 0
+        self.rtt_sum = 0.0
+        self.rtt_min = math.inf
+        self.rtt_max = -math.inf
+
+    def add(self, ok: bool, rtt_ms: Optional[float]):
+        """Acrescenta uma amostra"""
+        self.count += 1
+        if not ok:
+            self.lost += 1
+        elif rtt_ms is not None:
+            self.rtt_count += 1
+            self.rtt_sum += rtt_ms
+            self.rtt_min = min(self.rtt_min, rtt_ms)
+            self.rtt_max = max(self.rtt_max, rtt_ms)
+
+    def merge(self, other: 'Bucket'):
+        """Acrescenta outro agregado"""
+        self.count += other.count
+        self.lost += other.lost
+        self.rtt_count += other.rtt_count
+        self.rtt_sum += other.rtt_sum
+        self.rtt_min = min(self.rtt_min, other.rtt_min)
+        self.rtt_max = max(self.rtt_max, other.rtt_max)
+
+    def to_dict(self) -> Dict:
+        """Resumo do agregado (RTT None sem respostas)"""
+        has_rtt = self.rtt_count > 0
+        return {
+            'start': self.start,
+            'samples': self.count,
+            'loss_pct': 100.0 * self.lost / self.count if self.count else None,
+            'rtt_avg': self.rtt_sum / self.rtt_count if has_rtt else None,
+            'rtt_min': self.rtt_min if has_rtt else None,
+            'rtt_max': self.rtt_max if has_rtt else None
+        }
+
+
+class TieredHistory:
+    """Histórico de um alvo com custo de memória fixo"""
+
+    # (largura do agregado em segundos, quantidade mantida): 1 dia de minutos, 30 dias de 15 minutos
+    TIERS = ((60, 24 * 60), (15 * 60, 30 * 24 * 4))
+
+    def __init__(self, raw_window: float = 3600.0, raw_capacity: int = 3600,
+                 tiers: Tuple[Tuple[int, int], ...] = TIERS):
+        """
+        Inicializa o histórico
+
+        Args:
+            raw_window: Tempo em segundos mantido em amostras brutas
+            raw_capacity: Máximo de amostras brutas (limite de memória; 3600 = 1 por segundo)
+            tiers: (largura em segundos, quantidade) de cada camada de agregados, da mais fina à mais grossa
+        """
+        self.raw_window = raw_window
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        # Amostras brutas: (tempo em segundos da época, ok, rtt_ms, status)
+        self._raw = deque(maxlen=raw_capacity)
+        self._raw_evicted = False  # Amostras brutas já descartadas (a janela não vai até o início)
+        self._closed = [deque(maxlen=count) for _, count in tiers]
+        self._open: List[Optional[Bucket]] = [None] * len(tiers)
+
+    def append(self, ping_result: Dict):
+        """Acrescenta um resultado do PingMonitor e atualiza os agregados abertos"""
+        try:
+            moment = datetime.fromisoformat(ping_result.get('timestamp', '')).timestamp()
+        except (TypeError, ValueError):
+            return
+        status = ping_result.get('status', 'ERROR')
+        ok = status == 'OK'
+        rtt_ms = ping_result.get('rtt_ms')
+        with self._lock:
+            if self._raw and moment < self._raw[-1][0]:
+                return  # Fora de ordem: os agregados só avançam
+            if len(self._raw) == self._raw.maxlen:
+                self._raw_evicted = True
+            self._raw.append((moment, ok, rtt_ms, status))
+            while self._raw[0][0] < moment - self.raw_window:
+                self._raw.popleft()
+                self._raw_evicted = True
+            for tier, (width, _) in enumerate(self.tiers):
+                start = moment - moment % width
+                bucket = self._open[tier]
+                if bucket is None or bucket.start != start:
+                    if bucket is not None:
+                        self._closed[tier].append(bucket)
+                    bucket = self._open[tier] = Bucket(start)
+                bucket.add(ok, rtt_ms)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def clear(self):
+        """Descarta todo o histórico"""
+        with self._lock:
+            self._raw.clear()
+            self._raw_evicted = False
+            for closed in self._closed:
+                closed.clear()
+            self._open = [None] * len(self.tiers)
+
+    def latest(self, count: int = 20) -> List[Dict]:
+        """Retorna as `count` amostras brutas mais recentes (tempo, status, rtt_ms)"""
+        with self._lock:
+            samples = list(self._raw)[-count:]
+        return [{'time': moment, 'status': status, 'rtt_ms': rtt_ms} for moment, _, rtt_ms, status in samples]
+
+    def _buckets(self, tier: int) -> List[Bucket]:
+        buckets = list(self._closed[tier])
+        if self._open[tier] is not None:
+            buckets.append(self._open[tier])
+        return buckets
+
+    def series(self, start: float, end: Optional[float] = None) -> Tuple[Optional[int], List[Dict]]:
+        """
+        Retorna a série de [start, end] na camada mais fina que cobre start
+
+        Args:
+            start: Início em segundos da época
+            end: Fim em segundos da época (None = até a amostra mais recente)
+
+        Returns:
+            (largura dos agregados em segundos, ou None para amostras brutas; lista de pontos)
+            Amostras brutas: {'time', 'status', 'rtt_ms'}; agregados: Bucket.to_dict()
+        """
+        end = math.inf if end is None else end
+        with self._lock:
+            if self._raw_covers(start):
+                return None, [{'time': moment, 'status': status, 'rtt_ms': rtt_ms}
+                              for moment, _, rtt_ms, status in self._raw if start <= moment <= end]
+            tier = self._tier_for(start)
+            width = self.tiers[tier][0]
+            return width, [bucket.to_dict() for bucket in self._buckets(tier)
+                           if bucket.start + width > start and bucket.start <= end]
+
+    def summary(self, start: float, end: Optional[float] = None) -> Dict:
+        """
+        Agrega [start, end] na camada mais fina que cobre start (perda, RTT médio/mínimo/máximo)
+
+        Returns:
+            Bucket.to_dict() do intervalo (start = início pedido)
+        """
+        end = math.inf if end is None else end
+        total = Bucket(start)
+        with self._lock:
+            if self._raw_covers(start):
+                for moment, ok, rtt_ms, _ in self._raw:
+                    if start <= moment <= end:
+                        total.add(ok, rtt_ms)
+            else:
+                tier = self._tier_for(start)
+                width = self.tiers[tier][0]
+                for bucket in self._buckets(tier):
+                    if bucket.start + width > start and bucket.start <= end:
+                        total.merge(bucket)
+        return total.to_dict()
+
+    def _raw_covers(self, start: float) -> bool:
+        """Indica se as amostras brutas têm tudo desde start"""
+        return bool(self._raw) and (not self._raw_evicted or start >= self._raw[0][0])
+
+    def _tier_for(self, start: float) -> int:
+        """Camada mais fina que tem tudo desde start (senão, a mais grossa)"""
+        for tier, (_, count) in enumerate(self.tiers):
+            closed = self._closed[tier]
+            if len(closed) < count or closed[0].start <= start:
+                return tier
+        return len(self.tiers) - 1
+
+    def memory_bound(self) -> Dict:
+        """Quantidade máxima de entradas guardadas em cada camada (custo fixo por alvo)"""
+        return {
+            'raw': self._raw.maxlen,
+            **{f"{width}s": count + 1 for width, count in self.tiers}
+        }
@@ -0,0 +1,75 @@
+"""
+Topologia de dependência entre alvos (filho alcançado através de um pai/gateway)
+Permite suspender os pings dos filhos enquanto o pai está confirmadamente fora do ar
+"""
+import threading
+from typing import Dict, Optional
+
+
+class DependencyTracker:
+    """Acompanha o estado dos pais e informa quais filhos estão inacessíveis via pai"""
+
+    def __init__(self, parents: Optional[Dict[str, str]] = None, down_threshold: int = 2):
+        """
+        Inicializa o rastreador
+
+        Args:
+            parents: Dicionário {ip do filho: ip do pai} (ex: IPCatalog.get_topology())
+            down_threshold: Falhas seguidas para considerar um pai fora do ar
+        """
+        self.down_threshold = down_threshold
+        self._lock = threading.Lock()
+        self._parents: Dict[str, str] = dict(parents or {})
+        self._failures: Dict[str, int] = {}  # {ip: falhas seguidas}
+
+    def set_parents(self, parents: Dict[str, str]):
+        """Substitui as relações de dependência (ex: após editar o catálogo)"""
+        with self._lock:
+            self._parents = dict(parents)
+
+    def get_parent(self, ip: str) -> Optional[str]:
+        """Retorna o pai direto de um IP (None se não tiver)"""
+        with self._lock:
+            return self._parents.get(ip)
+
+    def observe(self, ping_result: Dict):
+        """
+        Registra um resultado de ping (chamado para todos os alvos monitorados)
+
+        Args:
+            ping_result: Dicionário produzido pelo PingMonitor
+        """
+        ip = ping_result.get('ip')
+        status = ping_result.get('status')
+        if not ip or status == 'UNREACHABLE':
+            return  # Resultados sintéticos não dizem nada sobre o próprio host
+        with self._lock:
+            if status == 'OK':
+                self._failures.pop(ip, None)
+            else:
+                self._failures[ip] = self._failures.get(ip, 0) + 1
+
+    def is_down(self, ip: str) -> bool:
+        """Retorna True se o IP está confirmadamente fora do ar"""
+        with self._lock:
+            return self._failures.get(ip, 0) >= self.down_threshold
+
+    def blocking_parent(self, ip: str) -> Optional[str]:
+        """
+        Retorna o ancestral mais próximo que está fora do ar
+
+        Args:
+            ip: IP do filho
+
+        Returns:
+            IP do ancestral fora do ar, ou None se o caminho está livre
+        """
+        with self._lock:
+            seen = {ip}
+            parent = self._parents.get(ip)
+            while parent and parent not in seen:
+                if self._failures.get(parent, 0) >= self.down_threshold:
+                    return parent
+                seen.add(parent)
+                parent = self._parents.get(parent)
+            return None